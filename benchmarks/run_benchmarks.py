@@ -0,0 +1,279 @@
+"""
+Scheduling engine benchmarks on synthetic institutions (unischedule_django/core/synthetic.py).
+
+    python benchmarks/run_benchmarks.py                           # every engine, 100 to 20k slots
+    python benchmarks/run_benchmarks.py --engines core core-numpy --sizes 1000 5000 -o after.json
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+    python benchmarks/run_benchmarks.py --snapshots lcu.snap     # a real institution, see below
+    python benchmarks/run_benchmarks.py --bookings 10000 20000   # booking storage, see bookings_benchmark
+
+Each dataset is generated once and written to a snapshot (core/snapshot.py); each (engine, size)
+run then happens in its own process that memory-maps the snapshot, so peak memory is per run
+and the engines don't share imports. Snapshots of real institutions come from
+`python manage.py export_snapshot <institution id> -o lcu.snap`. Results are written as JSON
+(one record per run, plus the commit and machine), and --compare lists wall-time and failure
+changes between two result files.
+
+Engines:
+- core, core-dsatur, core-numpy, core-intervals: unischedule_django/core/scheduler.py (input
+  order / DSatur order / numpy backend / sorted-interval backend)
+- core-parallel: unischedule_django/core/decompose.py, the greedy pass split into parts solved
+  in one worker process per CPU
+- legacy: backend/scheduler.py, the original string-time engine. newera/scheduler.py is the
+  same code (its algoclass only has the exam classes), so it isn't run separately.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DJANGO_DIR = os.path.join(ROOT, "unischedule_django")
+LEGACY_DIR = os.path.join(ROOT, "backend")
+
+ENGINES = ["core", "core-dsatur", "core-numpy", "core-intervals", "core-parallel", "legacy"]
+SIZES = [100, 500, 1000, 2000, 5000, 10000, 20000]
+
+
+def _legacy_input(courses, rooms):
+    """The synthetic institution rebuilt with the legacy engine's algoclass (string times)"""
+    from algoclass import Room, Course, TimeSlot
+    return (
+        [Course(c.course_id, c.name, c.level, c.num_students,
+                [TimeSlot(ts.day, ts.start_time, ts.end_time) for ts in c.time_slots], c.lecturer_id)
+         for c in courses],
+        [Room(r.room_id, r.name, r.capacity) for r in rooms],
+    )
+
+
+def _django_path():
+    if DJANGO_DIR not in sys.path:
+        sys.path.insert(0, DJANGO_DIR)
+
+
+def write_dataset(directory, slots, seed, tightness):
+    """Generates a synthetic institution and writes it to a snapshot, returns its path"""
+    _django_path()
+    from core.algoclass import SchedulingInput, DEFAULT_TIME_GRID
+    from core.snapshot import write_snapshot
+    from core.synthetic import generate_institution
+    courses, rooms = generate_institution(slots, tightness=tightness, seed=seed)
+    lecturer_names = {lecturer_id: f"Lecturer {lecturer_id}" for lecturer_id in {c.lecturer_id for c in courses}}
+    path = os.path.join(directory, f"synthetic-{slots}-{seed}-{tightness}.snap")
+    write_snapshot(path, SchedulingInput(rooms, courses, lecturer_names, DEFAULT_TIME_GRID))
+    return path
+
+
+def run_one(engine, snapshot):
+    """
+    Runs one engine on one dataset snapshot in this process, returns its result record
+    """
+    _django_path()
+    from core.snapshot import read_snapshot
+    loaded, digest = read_snapshot(snapshot)
+    courses, rooms, time_grid = loaded.courses, loaded.rooms, loaded.time_grid
+
+    if engine == "legacy":
+        sys.path.insert(0, LEGACY_DIR)
+        from scheduler import auto_schedule_courses
+        courses, rooms = _legacy_input(courses, rooms)
+        solve = lambda logs: auto_schedule_courses(courses, rooms, logs)
+    elif engine == "core-parallel":
+        from core.decompose import decomposed_schedule
+        solve = lambda logs: decomposed_schedule(courses, rooms, logs, time_grid=time_grid, snapshot=snapshot)[:2]
+    else:
+        from core.scheduler import auto_schedule_courses
+        backend = {"core-numpy": "numpy", "core-intervals": "intervals"}.get(engine, "python")
+        order = "dsatur" if engine == "core-dsatur" else "input"
+        solve = lambda logs: auto_schedule_courses(courses, rooms, logs, backend=backend, order=order,
+                                                   time_grid=time_grid)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    logs = []
+    started = time.perf_counter()
+    bookings, failed = solve(logs)
+    wall = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        "engine": engine,
+        "dataset": digest[:12],
+        "slots": sum(len(c.time_slots) for c in courses),
+        "courses": len(courses),
+        "rooms": len(rooms),
+        "status": "ok",
+        "wall_s": round(wall, 4),
+        "peak_rss_mb": round(rss_after / 1024, 1),  # whole process (Linux reports KiB)
+        "solve_rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+        "bookings": len(bookings),
+        "failed": len(failed),
+        "fallbacks": len(logs),  # every engine logs one line per class booked away from its slot
+    }
+
+
+def bookings_benchmark(sizes, seed, repeat):
+    """
+    Booking storage: memory (tracemalloc) and build time of n bookings kept as a list of
+    Booking objects, as a BookingTable appended row by row and built from rows in bulk, and the
+    time to iterate each (a table yields new Booking views). The Room/Course/TimeSlot objects
+    are shared by both and not counted.
+    """
+    _django_path()
+    from core.algoclass import Booking, BookingTable
+    from core.synthetic import generate_institution
+
+    print(f"{'bookings':>8} {'storage':<16} {'memory MB':>10} {'bytes/row':>10} {'build ms':>9} {'iterate ms':>11}")
+    for n in sizes:
+        courses, rooms = generate_institution(n, seed=seed)
+        rows = []  # (booking_id, course index, room index, start, end, requested index), as requested
+        for i, course in enumerate(courses):
+            for k, timeslot in enumerate(course.time_slots):
+                rows.append((len(rows) + 1, i, i % len(rooms), timeslot.start, timeslot.end, k))
+
+        def as_list():
+            return [Booking(booking_id, rooms[r], courses[c], start, end, courses[c].time_slots[k])
+                    for booking_id, c, r, start, end, k in rows]
+
+        def appended():
+            table = BookingTable(courses, rooms)
+            for row in rows:
+                table.add(*row)
+            return table
+
+        builds = {"list": as_list, "table (add)": appended,
+                  "table (rows)": lambda: BookingTable.from_rows(rows, courses, rooms)}
+        for name, build in builds.items():
+            build_s = iterate_s = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                built = build()
+                build_s = min(build_s, time.perf_counter() - started)
+                started = time.perf_counter()
+                for _ in built:
+                    pass
+                iterate_s = min(iterate_s, time.perf_counter() - started)
+                del built
+            tracemalloc.start()
+            built = build()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del built
+            print(f"{len(rows):>8} {name:<16} {memory / 2 ** 20:>10.2f} {memory / len(rows):>10.1f} "
+                  f"{build_s * 1000:>9.1f} {iterate_s * 1000:>11.1f}", flush=True)
+
+
+def run_isolated(engine, snapshot, record, timeout):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", engine, snapshot]
+    try:
+        done = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {**record, "status": "timeout"}
+    if done.returncode != 0:
+        error = done.stderr.strip().splitlines()
+        return {**record, "status": "error", "error": error[-1] if error else f"exit code {done.returncode}"}
+    return {**record, **json.loads(done.stdout.strip().splitlines()[-1])}
+
+
+def run_engine(engine, snapshot, dataset, args):
+    record = {"engine": engine, **dataset}
+    if engine == "legacy" and dataset.get("slots", 0) > args.legacy_max_slots:
+        return {**record, "status": "skipped"}
+    runs = [run_isolated(engine, snapshot, record, args.timeout) for _ in range(args.repeat)]
+    ok = [r for r in runs if r["status"] == "ok"]
+    record = min(ok, key=lambda r: r["wall_s"]) if ok else runs[-1]
+    print(f"{engine:<14} {record.get('slots', '-'):>6} {record['status']:<8} "
+          + (f"{record['wall_s']:.3f}s {record['peak_rss_mb']}MB failed={record['failed']} "
+             f"fallbacks={record['fallbacks']}" if record["status"] == "ok" else record.get("error", "")),
+          flush=True)
+    return record
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = {(r["engine"], r["slots"]): r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = json.load(f)["results"]
+    print(f"{'engine':<14} {'slots':>6} {'before s':>9} {'after s':>9} {'ratio':>6} {'failed':>13} {'fallbacks':>13}")
+    for new in after:
+        old = before.get((new["engine"], new["slots"]))
+        if not old or old["status"] != "ok" or new["status"] != "ok":
+            print(f"{new['engine']:<14} {new['slots']:>6} {'-' if not old else old['status']:>9} {new['status']:>9}")
+            continue
+        ratio = new["wall_s"] / old["wall_s"] if old["wall_s"] else float("inf")
+        print(f"{new['engine']:<14} {new['slots']:>6} {old['wall_s']:>9.3f} {new['wall_s']:>9.3f} {ratio:>6.2f} "
+              f"{old['failed']:>6}->{new['failed']:<6} {old['fallbacks']:>6}->{new['fallbacks']:<6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scheduling engines on synthetic institutions.")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="course slots per dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tightness", type=float, default=0.7, help="requested / available room-hours")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per engine and size, the fastest is kept")
+    parser.add_argument("--timeout", type=float, default=900, help="seconds per run")
+    parser.add_argument("--legacy-max-slots", type=int, default=2000,
+                        help="skip the legacy engine above this size (it is quadratic)")
+    parser.add_argument("-o", "--output", default=None, help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--snapshots", nargs="+", metavar="SNAPSHOT",
+                        help="benchmark these dataset snapshots instead of synthetic institutions")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results files and exit")
+    parser.add_argument("--bookings", nargs="+", type=int, metavar="N",
+                        help="benchmark booking storage (list vs BookingTable) at these sizes and exit")
+    parser.add_argument("--worker", nargs=2, metavar=("ENGINE", "SNAPSHOT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_one(*args.worker)))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.bookings:
+        bookings_benchmark(args.bookings, args.seed, max(args.repeat, 3))
+        return
+
+    commit = git_commit()
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        if args.snapshots:
+            datasets = [(path, {"snapshot": os.path.basename(path)}) for path in args.snapshots]
+        else:
+            datasets = [(write_dataset(directory, slots, args.seed, args.tightness),
+                         {"slots": slots, "seed": args.seed, "tightness": args.tightness}) for slots in args.sizes]
+        for snapshot, dataset in datasets:
+            for engine in args.engines:
+                results.append(run_engine(engine, snapshot, dataset, args))
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {"seed": args.seed, "tightness": args.tightness, "repeat": args.repeat},
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
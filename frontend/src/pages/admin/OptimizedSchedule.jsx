@@ -17,6 +17,7 @@ export default function OptimizedSchedule() {
   const [schedule, setSchedule] = useState([]);
   const [failedBookings, setFailedBookings] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [progress, setProgress] = useState(null); // latest streamed solver progress event
 
   // Dropdown: user picks a faculty & academic session
   const [faculty, setFaculty] = useState("");          // or default to "Science"
@@ -44,7 +45,7 @@ export default function OptimizedSchedule() {
   // };
 
 
-  const runAlgorithm = async () => {
+  const runAlgorithmOnce = async () => {
     setLoading(true);
     const startTime = Date.now(); // Record the start time
   
@@ -66,7 +67,63 @@ export default function OptimizedSchedule() {
       setLoading(false);
     }
   };
-  
+  // Streamed run: bookings show up in the timetable as the solver places them.
+  // fetch + reader instead of EventSource, which can't send the Authorization header.
+  const handleStreamEvent = (message) => {
+    let name = "message";
+    let data = "";
+    message.split("\n").forEach((line) => {
+      if (line.startsWith("event: ")) name = line.slice(7);
+      else if (line.startsWith("data: ")) data += line.slice(6);
+    });
+    if (!data) return; // keepalive comment
+
+    const payload = JSON.parse(data);
+    if (name === "progress") {
+      setProgress(payload);
+      setSchedule((prev) => [...prev, ...payload.bookings]);
+    } else if (name === "result") {
+      setLogs(payload.logs);
+      setSchedule(payload.bookings);
+      setFailedBookings(payload.failed_bookings);
+    } else if (name === "error") {
+      console.error("Error:", payload.error);
+    }
+  };
+
+  const runAlgorithm = async () => {
+    const token = localStorage.getItem("access") || sessionStorage.getItem("access");
+    clearLogs();
+    setLoading(true);
+    try {
+      const res = await fetch("http://127.0.0.1:8000/api/run-algorithm/stream", {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (res.status === 401) {
+        // Expired token: the plain request refreshes it
+        return runAlgorithmOnce();
+      }
+      if (!res.ok || !res.body) throw new Error("Failed to run the algorithm");
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const messages = buffer.split("\n\n");
+        buffer = messages.pop();
+        messages.forEach(handleStreamEvent);
+      }
+      setLoading(false);
+    } catch (error) {
+      console.error("Error:", error);
+      setLoading(false);
+    } finally {
+      setProgress(null);
+    }
+  };
 
   // 2) Clear logs
   const clearLogs = () => {
@@ -218,11 +275,18 @@ return (
           <img src={infinityGif} alt="Loading..." className="w-40 h-40" />
       </div>
     )}
+    {loading && progress && (
+      <p className="text-center text-gray-600 mt-2">
+        {progress.processed} / {progress.total} classes processed · {progress.placed} placed
+        ({progress.fallbacks} moved) · {progress.failed} failed
+      </p>
+    )}
 
-    {/* Display the timetable & logs only when not loading */}
-    {!loading && logs.length > 0 && (
+    {/* Display the timetable & logs once they arrive (bookings stream in while loading) */}
+    {(logs.length > 0 || schedule.length > 0) && (
       <div>
         {/* Logs Section */}
+        {!loading && logs.length > 0 && (
         <div className="mt-6 bg-gray-100 p-4 rounded">
           <h3 className="text-lg font-semibold mb-2">📝 Algorithm Logs:</h3>
           <ul className="list-disc list-inside">
@@ -244,6 +308,7 @@ return (
             })}
           </ul>
         </div>
+        )}
 
         {/* Timetable */}
         {schedule.length > 0 && (
@@ -1,4 +1,6 @@
 class ExamBooking:
+    __slots__ = ("course", "room", "time_slot")
+
     def __init__(self, course, room, time_slot):
         self.course = course
         self.room = room
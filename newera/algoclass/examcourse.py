@@ -1,4 +1,6 @@
 class ExamCourse:
+    __slots__ = ("code", "title", "departments", "num_students", "duration_hours", "level")
+
     def __init__(self, code, title, departments, num_students, duration_hours):
         """
         Represents a single course to be scheduled for exams.
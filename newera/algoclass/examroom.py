@@ -1,4 +1,6 @@
 class ExamRoom:
+    __slots__ = ("name", "capacity")
+
     def __init__(self, name, capacity):
         """
         Represents an exam venue (room or hall).
@@ -1,4 +1,19 @@
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def parse_time(value):
+    """
+    "HH:MM" -> minutes since midnight, e.g. "09:30" -> 570
+    """
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
 class ExamTimeSlot:
+    __slots__ = ("slot_id", "day", "week", "start_time", "end_time", "start", "end")
+
     def __init__(self, slot_id, day, week, start_time, end_time):
         self.slot_id = slot_id
         self.day = day
@@ -6,5 +21,14 @@ class ExamTimeSlot:
         self.start_time = start_time  # e.g. "09:00"
         self.end_time = end_time      # e.g. "10:00"
 
+        # Minutes since Monday 00:00 of week 1, so slots compare and overlap as plain ints
+        day_start = (week - 1) * MINUTES_PER_WEEK + WEEK_DAYS.index(day) * MINUTES_PER_DAY
+        self.start = day_start + parse_time(start_time)
+        self.end = day_start + parse_time(end_time)
+
+    @property
+    def duration_minutes(self):
+        return self.end - self.start
+
     def __repr__(self):
         return f"Week {self.week} {self.day} {self.start_time}-{self.end_time}"
@@ -2,7 +2,6 @@ from algoclass.examroom import ExamRoom
 from algoclass.examcourse import ExamCourse
 from algoclass.examtimeslot import ExamTimeSlot
 from algoclass.exambooking import ExamBooking
-from datetime import datetime
 # Test
 
 room_data = [
@@ -164,30 +163,26 @@ def schedule_exams(courses, rooms, time_slots):
     used_slots = {}       # (room_name, slot_id) => True
     level_slot_map = {}   # (level, slot_id) => True
     room_slot_map = {}    # room_name => list of booked time slots
+    slots_by_id = {s.slot_id: s for s in time_slots}
 
     for course in courses:
         scheduled = False
+        duration_minutes = course.duration_hours * 60
 
         for slot in time_slots:
             # 🕒 Match duration
-            slot_duration = (
-                datetime.strptime(slot.end_time, "%H:%M") -
-                datetime.strptime(slot.start_time, "%H:%M")
-            ).seconds / 3600
-
-            if slot_duration != course.duration_hours:
+            if slot.duration_minutes != duration_minutes:
                 continue
 
-            # ❌ Avoid same-level time overlaps
+            # ❌ Avoid same-level time overlaps (start/end are minutes since week 1 Monday, so week/day are built in)
             level_conflict = False
             for (lvl, s_id) in level_slot_map:
                 if lvl != course.level:
                     continue
-                existing_slot = next((s for s in time_slots if s.slot_id == s_id), None)
-                if existing_slot and existing_slot.week == slot.week and existing_slot.day == slot.day:
-                    if times_overlap(existing_slot.start_time, existing_slot.end_time, slot.start_time, slot.end_time):
-                        level_conflict = True
-                        break
+                existing_slot = slots_by_id.get(s_id)
+                if existing_slot and times_overlap(existing_slot.start, existing_slot.end, slot.start, slot.end):
+                    level_conflict = True
+                    break
             if level_conflict:
                 continue
 
@@ -199,10 +194,9 @@ def schedule_exams(courses, rooms, time_slots):
                 # ❌ Prevent overlapping use of the same room
                 room_conflict = False
                 for existing_slot in room_slot_map.get(room.name, []):
-                    if existing_slot.week == slot.week and existing_slot.day == slot.day:
-                        if times_overlap(existing_slot.start_time, existing_slot.end_time, slot.start_time, slot.end_time):
-                            room_conflict = True
-                            break
+                    if times_overlap(existing_slot.start, existing_slot.end, slot.start, slot.end):
+                        room_conflict = True
+                        break
                 if room_conflict:
                     continue
 
@@ -229,18 +223,10 @@ print(len(bookings), "exams scheduled successfully")
 print(len(failed), "exams failed to schedule")
 
 
-day_order = {
-    "Monday": 1,
-    "Tuesday": 2,
-    "Wednesday": 3,
-    "Thursday": 4,
-    "Friday": 5
-}
-
 def sort_bookings(bookings):
     return sorted(
         bookings,
-        key=lambda b: (b.time_slot.week, day_order[b.time_slot.day], b.time_slot.start_time)
+        key=lambda b: b.time_slot.start
     )
 
 sorted_bookings = sort_bookings(bookings)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.conf import settings
-from .models import Lecturer, Room, Course, TimeSlot, Institution, User
+from .models import Lecturer, Room, Course, TimeSlot, TimeGrid, SchedulingJob, Institution, User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
 
@@ -20,5 +20,5 @@ class CustomUserAdmin(BaseUserAdmin):
     search_fields = ('email', 'username')
 
 # Register your models here.
-admin.site.register([Lecturer, Room, Course, TimeSlot, Institution])
+admin.site.register([Lecturer, Room, Course, TimeSlot, TimeGrid, SchedulingJob, Institution])
 admin.site.register(User, CustomUserAdmin)
@@ -1,4 +1,8 @@
 from .booking import Booking
+from .booking_table import BookingTable
 from .course import Course
-from .room import Room
-from .timeslot import TimeSlot
\ No newline at end of file
+from .room import Room, RoomCatalogue
+from .timeslot import TimeSlot
+from .timecode import WEEK_DAYS, MINUTES_PER_DAY
+from .timegrid import TimeGrid, DEFAULT_TIME_GRID
+from .scheduling_input import SchedulingInput
\ No newline at end of file
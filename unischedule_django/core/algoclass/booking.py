@@ -1,10 +1,36 @@
+from .timecode import day_of, time_of
+
+
 class Booking:
-    def __init__(self, booking_id, room, course, day, start_time, end_time):
+    __slots__ = ("booking_id", "room", "course", "start", "end", "requested")
+
+    def __init__(self, booking_id, room, course, start, end, requested=None):
+        """
+        start/end: minutes since Monday 00:00, as on TimeSlot
+        requested: the course's TimeSlot this booking was made for (differs from start/end when moved)
+        """
         self.booking_id = booking_id
         self.room = room        # Room object
         self.course = course    # Course object
-        self.day = day
-        self.start_time = start_time
-        self.end_time = end_time
+        self.start = start
+        self.end = end
+        self.requested = requested
+
+    @property
+    def moved(self):
+        return self.requested is not None and (self.start, self.end) != (self.requested.start, self.requested.end)
+
+    @property
+    def day(self):
+        return day_of(self.start)
+
+    @property
+    def start_time(self):
+        return time_of(self.start)
+
+    @property
+    def end_time(self):
+        return time_of(self.end, self.start)
+
     def __str__(self):
-        return f"Booking ID: {self.booking_id}, Room: {self.room.name}, Course: {self.course.name}, Day: {self.day}, Start: {self.start_time}, End: {self.end_time}"
\ No newline at end of file
+        return f"Booking ID: {self.booking_id}, Room: {self.room.name}, Course: {self.course.name}, Day: {self.day}, Start: {self.start_time}, End: {self.end_time}"
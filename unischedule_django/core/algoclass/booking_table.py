@@ -0,0 +1,121 @@
+from array import array
+
+from .booking import Booking
+from .timecode import MINUTES_PER_DAY
+
+NO_SLOT = -1  # booking without a requested slot
+NO_ID = -1  # booking_id None (e.g. local search candidates)
+
+
+class BookingTable:
+    """
+    Bookings stored column-wise in typed arrays (struct of arrays): one row per booking with
+    its id, course and room (as indexes into the courses / rooms lists), day, start and end
+    (minutes since Monday 00:00, as on Booking) and requested slot (index into the course's
+    time_slots).
+    A row is 19 bytes, against about 88 for a Booking in a list, and rows are appended
+    without allocating objects.
+
+    Iterating (or indexing) yields Booking objects built from a row, with the original
+    Room, Course and requested TimeSlot objects, so code written for a list of bookings
+    works on a table unchanged. Changing a yielded Booking doesn't change the table.
+
+    The engine doesn't use it: at 10k/20k bookings (benchmarks/run_benchmarks.py --bookings)
+    a table takes 0.23/0.47 MB against 0.84/1.69 MB, builds in about the same time from rows
+    and 40% slower row by row, and iterating it takes 12-17 ms against under 1 ms, since
+    every row becomes a Booking again. The memory saved is too small to pay for that.
+    """
+
+    def __init__(self, courses, rooms):
+        self.courses = list(courses)
+        self.rooms = list(rooms)
+        self._course_index = self._room_index = None  # built by the first append()
+        self.booking_id = array("i")
+        self.course = array("i")
+        self.room = array("i")
+        self.day = array("b")
+        self.start = array("h")
+        self.end = array("h")
+        self.requested = array("h")
+
+    @classmethod
+    def from_bookings(cls, bookings, courses, rooms):
+        table = cls(courses, rooms)
+        for booking in bookings:
+            table.append(booking)
+        return table
+
+    @classmethod
+    def from_rows(cls, rows, courses, rooms):
+        """
+        Bulk build from (booking_id, course_index, room_index, start, end, requested_index)
+        tuples, filling each column in one go
+        """
+        table = cls(courses, rooms)
+        columns = list(zip(*rows))
+        if not columns:
+            return table
+        booking_ids, course_indexes, room_indexes, starts, ends, requested = columns
+        if None in booking_ids:
+            booking_ids = [NO_ID if booking_id is None else booking_id for booking_id in booking_ids]
+        table.booking_id.extend(booking_ids)
+        table.course.extend(course_indexes)
+        table.room.extend(room_indexes)
+        table.day.extend([start // MINUTES_PER_DAY for start in starts])
+        table.start.extend(starts)
+        table.end.extend(ends)
+        table.requested.extend(requested)
+        return table
+
+    def add(self, booking_id, course_index, room_index, start, end, requested_index=NO_SLOT):
+        """
+        Appends a row. start/end: minutes since Monday 00:00
+        """
+        self.booking_id.append(NO_ID if booking_id is None else booking_id)
+        self.course.append(course_index)
+        self.room.append(room_index)
+        self.day.append(start // MINUTES_PER_DAY)
+        self.start.append(start)
+        self.end.append(end)
+        self.requested.append(requested_index)
+
+    def append(self, booking):
+        """
+        Appends a Booking. Its course and room must be in the table's lists; its requested slot
+        is stored as the course's time slot with the same times (None if there is none).
+        """
+        if self._course_index is None:
+            self._course_index = {course.course_id: i for i, course in enumerate(self.courses)}
+            self._room_index = {room.room_id: i for i, room in enumerate(self.rooms)}
+        course_index = self._course_index[booking.course.course_id]
+        requested_index = NO_SLOT
+        if booking.requested is not None:
+            time_slots = self.courses[course_index].time_slots
+            for i, timeslot in enumerate(time_slots):
+                if timeslot is booking.requested:
+                    requested_index = i
+                    break
+                if requested_index == NO_SLOT and (timeslot.start, timeslot.end) == (booking.requested.start, booking.requested.end):
+                    requested_index = i  # same times, keep looking for the object itself
+        self.add(booking.booking_id, course_index, self._room_index[booking.room.room_id],
+                 booking.start, booking.end, requested_index)
+
+    def __len__(self):
+        return len(self.booking_id)
+
+    def __getitem__(self, i):
+        course = self.courses[self.course[i]]
+        requested = self.requested[i]
+        booking_id = self.booking_id[i]
+        return Booking(None if booking_id == NO_ID else booking_id, self.rooms[self.room[i]], course,
+                       self.start[i], self.end[i], course.time_slots[requested] if requested != NO_SLOT else None)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        """Memory taken by the columns"""
+        return sum(column.itemsize * len(column) for column in
+                   (self.booking_id, self.course, self.room, self.day, self.start, self.end, self.requested))
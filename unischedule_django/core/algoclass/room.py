@@ -1,5 +1,45 @@
+from bisect import bisect_left
+
+
 class Room:
+    __slots__ = ("room_id", "name", "capacity")
+
     def __init__(self, room_id, name, capacity):
         self.room_id = room_id
         self.name = name
         self.capacity = capacity
+
+
+class RoomCatalogue:
+    """
+    Rooms kept sorted by capacity (ties keep their original order), so the smallest
+    room that can seat a course is found with a bisect instead of a linear skip.
+    """
+
+    def __init__(self, rooms):
+        self.rooms = sorted(rooms, key=lambda room: room.capacity)
+        self.capacities = [room.capacity for room in self.rooms]
+
+    def __iter__(self):
+        return iter(self.rooms)
+
+    def __len__(self):
+        return len(self.rooms)
+
+    @property
+    def largest_capacity(self):
+        return self.capacities[-1] if self.capacities else 0
+
+    def fitting_index(self, num_students):
+        """
+        Position of the smallest room that can seat num_students (len(self) if none can).
+        """
+        return bisect_left(self.capacities, num_students)
+
+    def fitting(self, num_students):
+        """
+        Yields the rooms that can seat num_students, best fit (smallest) first.
+        """
+        rooms = self.rooms
+        for i in range(self.fitting_index(num_students), len(rooms)):
+            yield rooms[i]
@@ -0,0 +1,5 @@
+from collections import namedtuple
+
+# Everything a scheduling run reads about an institution, in algo format
+# (core/loader.py builds it from the database, core/snapshot.py from a snapshot file)
+SchedulingInput = namedtuple("SchedulingInput", "rooms courses lecturer_names time_grid")
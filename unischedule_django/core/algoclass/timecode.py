@@ -0,0 +1,55 @@
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MINUTES_PER_DAY = 24 * 60
+
+_DAY_INDEX = {day: i for i, day in enumerate(WEEK_DAYS)}
+
+
+def parse_time(value):
+    """
+    "HH:MM" -> minutes since midnight, e.g. "08:30" -> 510
+    """
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_time(minutes):
+    """
+    Minutes since midnight -> zero-padded "HH:MM"
+    """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def day_index(day):
+    """
+    "Monday" -> 0, ..., "Sunday" -> 6
+    """
+    try:
+        return _DAY_INDEX[day.strip().capitalize()]
+    except KeyError:
+        raise ValueError(f"Unknown day: {day!r}") from None
+
+
+def encode(day, time):
+    """
+    Day name + "HH:MM" -> minutes since Monday 00:00
+    """
+    return day_index(day) * MINUTES_PER_DAY + parse_time(time)
+
+
+def day_start(minute_of_week):
+    """
+    Minute of week at which the day containing `minute_of_week` begins
+    """
+    return minute_of_week - minute_of_week % MINUTES_PER_DAY
+
+
+def day_of(minute_of_week):
+    return WEEK_DAYS[minute_of_week // MINUTES_PER_DAY]
+
+
+def time_of(minute_of_week, start=None):
+    """
+    "HH:MM" of `minute_of_week`, counted from the day of `start` when given
+    (so an end time of 24:00 is not shown as 00:00)
+    """
+    return format_time(minute_of_week - day_start(minute_of_week if start is None else start))
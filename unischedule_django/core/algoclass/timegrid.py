@@ -0,0 +1,104 @@
+from bisect import bisect_left
+from .timecode import WEEK_DAYS, MINUTES_PER_DAY, day_index, parse_time, format_time
+
+
+class TimeGrid:
+    def __init__(self, days=("Monday", "Tuesday", "Wednesday", "Thursday", "Friday"), period_minutes=60,
+                 opening_time="08:00", closing_time="18:00", breaks=(), alternative_periods=0):
+        """
+        The teaching grid of an institution, and the alternative-slot table built from it.
+
+        days: day names classes can be moved to
+        period_minutes: length of one period, e.g. 60 or 50
+        opening_time / closing_time: e.g. "08:00" / "18:00"
+        breaks: [("12:00", "13:00"), ...] - no period may overlap a break
+        alternative_periods: how many periods an alternative slot runs (cut short at a break or
+        closing), or 0: as long as the class it replaces, at any period start it fits from
+        without running into a break or closing
+
+        The defaults are the original Monday-Friday, 08:00-18:00 hourly grid, with alternatives
+        as long as the original class.
+        """
+        if period_minutes < 1 or alternative_periods < 0:
+            raise ValueError("period_minutes must be at least 1 and alternative_periods at least 0")
+        # The constructor arguments, to rebuild the grid from (e.g. dataset snapshots)
+        self.spec = {"days": list(days), "period_minutes": period_minutes, "opening_time": opening_time,
+                     "closing_time": closing_time, "breaks": [list(b) for b in breaks],
+                     "alternative_periods": alternative_periods}
+        self.days = sorted(day_index(day) for day in days)
+        self.day_names = [WEEK_DAYS[day] for day in self.days]
+        self.period_minutes = period_minutes
+        self.alternative_periods = alternative_periods
+
+        opening = parse_time(opening_time)
+        closing = parse_time(closing_time)
+        breaks = sorted((parse_time(start), parse_time(end)) for start, end in breaks)
+
+        # Period start times (minutes since midnight), skipping over breaks
+        self.starts = []
+        t = opening
+        while t + period_minutes <= closing:
+            clash = next((end for start, end in breaks if start < t + period_minutes and t < end), None)
+            if clash is None:
+                self.starts.append(t)
+                t += period_minutes
+            else:
+                t = max(clash, t + 1)
+
+        # Adjacency: where the run of back-to-back periods containing each period ends
+        self.block_ends = [0] * len(self.starts)
+        for i in reversed(range(len(self.starts))):
+            adjacent = i + 1 < len(self.starts) and self.starts[i + 1] == self.starts[i] + period_minutes
+            self.block_ends[i] = self.block_ends[i + 1] if adjacent else self.starts[i] + period_minutes
+
+        # End time of an alternative slot starting at each period (the latest it may end, when
+        # alternatives keep the class's length)
+        self.ends = [min(start + alternative_periods * period_minutes, block_end) if alternative_periods else block_end
+                     for start, block_end in zip(self.starts, self.block_ends)]
+        self.labels = [format_time(start) for start in self.starts]
+
+        # Candidate tables, built on first use per start (and length, when alternatives keep it)
+        self._candidates = {}
+
+    def candidates(self, original_start, original_end=None):
+        """
+        Returns the (start, end) slots, in minutes since Monday 00:00, tried in turn when a class
+        [original_start, original_end) has to move:
+        - same day earlier slots (latest first)
+        - same day later slots
+        - the following grid days, then the earlier ones, wrapping around the week
+        With alternative_periods=0 every candidate is original_end - original_start long, and
+        periods it wouldn't fit from are skipped; original_end is only needed then.
+        """
+        current_day_index, start_offset = divmod(original_start, MINUTES_PER_DAY)
+        duration = None
+        if not self.alternative_periods:
+            if original_end is None:
+                raise ValueError("original_end is needed when alternatives keep the class length")
+            duration = original_end - original_start
+        key = (current_day_index, start_offset, duration)
+        if key in self._candidates:
+            return self._candidates[key]
+
+        starts = self.starts
+        day_start = current_day_index * MINUTES_PER_DAY
+        start_index = bisect_left(starts, start_offset)
+        later_index = start_index + (start_index < len(starts) and starts[start_index] == start_offset)
+
+        order = [(day_start, i) for i in reversed(range(start_index))]
+        order += [(day_start, i) for i in range(later_index, len(starts))]
+        day_pos = bisect_left(self.days, current_day_index)
+        after = day_pos + (day_pos < len(self.days) and self.days[day_pos] == current_day_index)
+        for new_day in self.days[after:] + self.days[:day_pos]:
+            order += [(new_day * MINUTES_PER_DAY, i) for i in range(len(starts))]
+
+        if duration is None:
+            table = [(new_day_start + starts[i], new_day_start + self.ends[i]) for new_day_start, i in order]
+        else:
+            table = [(new_day_start + starts[i], new_day_start + starts[i] + duration) for new_day_start, i in order
+                     if starts[i] + duration <= self.block_ends[i]]
+        self._candidates[key] = table
+        return table
+
+
+DEFAULT_TIME_GRID = TimeGrid()
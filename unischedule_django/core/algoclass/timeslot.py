@@ -1,10 +1,36 @@
+from .timecode import day_index, parse_time, day_of, time_of, MINUTES_PER_DAY
+
+
 class TimeSlot:
+    __slots__ = ("start", "end")
+
     def __init__(self, day, start_time, end_time):
         """
         day: e.g. "Monday"
         start_time: e.g. "08:00"
         end_time: e.g. "10:00"
+
+        Stored as start/end minutes since Monday 00:00; the strings are derived on access.
         """
-        self.day = day
-        self.start_time = start_time
-        self.end_time = end_time
+        day_start = day_index(day) * MINUTES_PER_DAY
+        self.start = day_start + parse_time(start_time)
+        self.end = day_start + parse_time(end_time)
+
+    @classmethod
+    def from_minutes(cls, start, end):
+        timeslot = cls.__new__(cls)
+        timeslot.start = start
+        timeslot.end = end
+        return timeslot
+
+    @property
+    def day(self):
+        return day_of(self.start)
+
+    @property
+    def start_time(self):
+        return time_of(self.start)
+
+    @property
+    def end_time(self):
+        return time_of(self.end, self.start)
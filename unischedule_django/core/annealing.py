@@ -0,0 +1,377 @@
+import math
+import random
+import time
+from collections import Counter, defaultdict
+
+from .algoclass import Booking, DEFAULT_TIME_GRID, MINUTES_PER_DAY
+from .progress import summary_event
+from .scheduler import OccupancyBackend, failed_slot_message, failed_slot_key
+
+DISPLACED_REASON = "Displaced during timetable improvement"
+
+
+class _Bag:
+    """
+    List with O(1) add, remove and random pick.
+    """
+
+    def __init__(self, items=()):
+        self.items = []
+        self.index = {}
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        self.index[item] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        i = self.index.pop(item)
+        last = self.items.pop()
+        if i < len(self.items):
+            self.items[i] = last
+            self.index[last] = i
+
+    def pick(self, rng):
+        return rng.choice(self.items)
+
+
+class ScheduleImprover:
+    """
+    Simulated-annealing local search over a finished timetable.
+
+    Objective (lower is better): failed_weight * unplaced requests + bookings away from
+    their requested slot. Both terms are counters kept up to date as bookings are placed
+    and removed, and feasibility is checked on the bitmask occupancy indexes, so a move
+    is scored in O(1) instead of rescoring the whole timetable.
+
+    Moves:
+    - relocate: move a booking to its requested slot or to an alternative on the time grid
+    - swap: exchange the times of two bookings of the same length
+    - insert: book an unplaced request at its requested slot or an alternative
+    - kick: take a requested slot for an unplaced or moved class by bumping a booking in
+      the way to its own requested slot or an alternative (or unplacing it)
+
+    Every applied move returns an undo; accepted moves since the best state seen are kept
+    so the search can roll back to it at the end.
+    """
+
+    def __init__(self, courses, rooms, bookings, time_grid=DEFAULT_TIME_GRID, failed_weight=10, seed=None,
+                 cohorts=None):
+        """
+        bookings: the result of auto_schedule_courses (each Booking knows its requested TimeSlot)
+        cohorts: the COHORTS name the bookings were scheduled with; moves keep each cohort clash-free
+        """
+        self.engine = OccupancyBackend(courses, rooms, [], time_grid, cohorts=cohorts)
+        self.time_grid = time_grid
+        self.failed_weight = failed_weight
+        self.rng = random.Random(seed)
+        self.placed = _Bag()
+        self.by_day = defaultdict(set)  # day index -> bookings on that day
+        self.moved = 0
+
+        booked = set()
+        for b in bookings:
+            self._place(Booking(b.booking_id, b.room, b.course, b.start, b.end, b.requested))
+            booked.add(id(b.requested))
+        self.unplaced = _Bag((course, ts) for course in courses for ts in course.time_slots if id(ts) not in booked)
+
+    def objective(self):
+        return self.failed_weight * len(self.unplaced) + self.moved
+
+    # ----- State changes (keep the indexes and counters in step) -----
+
+    def _place(self, b):
+        self.engine.occupy(b)
+        self.placed.add(b)
+        self.by_day[b.start // MINUTES_PER_DAY].add(b)
+        self.moved += b.moved
+
+    def _unplace(self, b):
+        self.engine.release(b)
+        self.placed.remove(b)
+        self.by_day[b.start // MINUTES_PER_DAY].discard(b)
+        self.moved -= b.moved
+
+    def _set(self, b, room, start, end):
+        b.room, b.start, b.end = room, start, end
+        self._place(b)
+
+    def _fits(self, course, start, end):
+        """
+        Smallest free room for the course at [start, end) if its lecturer (and cohort) is free then, else None
+        """
+        if not self.engine.can_place(course, start, end):
+            return None
+        return self.engine.free_room(course, start, end)
+
+    def _targets(self, timeslot, alternatives):
+        """
+        The requested slot followed by a few random grid alternatives for it
+        """
+        candidates = self.time_grid.candidates(timeslot.start, timeslot.end)
+        return [(timeslot.start, timeslot.end)] + self.rng.sample(candidates, min(alternatives, len(candidates)))
+
+    # ----- Moves: each returns an undo callable, or None when nothing was changed -----
+
+    def _relocate(self):
+        b = self.placed.pick(self.rng)
+        if b.moved and self.rng.random() < 0.5:
+            start, end = b.requested.start, b.requested.end
+        else:
+            candidates = self.time_grid.candidates(b.requested.start, b.requested.end)
+            if not candidates:
+                return None
+            start, end = self.rng.choice(candidates)
+        if (start, end) == (b.start, b.end):
+            return None
+
+        old = (b.room, b.start, b.end)
+        self._unplace(b)
+        room = self._fits(b.course, start, end)
+        if room is None:
+            self._set(b, *old)
+            return None
+        self._set(b, room, start, end)
+
+        def undo():
+            self._unplace(b)
+            self._set(b, *old)
+        return undo
+
+    def _swap(self):
+        a = self.placed.pick(self.rng)
+        b = self.placed.pick(self.rng)
+        if a is b or a.end - a.start != b.end - b.start or a.start == b.start:
+            return None
+
+        old_a, old_b = (a.room, a.start, a.end), (b.room, b.start, b.end)
+        self._unplace(a)
+        self._unplace(b)
+        room_a = self._fits(a.course, old_b[1], old_b[2])
+        if room_a is not None:
+            self._set(a, room_a, old_b[1], old_b[2])
+            room_b = self._fits(b.course, old_a[1], old_a[2])
+            if room_b is not None:
+                self._set(b, room_b, old_a[1], old_a[2])
+
+                def undo():
+                    self._unplace(a)
+                    self._unplace(b)
+                    self._set(a, *old_a)
+                    self._set(b, *old_b)
+                return undo
+            self._unplace(a)
+        self._set(a, *old_a)
+        self._set(b, *old_b)
+        return None
+
+    def _insert(self):
+        request = self.unplaced.pick(self.rng)
+        course, timeslot = request
+        for start, end in self._targets(timeslot, 1)[self.rng.randrange(2):]:
+            room = self._fits(course, start, end)
+            if room is not None:
+                break
+        else:
+            return None
+
+        b = Booking(None, room, course, start, end, timeslot)
+        self.unplaced.remove(request)
+        self._place(b)
+
+        def undo():
+            self._unplace(b)
+            self.unplaced.add(request)
+        return undo
+
+    def _kick(self):
+        if self.unplaced and self.rng.random() < 0.5:
+            x, (course, timeslot) = None, self.unplaced.pick(self.rng)
+        else:
+            x = self.placed.pick(self.rng)
+            if not x.moved:
+                return None
+            course, timeslot = x.course, x.requested
+
+        cohort_key = self.engine.cohort_key
+        blockers = [b for b in self.by_day[timeslot.start // MINUTES_PER_DAY]
+                    if b is not x and b.start < timeslot.end and timeslot.start < b.end
+                    and (b.course.lecturer_id == course.lecturer_id or b.room.capacity >= course.num_students
+                         or (cohort_key is not None and cohort_key(b.course) == cohort_key(course)))]
+        if not blockers:
+            return None
+        victim = self.rng.choice(blockers)
+
+        # Take the requested slot for x with the victim out of the way
+        old_victim = (victim.room, victim.start, victim.end)
+        self._unplace(victim)
+        if x is not None:
+            old_x = (x.room, x.start, x.end)
+            self._unplace(x)
+        room = self._fits(course, timeslot.start, timeslot.end)
+        if room is None:
+            if x is not None:
+                self._set(x, *old_x)
+            self._set(victim, *old_victim)
+            return None
+        if x is None:
+            x = Booking(None, room, course, timeslot.start, timeslot.end, timeslot)
+            self.unplaced.remove((course, timeslot))
+            self._place(x)
+            was_unplaced = True
+        else:
+            self._set(x, room, timeslot.start, timeslot.end)
+            was_unplaced = False
+
+        # Re-home the victim
+        for start, end in self._targets(victim.requested, 3):
+            victim_room = self._fits(victim.course, start, end)
+            if victim_room is not None:
+                self._set(victim, victim_room, start, end)
+                dropped = False
+                break
+        else:
+            self.unplaced.add((victim.course, victim.requested))
+            dropped = True
+
+        def undo():
+            if dropped:
+                self.unplaced.remove((victim.course, victim.requested))
+            else:
+                self._unplace(victim)
+            self._unplace(x)
+            if was_unplaced:
+                self.unplaced.add((course, timeslot))
+            else:
+                self._set(x, *old_x)
+            self._set(victim, *old_victim)
+        return undo
+
+    # ----- Search -----
+
+    def run(self, time_budget=1.0, initial_temperature=2.0, final_temperature=0.05, max_iterations=None,
+            progress=None):
+        """
+        Anneals for time_budget seconds (or max_iterations moves) with geometric cooling from
+        initial_temperature to final_temperature, and leaves the best state found.
+        progress: optional callable, called about every quarter second with an event in the
+        core/progress.py shape holding the current state's counts (no bookings, done False)
+        Returns a report of the objective before and after.
+        """
+        report = {
+            "failed_before": len(self.unplaced),
+            "moved_before": self.moved,
+            "objective_before": self.objective(),
+        }
+        started = time.perf_counter()
+        current = best = self.objective()
+        since_best = []  # undos of the moves accepted since the best state
+        iterations = accepted = 0
+        temperature = initial_temperature
+        next_event = 0.25
+
+        while max_iterations is None or iterations < max_iterations:
+            if iterations % 128 == 0:
+                elapsed = time.perf_counter() - started
+                if elapsed >= time_budget:
+                    break
+                temperature = initial_temperature * (final_temperature / initial_temperature) ** (elapsed / time_budget)
+                if progress is not None and elapsed >= next_event:
+                    placed, unplaced = len(self.placed), len(self.unplaced)
+                    progress({"processed": placed + unplaced, "total": placed + unplaced, "placed": placed,
+                              "fallbacks": self.moved, "failed": unplaced, "bookings": [], "done": False})
+                    next_event = elapsed + 0.25
+            iterations += 1
+
+            if not self.placed:
+                move = self._insert if self.unplaced else None
+            else:
+                move = self.rng.choice((self._relocate, self._swap, self._insert, self._kick))
+                if move == self._insert and not self.unplaced:
+                    move = self._relocate
+            if move is None:
+                break
+
+            undo = move()
+            if undo is None:
+                continue
+            delta = self.objective() - current
+            if delta > 0 and self.rng.random() >= math.exp(-delta / temperature):
+                undo()
+                continue
+
+            accepted += 1
+            current += delta
+            if current <= best:
+                best = current
+                since_best.clear()
+            else:
+                since_best.append(undo)
+
+        for undo in reversed(since_best):
+            undo()
+
+        report.update({
+            "failed_after": len(self.unplaced),
+            "moved_after": self.moved,
+            "objective_after": self.objective(),
+            "iterations": iterations,
+            "accepted": accepted,
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+        return report
+
+
+def improve_schedule(courses, rooms, bookings, failed_bookings, changes_logs, time_budget=1.0,
+                     time_grid=None, failed_weight=10, seed=None, cohorts=None, progress=None):
+    """
+    Optional improvement phase after auto_schedule_courses: anneals its result for
+    time_budget seconds (see ScheduleImprover).
+    progress: optional callable for progress events (core/progress.py): the search's counts
+    about every quarter second, then a final summary_event.
+
+    Returns (bookings, failed_bookings, report). Bookings keep their ids; newly placed ones
+    get the next free ids. Requests that are still unplaced keep their original failure
+    message. A log line is appended for every class the search moved or booked.
+    """
+    improver = ScheduleImprover(courses, rooms, bookings, time_grid or DEFAULT_TIME_GRID, failed_weight, seed, cohorts)
+    report = improver.run(time_budget, progress=progress)
+
+    final = {id(b.requested): b for b in improver.placed.items}
+    new_bookings = []
+    for b in bookings:
+        placed = final.pop(id(b.requested), None)
+        if placed is None:
+            continue
+        placed.booking_id = b.booking_id
+        new_bookings.append(placed)
+        if (placed.start, placed.end) != (b.start, b.end):
+            changes_logs.append(f"🔁 {placed.course.course_id}({placed.course.name}) moved to {placed.day} {placed.start_time}-{placed.end_time} during timetable improvement")
+
+    booking_id = max((b.booking_id for b in bookings), default=0)
+    for placed in final.values():
+        booking_id += 1
+        placed.booking_id = booking_id
+        new_bookings.append(placed)
+        changes_logs.append(f"✅ {placed.course.course_id}({placed.course.name}) booked on {placed.day} {placed.start_time}-{placed.end_time} during timetable improvement")
+
+    # Still-failed requests keep the message (and reason) the greedy pass gave them
+    still_failed = Counter(failed_slot_key(failed_slot_message(course, ts, "")) for course, ts in improver.unplaced.items)
+    new_failed = []
+    for message in failed_bookings:
+        if still_failed[failed_slot_key(message)]:
+            still_failed[failed_slot_key(message)] -= 1
+            new_failed.append(message)
+    for course, timeslot in improver.unplaced.items:
+        message = failed_slot_message(course, timeslot, DISPLACED_REASON)
+        if still_failed[failed_slot_key(message)]:
+            still_failed[failed_slot_key(message)] -= 1
+            new_failed.append(message)
+
+    if progress is not None:
+        progress(summary_event(new_bookings, new_failed))
+    return new_bookings, new_failed, report
@@ -0,0 +1,267 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from .algoclass import Booking, RoomCatalogue, TimeSlot, DEFAULT_TIME_GRID
+from .progress import ProgressReporter
+from .scheduler import auto_schedule_courses, get_backend, place_course_slot, cohort_key_function
+from .snapshot import read_snapshot
+from .stats import SchedulerStats
+
+
+def conflict_components(courses, cohorts=None):
+    """
+    Splits the courses into groups that share no lecturer (and no cohort, with cohorts): the
+    connected components of the course conflict graph, found with a union-find over lecturer
+    and cohort keys. Returns lists of course indexes, each in input order.
+
+    Rooms aren't edges: any two courses that fit in the largest room could compete for it, so
+    they would join every course into one component. decomposed_schedule splits them into
+    room pools instead.
+    """
+    parent = list(range(len(courses)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    cohort_key = cohort_key_function(cohorts)
+    first_with = {}  # lecturer / cohort key -> first course index having it
+    for i, course in enumerate(courses):
+        keys = [("lecturer", course.lecturer_id)]
+        if cohort_key is not None:
+            keys.append(("cohort", cohort_key(course)))
+        for key in keys:
+            j = first_with.setdefault(key, i)
+            parent[find(i)] = find(j)
+
+    components = defaultdict(list)
+    for i in range(len(courses)):
+        components[find(i)].append(i)
+    return list(components.values())
+
+
+def _slot_minutes(course):
+    return sum(timeslot.end - timeslot.start for timeslot in course.time_slots)
+
+
+def partition(courses, rooms, parts, cohorts=None):
+    """
+    Groups the conflict components into at most `parts` parts of about the same number of
+    slot-minutes (largest component first, into the lightest part), and deals the rooms out
+    as one pool per part. Returns [(course indexes, rooms)], parts without courses dropped.
+
+    Room pools follow each part's demand by room size: every course slot counts towards the
+    size of its best-fit room, and going from the largest rooms down, each room goes to the
+    part furthest below its share of the rooms at least that large (so a part holding many big
+    rooms takes fewer small ones).
+    """
+    catalogue = RoomCatalogue(rooms)
+    components = sorted(conflict_components(courses, cohorts), key=lambda c: -sum(_slot_minutes(courses[i]) for i in c))
+    groups = [[] for _ in range(max(1, min(parts, len(components))))]
+    loads = [0] * len(groups)
+    for component in components:
+        p = loads.index(min(loads))
+        groups[p].extend(component)
+        loads[p] += sum(_slot_minutes(courses[i]) for i in component)
+
+    need = [defaultdict(int) for _ in groups]  # part -> best-fit capacity -> slot-minutes
+    for p, group in enumerate(groups):
+        group.sort()
+        for i in group:
+            fit = catalogue.fitting_index(courses[i].num_students)
+            if fit < len(catalogue):
+                need[p][catalogue.capacities[fit]] += _slot_minutes(courses[i])
+
+    pools = [[] for _ in groups]
+    demand = [0] * len(groups)  # slot-minutes needing rooms at least as large as the current one
+    for r in reversed(range(len(catalogue))):
+        capacity = catalogue.capacities[r]
+        if r == len(catalogue) - 1 or catalogue.capacities[r + 1] != capacity:
+            for p in range(len(groups)):
+                demand[p] += need[p][capacity]
+        total = sum(demand)
+        rooms_so_far = len(catalogue) - r
+        p = max(range(len(groups)),
+                key=lambda p: (demand[p] / total * rooms_so_far if total else 0) - len(pools[p]))
+        pools[p].append(catalogue.rooms[r])
+    return [(group, pool) for group, pool in zip(groups, pools) if group]
+
+
+# Per-process input, set once by the pool initializer (as in portfolio.py)
+_worker_input = None
+
+def _init_worker(courses, rooms, options, snapshot=None, collect_stats=False):
+    global _worker_input
+    if snapshot is not None:
+        loaded, _ = read_snapshot(snapshot)
+        courses, rooms = loaded.courses, loaded.rooms
+    _worker_input = (courses, rooms, options, collect_stats)
+
+def _solve_part(course_indexes, room_ids):
+    """
+    Schedules one part on its room pool. Returns (bookings as (course index, slot index, room_id,
+    start, end) rows, the logs, the (course index, slot index) of the slots that failed, and the
+    SchedulerStats counters when collecting them, else None).
+    """
+    courses, rooms, options, collect_stats = _worker_input
+    part = [courses[i] for i in course_indexes]
+    room_ids = set(room_ids)
+    logs = []
+    stats = SchedulerStats() if collect_stats else None
+    bookings, _ = auto_schedule_courses(part, [room for room in rooms if room.room_id in room_ids], logs,
+                                        stats=stats, **options)
+
+    slot_index = {id(timeslot): (i, k) for i in course_indexes for k, timeslot in enumerate(courses[i].time_slots)}
+    rows = [slot_index.pop(id(b.requested)) + (b.room.room_id, b.start, b.end) for b in bookings]
+    return rows, logs, sorted(slot_index.values()), stats.counters() if stats is not None else None
+
+
+def _free_by_moving(engine, by_room, course, start, end):
+    """
+    Frees a room that seats the course for [start, end) by moving the one booking in it then
+    to another free room at that booking's own time (its time and lecturer stay the same).
+    by_room: room_id -> the engine's bookings in that room, kept in step here.
+    Returns the freed room, or None when no room has a single booking that can move.
+    """
+    for room in engine.rooms.fitting(course.num_students):
+        blocking = [b for b in by_room[room.room_id] if b.start < end and start < b.end]
+        if len(blocking) != 1:
+            continue
+        b = blocking[0]
+        engine.release(b)
+        for other in engine.free_rooms(b.course.num_students, b.start, b.end):
+            if other.room_id != room.room_id:
+                by_room[room.room_id].remove(b)
+                by_room[other.room_id].append(b)
+                b.room = other
+                engine.occupy(b)
+                return room
+        engine.occupy(b)
+    return None
+
+
+def _repair_slot(engine, by_room, course, timeslot, booking_id, changes_logs):
+    """
+    Same-time repair for a spilled slot place_course_slot couldn't book: at the requested
+    time, then at each grid alternative where the lecturer (and cohort) is free, tries to free a
+    room with _free_by_moving. Returns the booking (added to the engine), or None.
+    """
+    for start, end in [(timeslot.start, timeslot.end)] + engine.time_grid.candidates(timeslot.start, timeslot.end):
+        if not engine.can_place(course, start, end):
+            continue
+        room = _free_by_moving(engine, by_room, course, start, end)
+        if room is not None:
+            booking = Booking(booking_id, room, course, start, end, requested=timeslot)
+            engine.add(booking)
+            if start != timeslot.start:
+                moved = TimeSlot.from_minutes(start, end)
+                changes_logs.append(f"⚠️ {course.course_id}({course.name}) moved to {moved.day} {moved.start_time}-{moved.end_time} "
+                                    f"after another class changed rooms")
+            return booking
+    return None
+
+
+def decomposed_schedule(courses, rooms, changes_logs, parts=None, backend="python", time_grid=None, order="input",
+                        cohorts=None, room_assignment="greedy", snapshot=None, max_spill=0.05, progress=None,
+                        stats=None):
+    """
+    Split greedy: splits the institution into `parts` independent parts (partition():
+    lecturer/cohort conflict components, each part with its own pool of rooms), runs
+    auto_schedule_courses on every part in a process pool, and merges the results. Slots a part
+    couldn't book in its pool are then placed one by one, in input order, against the merged
+    timetable with every room, as auto_schedule_courses would, and those that still fail get a
+    same-time repair (_repair_slot: another class moves to a different room at its own time).
+
+    The result is a valid timetable but not the one a single auto_schedule_courses call gives:
+    parts only see their own rooms and bookings, so more slots can fail. On synthetic
+    institutions at tightness 0.7 with 4 parts, failed slots went from 3, 0 (1k slots), 1, 16,
+    1 (3k), 4, 9, 36 (10k) for the single call to 14, 11, 5, 26, 7, 4, 20, 43 without the
+    repair and 2, 6, 2, 21, 3, 3, 9, 34 with it; a 1k run spilling 10% fell back (70 either way).
+    The speedup (10k slots: 2.1 s -> 1.0-1.3 s, on one CPU) comes from running several smaller
+    greedy passes, whose cost grows faster than the number of slots, not from the processes.
+    With one part (or one conflict component) it is the single call.
+
+    parts: worker processes and parts, one per CPU when None
+    snapshot: as for portfolio_schedule, workers memory-map it instead of being sent the inputs
+    max_spill: when more than this share of the slots spills out of the parts, the split result
+      is dropped and a single auto_schedule_courses call runs instead (report["fallback"])
+    progress: optional callable for progress events (core/progress.py), as from
+      auto_schedule_courses: the parts' bookings once merged, then the spilled slots
+    stats: optional SchedulerStats, with the parts' counters added up and the spilled slots' searches
+    Returns (bookings, failed_bookings, report); booking ids follow the input order, spilled
+    slots last.
+    """
+    started = time.perf_counter()
+    time_grid = time_grid or DEFAULT_TIME_GRID
+    options = {"backend": backend, "time_grid": time_grid, "order": order, "cohorts": cohorts,
+               "room_assignment": room_assignment}
+    split = partition(courses, rooms, parts or os.cpu_count() or 1, cohorts)
+    if len(split) <= 1:
+        bookings, failed = auto_schedule_courses(courses, rooms, changes_logs, progress=progress, stats=stats,
+                                                 **options)
+        return bookings, failed, {"parts": len(split), "spilled": 0, "repaired": 0, "fallback": False,
+                                  "seconds": round(time.perf_counter() - started, 3)}
+
+    with ProcessPoolExecutor(max_workers=len(split), initializer=_init_worker,
+                             initargs=(None, None, options, snapshot, stats is not None) if snapshot else
+                             (courses, rooms, options, None, stats is not None)) as pool:
+        results = list(pool.map(_solve_part, [group for group, _ in split],
+                                [[room.room_id for room in pool_rooms] for _, pool_rooms in split]))
+
+    room_by_id = {room.room_id: room for room in rooms}
+    rows = sorted(row for part_rows, _, _, _ in results for row in part_rows)
+    unplaced = sorted(slot for _, _, part_failed, _ in results for slot in part_failed)
+    total = sum(len(course.time_slots) for course in courses)
+    if len(unplaced) > max_spill * total:
+        bookings, failed = auto_schedule_courses(courses, rooms, changes_logs, progress=progress, stats=stats,
+                                                 **options)
+        return bookings, failed, {"parts": len(split), "spilled": len(unplaced), "repaired": 0, "fallback": True,
+                                  "seconds": round(time.perf_counter() - started, 3)}
+
+    bookings = []
+    by_room = defaultdict(list)
+    reporter = ProgressReporter(progress, total) if progress else None
+    engine = get_backend(backend)(courses, rooms, bookings, time_grid, stats, cohorts)
+    for booking_id, (i, k, room_id, start, end) in enumerate(rows, start=1):
+        engine.add(Booking(booking_id, room_by_id[room_id], courses[i], start, end, requested=courses[i].time_slots[k]))
+        by_room[room_id].append(bookings[-1])
+        if reporter:
+            reporter.booked(bookings[-1])
+    for _, part_logs, _, part_counters in results:
+        changes_logs.extend(part_logs)
+        if stats is not None:
+            stats.add(part_counters)
+
+    failed = []
+    repaired = 0
+    booking_id = len(bookings) + 1
+    for i, k in unplaced:
+        course, timeslot = courses[i], courses[i].time_slots[k]
+        booking, failure = place_course_slot(engine, course, timeslot, booking_id, changes_logs)
+        if booking is None:
+            booking = _repair_slot(engine, by_room, course, timeslot, booking_id, changes_logs)
+            repaired += booking is not None
+        if booking:
+            by_room[booking.room.room_id].append(booking)
+            booking_id += 1
+            if reporter:
+                reporter.booked(booking)
+        else:
+            failed.append(failure)
+            if reporter:
+                reporter.failure()
+    if reporter:
+        reporter.flush()
+
+    report = {
+        "parts": len(split),
+        "spilled": len(unplaced),
+        "repaired": repaired,
+        "fallback": False,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    return bookings, failed, report
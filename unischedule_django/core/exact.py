@@ -0,0 +1,240 @@
+import time
+from collections import defaultdict
+
+from .algoclass import Booking, RoomCatalogue, MINUTES_PER_DAY, DEFAULT_TIME_GRID
+from .progress import summary_event, not_done
+from .scheduler import auto_schedule_courses, cohort_key_function
+
+# Above this many (slot, time, room) values ExactSolver isn't built: the domains alone take
+# seconds and hundreds of MB, and the search wouldn't finish within a time limit anyway.
+MAX_SEARCH_SIZE = 5_000_000
+
+
+def search_size(courses, rooms, time_grid=DEFAULT_TIME_GRID):
+    """
+    Upper bound on the number of (slot, time, room) values ExactSolver would start from:
+    slots x grid periods in the week x rooms, cheap to compute before building anything.
+    """
+    slots = sum(len(course.time_slots) for course in courses)
+    return slots * len(time_grid.days) * len(time_grid.starts) * len(rooms)
+
+
+class ExactSolver:
+    """
+    Backtracking search for a timetable that books every course slot.
+
+    Each course slot is a variable whose domain is (time, room) pairs: its requested time
+    and the time grid's alternatives for it, with every room that seats the course. After
+    each assignment, forward checking prunes the domains of the slots it overlaps:
+    - same lecturer (or same cohort, with cohorts): the overlapping times go
+    - otherwise: the booked room goes from the overlapping times
+    and the search backtracks as soon as a domain is empty. The next slot to assign is the
+    one with the fewest values left (most constrained first); values are tried requested
+    time first, then in the grid's alternative order, smallest fitting room first.
+
+    Domains are dicts of time index -> set of room indices, and every pruning is recorded
+    on a trail so backtracking restores exactly what was removed.
+
+    cohorts: a scheduler.COHORTS name
+    """
+
+    def __init__(self, courses, rooms, time_grid=DEFAULT_TIME_GRID, cohorts=None):
+        self.rooms = rooms if isinstance(rooms, RoomCatalogue) else RoomCatalogue(rooms)
+        self.slots = [(course, timeslot) for course in courses for timeslot in course.time_slots]
+        self.cohort_key = cohort_key_function(cohorts)
+
+        self.times = []  # time index -> (start, end)
+        time_index = {}
+        self.preferences = []  # slot -> time indices in the order to try
+        for course, timeslot in self.slots:
+            preference = []
+            for span in [(timeslot.start, timeslot.end)] + time_grid.candidates(timeslot.start, timeslot.end):
+                if span not in time_index:
+                    time_index[span] = len(self.times)
+                    self.times.append(span)
+                if time_index[span] not in preference:
+                    preference.append(time_index[span])
+            self.preferences.append(preference)
+
+        # time index -> time indices overlapping it (itself included)
+        by_day = defaultdict(list)
+        for t, (start, end) in enumerate(self.times):
+            by_day[start // MINUTES_PER_DAY].append(t)
+        self.overlapping = [[] for _ in self.times]
+        for group in by_day.values():
+            for a in group:
+                start, end = self.times[a]
+                self.overlapping[a] = [b for b in group if self.times[b][0] < end and start < self.times[b][1]]
+
+        self.domains = []
+        self.sizes = []
+        self.slots_with = defaultdict(list)  # time index -> slots that have it in their domain
+        for i, (course, _) in enumerate(self.slots):
+            fitting = range(self.rooms.fitting_index(course.num_students), len(self.rooms))
+            self.domains.append({t: set(fitting) for t in self.preferences[i]})
+            self.sizes.append(len(fitting) * len(self.preferences[i]))
+            for t in self.preferences[i]:
+                self.slots_with[t].append(i)
+
+        self.assigned = [None] * len(self.slots)
+        self.trail = []
+        self.nodes = 0
+
+    def _assign(self, i, t, r):
+        """
+        Books slot i at time t in room r and prunes the other slots' domains.
+        Returns False on a domain wipe-out (the prunings are still on the trail).
+        """
+        self.assigned[i] = (t, r)
+        course = self.slots[i][0]
+        cohort = self.cohort_key(course) if self.cohort_key is not None else None
+        ok = True
+        for t2 in self.overlapping[t]:
+            for j in self.slots_with[t2]:
+                if self.assigned[j] is not None:
+                    continue
+                rooms = self.domains[j].get(t2)
+                if not rooms:
+                    continue
+                other = self.slots[j][0]
+                if other.lecturer_id == course.lecturer_id or (cohort is not None and self.cohort_key(other) == cohort):
+                    del self.domains[j][t2]
+                    self.sizes[j] -= len(rooms)
+                    self.trail.append((j, t2, rooms))
+                elif r in rooms:
+                    rooms.discard(r)
+                    self.sizes[j] -= 1
+                    self.trail.append((j, t2, r))
+                else:
+                    continue
+                if not self.sizes[j]:
+                    ok = False
+        return ok
+
+    def _undo_to(self, mark):
+        while len(self.trail) > mark:
+            j, t, removed = self.trail.pop()
+            if isinstance(removed, set):
+                self.domains[j][t] = removed
+                self.sizes[j] += len(removed)
+            else:
+                self.domains[j][t].add(removed)
+                self.sizes[j] += 1
+
+    def _select(self):
+        best = None
+        for i, value in enumerate(self.assigned):
+            if value is None and (best is None or self.sizes[i] < self.sizes[best]):
+                best = i
+        return best
+
+    def _values(self, i):
+        domain = self.domains[i]
+        return [(t, r) for t in self.preferences[i] for r in sorted(domain.get(t, ()))]
+
+    def solve(self, node_limit=200000, time_limit=5.0, started=None, progress=None, progress_every=4096):
+        """
+        Returns "solved", "infeasible" (search exhausted) or "limit" (node/time limit hit).
+        When solved, self.assigned holds (time index, room index) per slot.
+        started: time.perf_counter() value the time limit runs from (e.g. taken before building
+        the solver), now when None
+        progress: optional callable, called with the number of slots assigned every
+        progress_every nodes
+        """
+        if started is None:
+            started = time.perf_counter()
+        deadline = started + time_limit if time_limit is not None else None
+        if deadline is not None and time.perf_counter() > deadline:
+            return "limit"
+        first = self._select()
+        if first is None:
+            return "solved"
+        if not self.sizes[first]:
+            return "infeasible"
+
+        stack = [[first, self._values(first), 0, len(self.trail)]]
+        while stack:
+            frame = stack[-1]
+            i, values, k, mark = frame
+            self._undo_to(mark)
+            self.assigned[i] = None
+            if k == len(values):
+                stack.pop()
+                continue
+            frame[2] = k + 1
+
+            self.nodes += 1
+            if node_limit is not None and self.nodes > node_limit:
+                return "limit"
+            if deadline is not None and time.perf_counter() > deadline:
+                return "limit"
+            if progress is not None and self.nodes % progress_every == 0:
+                progress(len(stack) - 1)
+
+            if not self._assign(i, *values[k]):
+                continue
+            nxt = self._select()
+            if nxt is None:
+                return "solved"
+            stack.append([nxt, self._values(nxt), 0, len(self.trail)])
+        return "infeasible"
+
+    def bookings(self):
+        bookings = []
+        for booking_id, ((course, timeslot), (t, r)) in enumerate(zip(self.slots, self.assigned), start=1):
+            start, end = self.times[t]
+            bookings.append(Booking(booking_id, self.rooms.rooms[r], course, start, end, requested=timeslot))
+        return bookings
+
+
+def exact_schedule(courses, rooms, changes_logs, time_grid=None, node_limit=200000, time_limit=5.0,
+                   backend="python", order="input", cohorts=None, room_assignment="greedy",
+                   size_limit=MAX_SEARCH_SIZE, progress=None, stats=None):
+    """
+    Exact mode: books every course slot if ExactSolver finds a timetable within the limits,
+    otherwise returns auto_schedule_courses(..., backend=backend, order=order) as before.
+    Returns (bookings, failed_bookings, report) with report["status"] from ExactSolver.solve,
+    or "too_large" when search_size() is above size_limit and the search was skipped, and
+    "fallback" True when the greedy result was used. The greedy fallback keeps the same cohorts
+    and uses room_assignment.
+
+    time_limit covers building the solver as well as the search.
+    progress: optional callable for progress events (core/progress.py): slots assigned so far
+    during the search (no bookings, at most every quarter second), the greedy fallback's
+    events, then a final summary_event.
+    stats: optional SchedulerStats, counting the greedy fallback's searches
+    """
+    time_grid = time_grid or DEFAULT_TIME_GRID
+    started = time.perf_counter()
+    if size_limit is not None and search_size(courses, rooms, time_grid) > size_limit:
+        status, nodes = "too_large", 0
+    else:
+        solver = ExactSolver(courses, rooms, time_grid, cohorts=cohorts)
+        search_progress = None
+        if progress is not None:
+            next_event = 0
+
+            def search_progress(assigned):
+                nonlocal next_event
+                if time.perf_counter() >= next_event:
+                    progress({"processed": assigned, "total": len(solver.slots), "placed": assigned, "fallbacks": 0,
+                              "failed": 0, "bookings": [], "done": False})
+                    next_event = time.perf_counter() + 0.25
+        status = solver.solve(node_limit, time_limit, started, search_progress)
+        nodes = solver.nodes
+    report = {"status": status, "nodes": nodes, "fallback": status != "solved"}
+
+    if status == "solved":
+        bookings, failed = solver.bookings(), []
+        for b in bookings:
+            if b.moved:
+                changes_logs.append(f"⚠️ {b.course.course_id}({b.course.name}) moved to {b.day} {b.start_time}-{b.end_time} to fit the full timetable")
+    else:
+        bookings, failed = auto_schedule_courses(courses, rooms, changes_logs, backend=backend,
+                                                 time_grid=time_grid, order=order, cohorts=cohorts,
+                                                 room_assignment=room_assignment, progress=not_done(progress),
+                                                 stats=stats)
+    if progress is not None:
+        progress(summary_event(bookings, failed))
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return bookings, failed, report
@@ -12,11 +12,9 @@ from docx.shared import Inches, Pt
 from docx.oxml.ns import qn
 from docx.enum.table import WD_TABLE_ALIGNMENT, WD_ALIGN_VERTICAL
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from .algoclass import DEFAULT_TIME_GRID
 
 
-DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-HOURS = ["08:00","09:00","10:00","11:00","12:00","13:00","14:00","15:00","16:00","17:00"]
-
 from reportlab.lib.styles import ParagraphStyle
 
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
@@ -31,8 +29,9 @@ from io import BytesIO
 from django.http import FileResponse
 import os
 
-DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-HOURS = ["08:00", "09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00"]
+# Default columns/rows; exports follow the institution's TimeGrid when one is passed in
+DAYS = DEFAULT_TIME_GRID.day_names
+HOURS = DEFAULT_TIME_GRID.labels
 
 # Add this watermark function
 def draw_watermark(canvas, doc):
@@ -49,7 +48,8 @@ def draw_watermark(canvas, doc):
     canvas.drawString(x + icon_size + 5, y + 8, "Powered by UniScheduL – https://unischedul.com")
 
 
-def generate_pdf(schedule, failed, semester, faculty, session, institution):
+def generate_pdf(schedule, failed, semester, faculty, session, institution, time_grid=DEFAULT_TIME_GRID):
+    days, hours = time_grid.day_names, time_grid.labels
     buffer = BytesIO()
 
     # Setup page with watermark via custom PageTemplate
@@ -82,11 +82,11 @@ def generate_pdf(schedule, failed, semester, faculty, session, institution):
     story.append(Paragraph(f"Faculty of {faculty} – General Timetable", header_style))
     story.append(Spacer(1, 12))
 
-    table_data = [["Days"] + HOURS]
+    table_data = [["Days"] + hours]
 
-    for day in DAYS:
+    for day in days:
         row = [Paragraph(day, small_style)]
-        for hour in HOURS:
+        for hour in hours:
             booked = [
                 Paragraph(
                     f"<b>{b['course_id']}</b><br/>{b['lecturer']}<br/><i>Room: {b['room']}</i>",
@@ -97,7 +97,7 @@ def generate_pdf(schedule, failed, semester, faculty, session, institution):
             row.append(booked if booked else "")
         table_data.append(row)
 
-    col_widths = [0.9 * inch] + [0.82 * inch] * len(HOURS)
+    col_widths = [0.9 * inch] + [0.82 * inch] * len(hours)
     tbl = Table(table_data, repeatRows=1, colWidths=col_widths)
 
     tbl.setStyle(TableStyle([
@@ -125,7 +125,8 @@ def generate_pdf(schedule, failed, semester, faculty, session, institution):
     buffer.seek(0)
     return FileResponse(buffer, as_attachment=True, filename=f"{institution}_Optimized_Schedule_{faculty}_for_{session}.pdf")
 
-def generate_docx(schedule, failed, semester, year, dept, faculty, session):
+def generate_docx(schedule, failed, semester, year, dept, faculty, session, time_grid=DEFAULT_TIME_GRID):
+    days, hours = time_grid.day_names, time_grid.labels
     document = Document()
     style = document.styles['Normal']
     font = style.font
@@ -140,8 +141,8 @@ def generate_docx(schedule, failed, semester, year, dept, faculty, session):
     document.add_paragraph()
 
     # Create table
-    num_cols = len(HOURS) + 1
-    table = document.add_table(rows=len(DAYS) + 1, cols=num_cols)
+    num_cols = len(hours) + 1
+    table = document.add_table(rows=len(days) + 1, cols=num_cols)
     table.alignment = WD_TABLE_ALIGNMENT.CENTER
     table.autofit = False
 
@@ -153,13 +154,13 @@ def generate_docx(schedule, failed, semester, year, dept, faculty, session):
 
     # Header row
     table.cell(0, 0).text = "Days"
-    for i, hour in enumerate(HOURS):
+    for i, hour in enumerate(hours):
         table.cell(0, i + 1).text = hour
 
     # Table content
-    for row_idx, day in enumerate(DAYS):
+    for row_idx, day in enumerate(days):
         table.cell(row_idx + 1, 0).text = day
-        for col_idx, hour in enumerate(HOURS):
+        for col_idx, hour in enumerate(hours):
             cell = table.cell(row_idx + 1, col_idx + 1)
             entries = [
                 f"{b['course_id']} - {b['course_name']}\n{b['lecturer']}\nRoom: {b['room']}"
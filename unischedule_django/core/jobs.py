@@ -0,0 +1,131 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .models import SchedulingJob
+from .runs import run_schedule, new_stats, InvalidRunInput
+
+# Progress reported for each run_schedule phase as it starts
+PHASE_PROGRESS = {"loading": 0.05, "solving": 0.2, "improving": 0.6, "serializing": 0.9}
+
+
+class JobRejected(Exception):
+    """The job queue or the institution's concurrency limit is full"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+_executor = None
+_lock = threading.Lock()
+_pending = 0  # jobs submitted to this process' pool and not finished yet
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.SCHEDULER_JOB_WORKERS, thread_name_prefix="scheduling-job")
+    return _executor
+
+
+def expire_stale_jobs():
+    """
+    Marks queued/running jobs older than SCHEDULER_JOB_TIMEOUT as failed, e.g. ones whose
+    server process was restarted, so they don't hold the institution's slots forever.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.SCHEDULER_JOB_TIMEOUT)
+    SchedulingJob.objects.filter(status__in=SchedulingJob.ACTIVE_STATUSES, created_at__lt=cutoff).update(
+        status='failed', error="Timed out", finished_at=timezone.now())
+
+
+def start_job(inst, user, options):
+    """
+    Creates a queued job and hands it to the in-process pool.
+    Raises JobRejected when the institution already has SCHEDULER_JOBS_PER_INSTITUTION active
+    jobs or this process has SCHEDULER_JOB_QUEUE_SIZE jobs waiting or running.
+    """
+    global _pending
+    expire_stale_jobs()
+    active = SchedulingJob.objects.filter(institution=inst, status__in=SchedulingJob.ACTIVE_STATUSES).count()
+    if active >= settings.SCHEDULER_JOBS_PER_INSTITUTION:
+        raise JobRejected("This institution already has a scheduling run in progress.")
+
+    with _lock:
+        if _pending >= settings.SCHEDULER_JOB_QUEUE_SIZE:
+            raise JobRejected("The scheduling queue is full, try again shortly.")
+        _pending += 1
+    try:
+        job = SchedulingJob.objects.create(institution=inst, created_by=user, options=options)
+    except Exception:
+        with _lock:
+            _pending -= 1
+        raise
+    _get_executor().submit(_run_job, job.id)
+    return job
+
+
+def cancel_job(job):
+    """
+    Queued jobs are cancelled right away; running ones stop at their next progress update
+    (between phases, and during the solve and the improvement).
+    """
+    if job.status == 'queued':
+        SchedulingJob.objects.filter(id=job.id, status='queued').update(
+            status='cancelled', cancel_requested=True, finished_at=timezone.now())
+    elif job.status == 'running':
+        SchedulingJob.objects.filter(id=job.id).update(cancel_requested=True)
+    job.refresh_from_db()
+    return job
+
+
+def _run_job(job_id):
+    global _pending
+    close_old_connections()  # pool threads get their own DB connection
+    try:
+        started = SchedulingJob.objects.filter(id=job_id, status='queued').update(
+            status='running', started_at=timezone.now())
+        if not started:
+            return  # cancelled (or expired) while queued
+        job = SchedulingJob.objects.select_related('institution').get(id=job_id)
+
+        def check_cancelled():
+            if SchedulingJob.objects.filter(id=job_id, cancel_requested=True).exists():
+                raise JobCancelled()
+
+        current = {"phase": None}
+
+        def progress(phase):
+            current["phase"] = phase
+            SchedulingJob.objects.filter(id=job_id).update(phase=phase, progress=PHASE_PROGRESS.get(phase, 0))
+            check_cancelled()
+
+        def solver_progress(event):
+            # Solver events (already rate-limited) fill the "solving" share of the bar; they and the
+            # improvement's events are where a running job notices it was cancelled
+            if current["phase"] == "solving":
+                share = event["processed"] / event["total"] if event["total"] else 1
+                solving, next_phase = PHASE_PROGRESS["solving"], PHASE_PROGRESS["improving"]
+                SchedulingJob.objects.filter(id=job_id).update(progress=solving + share * (next_phase - solving))
+            check_cancelled()
+
+        try:
+            result, _ = run_schedule(job.institution, job.options, progress, solver_progress, new_stats())
+        except JobCancelled:
+            SchedulingJob.objects.filter(id=job_id).update(status='cancelled', finished_at=timezone.now())
+        except InvalidRunInput as e:
+            SchedulingJob.objects.filter(id=job_id).update(status='failed', error=str(e), finished_at=timezone.now())
+        except Exception as e:
+            SchedulingJob.objects.filter(id=job_id).update(status='failed', error=f"Scheduling error: {e}",
+                                                           finished_at=timezone.now())
+        else:
+            SchedulingJob.objects.filter(id=job_id).update(status='done', progress=1, phase="", result=result,
+                                                           finished_at=timezone.now())
+    finally:
+        with _lock:
+            _pending -= 1
+        connection.close()
@@ -0,0 +1,57 @@
+from .models import Lecturer, Room, Course, TimeSlot, TimeGrid
+from .algoclass import (Room as AlgoRoom, Course as AlgoCourse, TimeSlot as AlgoTimeSlot, SchedulingInput,
+                        DEFAULT_TIME_GRID)
+from .algoclass.timecode import day_index, parse_time, MINUTES_PER_DAY
+
+
+def _slot_minutes(cache, day, start_time, end_time):
+    """
+    (start, end) minutes since Monday 00:00 for a slot's strings; most slots repeat the same
+    few day/time combinations, so each one is parsed once. Raises ValueError like TimeSlot().
+    """
+    key = (day, start_time, end_time)
+    minutes = cache.get(key)
+    if minutes is None:
+        day_start = day_index(day) * MINUTES_PER_DAY
+        minutes = cache[key] = (day_start + parse_time(start_time), day_start + parse_time(end_time))
+    return minutes
+
+
+def get_time_grid(institution):
+    """The institution's algo TimeGrid, or the default Monday-Friday hourly grid"""
+    grid = TimeGrid.objects.filter(institution=institution).first()
+    return grid.to_algo() if grid else DEFAULT_TIME_GRID
+
+
+def load_institution(inst):
+    """
+    Loads an institution's rooms, courses with their time slots, lecturer names and time grid
+    in five queries of plain tuples (values_list), without creating model instances, and builds
+    the algo objects in one pass. Rooms and courses come in the same order as
+    Room/Course.objects.filter(institution=inst), each course's slots in id order. A course's
+    department is its lecturer's (courses have none of their own), joined in the course query.
+
+    lecturer_names ({lecturer_id: name}) goes to the result cache key and serialize_bookings,
+    so a run needs no second lecturer query.
+    Raises ValueError on an invalid day or time in a time slot.
+    """
+    room_list = [AlgoRoom(room_id, name, capacity) for room_id, name, capacity in
+                 Room.objects.filter(institution=inst).values_list("id", "name", "capacity")]
+
+    course_list = []
+    slots_by_course = {}
+    for course_id, name, level, num_students, lecturer_id, department in Course.objects.filter(
+            institution=inst).values_list("id", "name", "level", "num_students", "lecturer_id", "lecturer__department"):
+        time_slots = slots_by_course[course_id] = []
+        course_list.append(AlgoCourse(course_id, name, level, num_students, time_slots, lecturer_id, department))
+
+    parsed = {}
+    for course_id, day, start_time, end_time in TimeSlot.objects.filter(course__institution=inst).order_by(
+            "id").values_list("course_id", "day", "start_time", "end_time"):
+        time_slots = slots_by_course.get(course_id)
+        if time_slots is not None:  # None: course added after the course query
+            # A TimeSlot object per course slot: bookings refer back to their own requested slot
+            time_slots.append(AlgoTimeSlot.from_minutes(*_slot_minutes(parsed, day, start_time, end_time)))
+
+    lecturer_names = dict(Lecturer.objects.filter(institution=inst).values_list("id", "name"))
+    return SchedulingInput(room_list, course_list, lecturer_names, get_time_grid(inst))
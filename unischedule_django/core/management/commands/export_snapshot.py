@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Institution
+from core.loader import load_institution
+from core.snapshot import write_snapshot, export_snapshot
+
+
+class Command(BaseCommand):
+    help = "Writes an institution's scheduling inputs to a dataset snapshot (core/snapshot.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("institution_id", type=int)
+        parser.add_argument("-o", "--output", help="file to write; default: SCHEDULER_SNAPSHOT_DIR")
+
+    def handle(self, *args, **options):
+        try:
+            inst = Institution.objects.get(id=options["institution_id"])
+        except Institution.DoesNotExist:
+            raise CommandError(f"No institution with id {options['institution_id']}")
+        try:
+            if options["output"]:
+                loaded = load_institution(inst)
+                write_snapshot(options["output"], loaded)
+                path = options["output"]
+            else:
+                path, loaded = export_snapshot(inst)
+        except ValueError as e:
+            raise CommandError(f"Invalid time slot: {e}")
+        slots = sum(len(course.time_slots) for course in loaded.courses)
+        self.stdout.write(f"{path}: {len(loaded.rooms)} rooms, {len(loaded.courses)} courses, {slots} time slots")
@@ -0,0 +1,41 @@
+from bisect import bisect_left
+
+
+def match_rooms(engine, requests):
+    """
+    Rooms for course slots requested at the same time, assigned together instead of one by one
+    in slot order, so a small course can't take the only free room a big one fits in.
+
+    The assignment is a min-cost matching: as many courses as possible get a room, then with
+    the fewest wasted seats (room capacity - students) in total. Because a room that seats a
+    course also seats every smaller one, the matching is found by giving the courses, largest
+    first, the smallest free room that seats them (exact for these costs, and the same result
+    as a Hungarian-algorithm assignment) in O(n log n) instead of O(n^2 m).
+
+    requests: (course, timeslot) pairs with the same start and end, in slot order. Only the
+    first request of a lecturer (or cohort) whose lecturer and cohort are free then takes part.
+    Returns [(course, timeslot, room)] for the requests that got a room, in slot order; the rest
+    go through the usual path (place_course_slot).
+    """
+    start, end = requests[0][1].start, requests[0][1].end
+    taking_part, seen = [], set()
+    for course, timeslot in requests:
+        keys = {("lecturer", course.lecturer_id)}
+        if engine.cohort_key is not None:
+            keys.add(("cohort", engine.cohort_key(course)))
+        if keys & seen or not (engine.is_lecturer_available(course, timeslot) and engine.is_cohort_available(course, timeslot)):
+            continue
+        seen |= keys
+        taking_part.append((course, timeslot))
+    if not taking_part:
+        return []
+
+    rooms = engine.free_rooms(min(course.num_students for course, _ in taking_part), start, end)
+    capacities = [room.capacity for room in rooms]
+    assigned = {}
+    for i in sorted(range(len(taking_part)), key=lambda i: -taking_part[i][0].num_students):
+        k = bisect_left(capacities, taking_part[i][0].num_students)
+        if k < len(rooms):
+            assigned[i] = rooms.pop(k)
+            del capacities[k]
+    return [(course, timeslot, assigned[i]) for i, (course, timeslot) in enumerate(taking_part) if i in assigned]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:35
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_course_institution_lecturer_institution_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeGrid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.JSONField(default=core.models.default_grid_days)),
+                ('period_minutes', models.PositiveIntegerField(default=60)),
+                ('opening_time', models.CharField(default='08:00', max_length=5)),
+                ('closing_time', models.CharField(default='18:00', max_length=5)),
+                ('breaks', models.JSONField(blank=True, default=list)),
+                ('alternative_periods', models.PositiveIntegerField(default=2)),
+                ('institution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='time_grid', to='core.institution')),
+            ],
+        ),
+    ]
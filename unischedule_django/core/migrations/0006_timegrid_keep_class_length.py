@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_schedulingjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timegrid',
+            name='alternative_periods',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
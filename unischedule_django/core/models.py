@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from .algoclass import TimeGrid as AlgoTimeGrid
 
 class Lecturer(models.Model):
     institution = models.ForeignKey("Institution", on_delete=models.CASCADE)
@@ -26,6 +27,51 @@ class TimeSlot(models.Model):
     start_time = models.CharField(max_length=5)
     end_time = models.CharField(max_length=5)
 
+def default_grid_days():
+    return ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+class TimeGrid(models.Model):
+    institution = models.OneToOneField("Institution", on_delete=models.CASCADE, related_name='time_grid')
+    days = models.JSONField(default=default_grid_days)  # e.g. ["Monday", ..., "Friday"]
+    period_minutes = models.PositiveIntegerField(default=60)
+    opening_time = models.CharField(max_length=5, default="08:00")
+    closing_time = models.CharField(max_length=5, default="18:00")
+    breaks = models.JSONField(default=list, blank=True)  # e.g. [["12:00", "13:00"]]
+    # Length of a rescheduled class, in periods; 0: the class keeps its own length
+    alternative_periods = models.PositiveIntegerField(default=0)
+
+    def to_algo(self):
+        return AlgoTimeGrid(self.days, self.period_minutes, self.opening_time, self.closing_time,
+                            self.breaks, self.alternative_periods)
+
+
+# --- Background scheduling job (core/jobs.py) ---
+class SchedulingJob(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    )
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    institution = models.ForeignKey("Institution", on_delete=models.CASCADE, related_name='scheduling_jobs')
+    created_by = models.ForeignKey("User", on_delete=models.SET_NULL, null=True, blank=True)
+    options = models.JSONField(default=dict)  # runs.parse_run_options() output
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    phase = models.CharField(max_length=20, blank=True)  # e.g. "solving"
+    progress = models.FloatField(default=0)  # 0 to 1
+    cancel_requested = models.BooleanField(default=False)
+    result = models.JSONField(null=True, blank=True)  # run-algorithm response body once done
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job {self.id} ({self.status})"
+
 
 # --- Institution Model ---
 class Institution(models.Model):
@@ -0,0 +1,184 @@
+from bisect import bisect_left
+from math import gcd
+
+import numpy as np
+
+from .algoclass import RoomCatalogue, TimeSlot, MINUTES_PER_DAY, DEFAULT_TIME_GRID
+from .scheduler import cohort_key_function
+
+DAYS_PER_WEEK = 7
+
+
+def _prefix_sums(busy):
+    """
+    Cumulative busy-cell counts along the last (time) axis, with a leading zero column,
+    so the busy cells in [first, last) are sums[..., last] - sums[..., first].
+    """
+    sums = busy.cumsum(axis=-1, dtype=np.int32)
+    return np.pad(sums, [(0, 0)] * (busy.ndim - 1) + [(1, 0)])
+
+
+class NumpyBackend:
+    """
+    Engine state for auto_schedule_courses(backend="numpy").
+
+    Occupancy is kept as boolean arrays, rooms x days x columns and lecturers x days x columns
+    (and cohorts x days x columns with cohorts),
+    where a column is the largest step that divides every time in the run (an hour on an
+    hourly timetable). An alternative-slot search then checks every candidate, its free rooms
+    and its conflict count in a few array operations instead of one Python loop per candidate.
+    Results are the same as the default backend. With stats, rooms and candidates are counted
+    as the default backend would examine them; no bookings are scanned (start_counts).
+    """
+
+    def __init__(self, courses, rooms, bookings, time_grid=DEFAULT_TIME_GRID, stats=None, cohorts=None):
+        self.rooms = RoomCatalogue(rooms)
+        self.bookings = bookings
+        self.time_grid = time_grid
+        self.stats = stats
+        self.room_index = {room.room_id: i for i, room in enumerate(self.rooms)}
+        self.lecturer_index = {}
+        for course in courses:
+            self.lecturer_index.setdefault(course.lecturer_id, len(self.lecturer_index))
+        self.cohort_key = cohort_key_function(cohorts)
+        self.cohort_index = {}
+        if self.cohort_key is not None:
+            for course in courses:
+                self.cohort_index.setdefault(self.cohort_key(course), len(self.cohort_index))
+
+        # Column width: gcd of every minute offset the run can book
+        step = MINUTES_PER_DAY
+        for minutes in time_grid.starts + time_grid.ends:
+            step = gcd(step, minutes)
+        for course in courses:
+            for timeslot in course.time_slots:
+                step = gcd(gcd(step, timeslot.start), timeslot.end)
+        self.step = step
+        columns = MINUTES_PER_DAY // step
+
+        self.room_busy = np.zeros((len(self.rooms), DAYS_PER_WEEK, columns), dtype=bool)
+        self.lecturer_busy = np.zeros((len(self.lecturer_index), DAYS_PER_WEEK, columns), dtype=bool)
+        self.cohort_busy = np.zeros((len(self.cohort_index), DAYS_PER_WEEK, columns), dtype=bool)
+        self.start_counts = np.zeros((DAYS_PER_WEEK, columns), dtype=np.int32)  # bookings starting in each cell
+        self._candidates = {}  # (start, end) -> candidate arrays
+
+    def _cells(self, start, end):
+        day, offset = divmod(start, MINUTES_PER_DAY)
+        return day, offset // self.step, (end - day * MINUTES_PER_DAY) // self.step
+
+    def _lecturer_row(self, course):
+        i = self.lecturer_index.get(course.lecturer_id)
+        if i is None:
+            i = self.lecturer_index[course.lecturer_id] = len(self.lecturer_index)
+            self.lecturer_busy = np.concatenate([self.lecturer_busy, np.zeros((1,) + self.lecturer_busy.shape[1:], dtype=bool)])
+        return i
+
+    def _cohort_row(self, course):
+        key = self.cohort_key(course)
+        i = self.cohort_index.get(key)
+        if i is None:
+            i = self.cohort_index[key] = len(self.cohort_index)
+            self.cohort_busy = np.concatenate([self.cohort_busy, np.zeros((1,) + self.cohort_busy.shape[1:], dtype=bool)])
+        return i
+
+    def is_lecturer_available(self, course, timeslot):
+        day, first, last = self._cells(timeslot.start, timeslot.end)
+        return not self.lecturer_busy[self._lecturer_row(course), day, first:last].any()
+
+    def is_cohort_available(self, course, timeslot):
+        if self.cohort_key is None:
+            return True
+        day, first, last = self._cells(timeslot.start, timeslot.end)
+        return not self.cohort_busy[self._cohort_row(course), day, first:last].any()
+
+    def find_free_room(self, course, timeslot):
+        lo = bisect_left(self.rooms.capacities, course.num_students)
+        day, first, last = self._cells(timeslot.start, timeslot.end)
+        busy = self.room_busy[lo:, day, first:last].any(axis=1)
+        if self.stats is not None:
+            self.stats.find_free_room_calls += 1
+            self.stats.rooms_examined += int(busy.argmin()) + 1 if busy.size and not busy.all() else busy.size
+        if busy.size and not busy.all():
+            return self.rooms.rooms[lo + int(busy.argmin())], None  # Smallest free room that fits
+
+        if self.rooms.largest_capacity < course.num_students:
+            return None, f"No room that can support the required capacity of {course.num_students}. Largest room available: {self.rooms.largest_capacity}"
+        return None, f"No room unavailable on {timeslot.day} at ({timeslot.start_time} - {timeslot.end_time})"
+
+    def free_rooms(self, num_students, start, end):
+        """Every free room that seats num_students for [start, end), smallest first"""
+        lo = bisect_left(self.rooms.capacities, num_students)
+        day, first, last = self._cells(start, end)
+        busy = self.room_busy[lo:, day, first:last].any(axis=1)
+        return [self.rooms.rooms[lo + int(i)] for i in np.flatnonzero(~busy)]
+
+    def _candidate_arrays(self, timeslot):
+        key = (timeslot.start, timeslot.end)
+        if key not in self._candidates:
+            candidates = self.time_grid.candidates(timeslot.start, timeslot.end)
+            starts = np.array([start for start, end in candidates], dtype=np.int64)
+            ends = np.array([end for start, end in candidates], dtype=np.int64)
+            days = starts // MINUTES_PER_DAY
+            self._candidates[key] = (
+                starts, ends, days,
+                (starts - days * MINUTES_PER_DAY) // self.step,
+                (ends - days * MINUTES_PER_DAY) // self.step,
+            )
+        return self._candidates[key]
+
+    def find_next_available_time_slot(self, course, timeslot):
+        starts, ends, days, first, last = self._candidate_arrays(timeslot)
+        if self.stats is not None:
+            self.stats.next_slot_searches += 1
+            self.stats.candidates_evaluated += len(starts)
+        if not len(starts):
+            return None, None
+
+        # Busy cells per span via prefix sums along the time axis
+        lecturer = _prefix_sums(self.lecturer_busy[self._lecturer_row(course)])
+        lecturer_free = lecturer[days, last] == lecturer[days, first]
+
+        lo = bisect_left(self.rooms.capacities, course.num_students)
+        rooms = _prefix_sums(self.room_busy[lo:])
+        room_free = rooms[:, days, last] == rooms[:, days, first]  # fitting rooms x candidates
+
+        valid = lecturer_free & room_free.any(axis=0)
+        if self.cohort_key is not None:
+            cohort = _prefix_sums(self.cohort_busy[self._cohort_row(course)])
+            valid &= cohort[days, last] == cohort[days, first]
+        if not valid.any():
+            return None, None
+
+        # First candidate (in search order) with the fewest conflicts
+        conflicts = np.where(valid, self.start_counts[days, first], np.iinfo(np.int32).max)
+        best = int(conflicts.argmin())
+        room = self.rooms.rooms[lo + int(room_free[:, best].argmax())]
+        return room, TimeSlot.from_minutes(int(starts[best]), int(ends[best]))
+
+    def add(self, booking):
+        self.bookings.append(booking)
+        self.occupy(booking)
+        day, first, _ = self._cells(booking.start, booking.end)
+        self.start_counts[day, first] += 1
+
+    # Index-only helpers, as on OccupancyBackend (used by decompose's same-time repair)
+
+    def _mark(self, booking, busy):
+        day, first, last = self._cells(booking.start, booking.end)
+        self.room_busy[self.room_index[booking.room.room_id], day, first:last] = busy
+        self.lecturer_busy[self._lecturer_row(booking.course), day, first:last] = busy
+        if self.cohort_key is not None:
+            self.cohort_busy[self._cohort_row(booking.course), day, first:last] = busy
+
+    def occupy(self, booking):
+        self._mark(booking, True)
+
+    def release(self, booking):
+        self._mark(booking, False)
+
+    def can_place(self, course, start, end):
+        """True if the course's lecturer (and cohort, with cohorts) is free for [start, end)"""
+        day, first, last = self._cells(start, end)
+        if self.lecturer_busy[self._lecturer_row(course), day, first:last].any():
+            return False
+        return self.cohort_key is None or not self.cohort_busy[self._cohort_row(course), day, first:last].any()
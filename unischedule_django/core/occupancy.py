@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right
+
+from .algoclass.timecode import MINUTES_PER_DAY
+
+
+def span_mask(start, end):
+    """
+    Returns (day, mask) for [start, end) given in minutes since Monday 00:00,
+    where mask has one bit set for every minute of that day the span covers.
+    """
+    day, offset = divmod(start, MINUTES_PER_DAY)
+    if end <= start:
+        return day, 0
+    return day, ((1 << (end - start)) - 1) << offset
+
+
+class Occupancy:
+    """
+    Index of booked time per (key, day), where key is e.g. a room_id.
+
+    Each (key, day) pair maps to an int bitmask in which bit m is set when minute m
+    of that day is taken, so checking a slot is a single AND instead of a scan over
+    every booking made so far.
+    """
+
+    def __init__(self):
+        self._masks = {}
+
+    @classmethod
+    def from_bookings(cls, bookings, key):
+        """
+        Builds an index from existing bookings. `key` maps a Booking to its index key.
+        """
+        occupancy = cls()
+        for b in bookings:
+            occupancy.add(key(b), b.start, b.end)
+        return occupancy
+
+    def add(self, key, start, end):
+        day, mask = span_mask(start, end)
+        slot = (key, day)
+        self._masks[slot] = self._masks.get(slot, 0) | mask
+
+    def remove(self, key, start, end):
+        """
+        Frees [start, end) for key. Only valid for spans that were added and don't overlap
+        another span of the same key, which holds for rooms and lecturers in a valid schedule.
+        """
+        day, mask = span_mask(start, end)
+        slot = (key, day)
+        self._masks[slot] = self._masks.get(slot, 0) & ~mask
+
+    def is_free(self, key, start, end):
+        day, mask = span_mask(start, end)
+        return not (self._masks.get((key, day), 0) & mask)
+
+
+class IntervalOccupancy:
+    """
+    Occupancy with the same interface, keeping each key's booked time as a sorted list of
+    disjoint [start, end) intervals (touching or overlapping spans are merged on add) instead
+    of per-day bitmasks. Checks are two bisects, O(log n) in the key's bookings whatever the
+    span's length or alignment, and spans may cross midnight.
+    Used by the "intervals" scheduler backend.
+    """
+
+    def __init__(self):
+        self._starts = {}  # key -> interval starts, ascending
+        self._ends = {}  # key -> interval ends, ascending (the intervals are disjoint)
+
+    @classmethod
+    def from_bookings(cls, bookings, key):
+        occupancy = cls()
+        for b in bookings:
+            occupancy.add(key(b), b.start, b.end)
+        return occupancy
+
+    def add(self, key, start, end):
+        if end <= start:
+            return
+        starts = self._starts.setdefault(key, [])
+        ends = self._ends.setdefault(key, [])
+        lo = bisect_left(ends, start)  # first interval ending at or after start
+        hi = bisect_right(starts, end)  # past the last one starting at or before end
+        if lo < hi:
+            start, end = min(start, starts[lo]), max(end, ends[hi - 1])
+        starts[lo:hi] = [start]
+        ends[lo:hi] = [end]
+
+    def remove(self, key, start, end):
+        """
+        Frees [start, end) for key, splitting an interval it falls inside
+        """
+        starts, ends = self._starts.get(key), self._ends.get(key)
+        if not starts or end <= start:
+            return
+        lo = bisect_right(ends, start)  # first interval ending after start
+        hi = bisect_left(starts, end)  # past the last one starting before end
+        if lo >= hi:
+            return
+        new_starts, new_ends = [], []
+        if starts[lo] < start:
+            new_starts.append(starts[lo])
+            new_ends.append(start)
+        if ends[hi - 1] > end:
+            new_starts.append(end)
+            new_ends.append(ends[hi - 1])
+        starts[lo:hi] = new_starts
+        ends[lo:hi] = new_ends
+
+    def is_free(self, key, start, end):
+        starts = self._starts.get(key)
+        if not starts or end <= start:
+            return True
+        i = bisect_left(starts, end)  # intervals before i start before end
+        return i == 0 or self._ends[key][i - 1] <= start
@@ -0,0 +1,139 @@
+import heapq
+import random
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from .algoclass import RoomCatalogue, MINUTES_PER_DAY
+
+
+class InputOrder:
+    """
+    Course slots in the order they were given (course by course), as auto_schedule_courses always did.
+    With a seed, the slots are shuffled instead (randomized restarts, see portfolio.py).
+    """
+
+    def __init__(self, courses, rooms, seed=None, cohort_key=None):
+        self.slots = [(course, timeslot) for course in courses for timeslot in course.time_slots]
+        if seed is not None:
+            random.Random(seed).shuffle(self.slots)
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def placed(self, booking):
+        pass
+
+
+class DSaturOrder:
+    """
+    Most-constrained-first order of course slots, DSatur style.
+
+    A pending slot is ranked by (smallest first):
+    - free rooms left that can seat it at its requested time; slots that can no longer be
+      booked as requested (no such room, or the lecturer or cohort is booked then) go last, so the
+      classes that have to move fill the gaps left over instead of displacing others
+    - minus its lecturer's total number of slots (busy lecturers first)
+    - minus the number of same-level slots requested at overlapping times
+    - its position in the input, so ties keep the input order (a random position when seeded)
+
+    Call placed() after every booking; it updates the free-room count of the pending slots the
+    booking overlaps and re-queues them, with stale heap entries skipped when popped.
+    """
+
+    def __init__(self, courses, rooms, seed=None, cohort_key=None):
+        rooms = rooms if isinstance(rooms, RoomCatalogue) else RoomCatalogue(rooms)
+        self.slots = [(course, timeslot) for course in courses for timeslot in course.time_slots]
+        self.free_rooms = [len(rooms) - rooms.fitting_index(course.num_students) for course, _ in self.slots]
+        self.blocked_rooms = [set() for _ in self.slots]  # room_ids taken at each slot's requested time
+        self.pending = set(range(len(self.slots)))
+        self.cohort_key = cohort_key  # the scheduler's cohort key function, with cohorts
+
+        self.by_hour = defaultdict(list)  # hour of the week -> pending slots covering that hour
+        lecturer_load = defaultdict(int)
+        by_level_day = defaultdict(list)
+        for i, (course, timeslot) in enumerate(self.slots):
+            for hour in self._hours(timeslot.start, timeslot.end):
+                self.by_hour[hour].append(i)
+            lecturer_load[course.lecturer_id] += 1
+            by_level_day[(course.level, timeslot.start // MINUTES_PER_DAY)].append(i)
+
+        # Same-level slots overlapping each slot: the ones starting before it ends, less the ones
+        # ending by the time it starts, less itself
+        level_clashes = [0] * len(self.slots)
+        for group in by_level_day.values():
+            starts = sorted(self.slots[i][1].start for i in group)
+            ends = sorted(self.slots[i][1].end for i in group)
+            for i in group:
+                timeslot = self.slots[i][1]
+                level_clashes[i] = bisect_left(starts, timeslot.end) - bisect_right(ends, timeslot.start) - 1
+
+        tiebreak = list(range(len(self.slots)))
+        if seed is not None:
+            random.Random(seed).shuffle(tiebreak)
+        # Heap entries are ints, rank * len(slots) + the slot's place in the static order, so
+        # pushes and pops compare ints instead of tuples
+        static_order = sorted(range(len(self.slots)), key=lambda i: (-lecturer_load[self.slots[i][0].lecturer_id],
+                                                                      -level_clashes[i], tiebreak[i], i))
+        self.position = [0] * len(self.slots)
+        for p, i in enumerate(static_order):
+            self.position[i] = p
+        self.static_order = static_order
+        self.unplaceable = len(rooms) + 1  # rank of slots that have to move
+        self.heap = [self._key(i, self.free_rooms[i]) for i in range(len(self.slots))]
+        heapq.heapify(self.heap)
+
+    def _rank(self, free_rooms):
+        return free_rooms or self.unplaceable
+
+    def _key(self, i, free_rooms):
+        return self._rank(free_rooms) * len(self.slots) + self.position[i]
+
+    @staticmethod
+    def _hours(start, end):
+        first = start // 60
+        return range(first, max(first, (end - 1) // 60) + 1)
+
+    def __iter__(self):
+        n, heap, order, free_rooms, pending = len(self.slots), self.heap, self.static_order, self.free_rooms, self.pending
+        while heap:
+            rank, p = divmod(heapq.heappop(heap), n)
+            i = order[p]
+            if i not in pending or rank != (free_rooms[i] or self.unplaceable):
+                continue  # already scheduled, or re-queued with a newer count
+            pending.discard(i)
+            yield self.slots[i]
+
+    def placed(self, booking):
+        pending = self.pending
+        touched = []
+        for hour in self._hours(booking.start, booking.end):
+            group = self.by_hour.get(hour)
+            if group:
+                live = [i for i in group if i in pending]
+                if len(live) < len(group):
+                    self.by_hour[hour] = live  # drop the slots scheduled since
+                touched.extend(live)
+        if len(touched) > 1:
+            touched = set(touched)
+
+        # The re-queueing below is the hot path of a DSatur run (every booking touches every
+        # pending slot it overlaps), so _key() is inlined
+        n, heap, position, free_rooms, blocked_rooms = len(self.slots), self.heap, self.position, self.free_rooms, self.blocked_rooms
+        start, end, lecturer_id = booking.start, booking.end, booking.course.lecturer_id
+        room_id, capacity = booking.room.room_id, booking.room.capacity
+        cohort_key = self.cohort_key
+        cohort = cohort_key(booking.course) if cohort_key is not None else None
+        for i in touched:
+            course, timeslot = self.slots[i]
+            if not (timeslot.start < end and start < timeslot.end):
+                continue
+            if course.lecturer_id == lecturer_id or (cohort is not None and cohort_key(course) == cohort):
+                if free_rooms[i]:
+                    # Lecturer or cohort now busy then: this slot has to move anyway
+                    free_rooms[i] = 0
+                    heapq.heappush(heap, self.unplaceable * n + position[i])
+            elif capacity >= course.num_students and room_id not in blocked_rooms[i]:
+                blocked_rooms[i].add(room_id)
+                if free_rooms[i]:
+                    free_rooms[i] -= 1
+                    heapq.heappush(heap, (free_rooms[i] or self.unplaceable) * n + position[i])
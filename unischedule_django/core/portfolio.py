@@ -0,0 +1,136 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .progress import summary_event, not_done
+from .scheduler import auto_schedule_courses, SLOT_ORDERS
+from .snapshot import read_snapshot
+
+
+def default_score(bookings, failed_bookings, failed_weight=10):
+    """
+    Lower is better: every failed slot counts failed_weight, every class moved off its requested slot 1.
+    """
+    return failed_weight * len(failed_bookings) + sum(1 for b in bookings if b.moved)
+
+
+# Per-process input, set once by the pool initializer so tasks only carry an order and a seed
+_worker_input = None
+
+class _OutOfTime(Exception):
+    pass
+
+def _init_worker(courses, rooms, options, score, snapshot=None, deadline=None):
+    global _worker_input
+    if snapshot is not None:
+        loaded, _ = read_snapshot(snapshot)
+        courses, rooms = loaded.courses, loaded.rooms
+    _worker_input = (courses, rooms, options, score, deadline)
+
+def _check_deadline(event):
+    # Progress events come at most every 0.25 s (ProgressReporter): a run past the deadline stops soon after it
+    if time.time() > _worker_input[4]:
+        raise _OutOfTime()
+
+def _run_variant(order, seed):
+    """
+    One variant: (score, order, seed), or None when the portfolio's deadline (wall-clock
+    time.time(), shared by the processes) passed before or during the run
+    """
+    courses, rooms, options, score, deadline = _worker_input
+    if deadline is not None and time.time() > deadline:
+        return None
+    try:
+        bookings, failed = auto_schedule_courses(courses, rooms, [], order=order, seed=seed,
+                                                 progress=_check_deadline if deadline is not None else None, **options)
+    except _OutOfTime:
+        return None
+    return score(bookings, failed), order, seed
+
+
+def portfolio_schedule(courses, rooms, changes_logs, runs=8, workers=None, time_limit=None,
+                       score=default_score, backend="python", time_grid=None, order="dsatur", orders=None,
+                       snapshot=None, cohorts=None, room_assignment="greedy", progress=None, stats=None):
+    """
+    Multi-start greedy: runs `runs` randomized-order variants of auto_schedule_courses
+    (seeds 1..runs, cycling through `orders`, all of SLOT_ORDERS by default) in a process pool
+    and keeps the best by score(bookings, failed_bookings), lower is better. The deterministic
+    `order` (no seed) is run in this process while the pool works, so the result is never worse
+    than a plain auto_schedule_courses call.
+
+    workers: pool size, one per CPU but the one the baseline runs on when None
+    time_limit: wall-clock cap in seconds, the baseline run included; variants not finished by
+    then are dropped. Workers get the deadline through the pool initializer and stop a variant
+    still running when it passes (and skip the ones not started), so no CPU is spent on dropped
+    variants. With no time left (time_limit <= 0) no pool is started. Only re-running the
+    winner for its bookings comes on top.
+    score: must be picklable (a module-level function), it runs in the workers
+
+    Courses, rooms and options go to each worker once through the pool initializer and tasks
+    send back only (score, order, seed); the winner is then re-run here for its bookings and logs.
+    snapshot: path of a dataset snapshot (core/snapshot.py) holding these courses and rooms;
+    workers then memory-map it instead of being sent the objects.
+    cohorts, room_assignment: passed to every auto_schedule_courses run
+    progress: optional callable for progress events (core/progress.py): the baseline run's,
+    then a summary_event of the winner once the variants are in
+    stats: optional SchedulerStats, counting the greedy passes made in this process (the
+    baseline and the winner's re-run), not the variants in the workers
+    Returns (bookings, failed_bookings, report).
+    """
+    started = time.perf_counter()
+    options = {"backend": backend, "time_grid": time_grid, "cohorts": cohorts, "room_assignment": room_assignment}
+    orders = list(orders or SLOT_ORDERS)
+
+    pool = None
+    if runs > 0 and (time_limit is None or time_limit > 0):
+        # Started before the baseline so the variants run alongside it
+        workers = min(workers or max(1, (os.cpu_count() or 1) - 1), runs)
+        deadline = time.time() + time_limit if time_limit is not None else None
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(None, None, options, score, snapshot, deadline) if snapshot else
+                                   (courses, rooms, options, score, None, deadline))
+    try:
+        pending = set()
+        if pool is not None:
+            pending = {pool.submit(_run_variant, orders[seed % len(orders)], seed) for seed in range(1, runs + 1)}
+
+        logs = []
+        bookings, failed = auto_schedule_courses(courses, rooms, logs, order=order, progress=not_done(progress),
+                                                 stats=stats, **options)
+        baseline = best_score = score(bookings, failed)
+        best_order, best_seed = order, None
+        completed = 0
+
+        while pending:
+            remaining = None if time_limit is None else max(0, time_limit - (time.perf_counter() - started))
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.result() is None:
+                    continue  # stopped at the deadline
+                run_score, run_order, seed = future.result()
+                completed += 1
+                if run_score < best_score:
+                    best_score, best_order, best_seed = run_score, run_order, seed
+            if remaining == 0:  # out of time: variants finished meanwhile were still collected
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    if best_seed is not None:
+        logs = []
+        bookings, failed = auto_schedule_courses(courses, rooms, logs, order=best_order, seed=best_seed, stats=stats,
+                                                 **options)
+
+    changes_logs.extend(logs)
+    if progress is not None:
+        progress(summary_event(bookings, failed))
+    report = {
+        "runs_completed": completed,
+        "best_order": best_order,
+        "best_seed": best_seed,
+        "baseline_score": baseline,
+        "best_score": best_score,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    return bookings, failed, report
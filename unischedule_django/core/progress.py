@@ -0,0 +1,80 @@
+import time
+
+
+class ProgressReporter:
+    """
+    Turns auto_schedule_courses progress into batched events for a callback, at most one
+    every min_interval seconds plus a final one from flush(). The clock is only read every
+    check_every slots, so reporting costs a few counter updates per slot.
+
+    Each event is a dict:
+    - processed / total: course slots handled so far / in the run
+    - placed, fallbacks, failed: slots booked (fallbacks: booked away from the requested slot), failed
+    - bookings: the bookings made since the previous event, in day and time order
+    - done: True on the final event
+    """
+
+    def __init__(self, callback, total, min_interval=0.25, check_every=16):
+        self.callback = callback
+        self.total = total
+        self.min_interval = min_interval
+        self.check_every = check_every
+        self.processed = self.placed = self.fallbacks = self.failed = 0
+        self._batch = []
+        self._next_event = time.perf_counter() + min_interval
+
+    def booked(self, booking):
+        self.placed += 1
+        self.fallbacks += booking.moved
+        self._batch.append(booking)
+        self._tick()
+
+    def failure(self):
+        self.failed += 1
+        self._tick()
+
+    def _tick(self):
+        self.processed += 1
+        if self.processed % self.check_every == 0 and time.perf_counter() >= self._next_event:
+            self.flush(done=False)
+
+    def flush(self, done=True):
+        batch, self._batch = self._batch, []
+        batch.sort(key=lambda b: b.start)
+        self.callback({
+            "processed": self.processed,
+            "total": self.total,
+            "placed": self.placed,
+            "fallbacks": self.fallbacks,
+            "failed": self.failed,
+            "bookings": batch,
+            "done": done,
+        })
+        self._next_event = time.perf_counter() + self.min_interval
+
+
+def summary_event(bookings, failed, done=True):
+    """
+    An event in the ProgressReporter shape with a whole timetable's counts and no bookings, for
+    solvers that don't book slots one at a time (exact search, portfolio, improvement): the
+    bookings come with the run's result instead.
+    """
+    return {
+        "processed": len(bookings) + len(failed),
+        "total": len(bookings) + len(failed),
+        "placed": len(bookings),
+        "fallbacks": sum(b.moved for b in bookings),
+        "failed": len(failed),
+        "bookings": [],
+        "done": done,
+    }
+
+
+def not_done(callback):
+    """
+    The callback with done=False on every event, for a pass the run reports more after (e.g. the
+    greedy fallback of the exact solver, or any solver when an improvement follows). None stays None.
+    """
+    if callback is None:
+        return None
+    return lambda event: callback({**event, "done": False})
@@ -0,0 +1,164 @@
+import time
+
+from .algoclass import Booking, TimeSlot, DEFAULT_TIME_GRID
+from .scheduler import OccupancyBackend, place_course_slot, times_overlap, failed_slot_message, failed_slot_key
+
+# Change kinds, as (kind, course_id) or (kind, room_id) pairs
+COURSE_CHANGES = ("slot_added", "slot_moved", "slot_deleted", "lecturer_reassigned")
+ROOM_CHANGES = ("room_capacity_changed",)
+
+
+def _displace(engine, course, timeslot, fixed):
+    """
+    Frees the requested slot for the course by taking out one booking in its way
+    (same lecturer or cohort, or a room that seats the course). Only bookings in `fixed` can go.
+    Returns the removed booking (no longer in the engine), or None when no single booking
+    frees the slot.
+    """
+    for b in list(engine.bookings):
+        if b not in fixed or not times_overlap(b.start, b.end, timeslot.start, timeslot.end):
+            continue
+        if (b.course.lecturer_id != course.lecturer_id and b.room.capacity < course.num_students
+                and (engine.cohort_key is None or engine.cohort_key(b.course) != engine.cohort_key(course))):
+            continue
+        engine.remove(b)
+        if engine.can_place(course, timeslot.start, timeslot.end) and engine.find_free_room(course, timeslot)[0]:
+            return b
+        engine.add(b)
+    return None
+
+
+def repair_schedule(courses, rooms, bookings, changes_logs, changes=None, time_grid=None, failed_bookings=None,
+                    cohorts=None):
+    """
+    Incremental re-scheduling after an edit: keeps the previous bookings in place and
+    only re-places the ones the change set affects, instead of a full auto_schedule_courses.
+
+    courses, rooms: the current (edited) data
+    bookings: the previous result; bookings are matched to the current data by course_id,
+      room_id and requested slot (start/end)
+    changes: (kind, id) pairs, see COURSE_CHANGES / ROOM_CHANGES. Only bookings of the named
+      courses and rooms are re-checked; None re-checks every booking.
+    failed_bookings: the previous failure messages. With a change set, slots of unchanged
+      courses that failed before keep their message instead of being retried.
+    cohorts: the COHORTS name the previous result was scheduled with
+
+    A re-checked booking stays where it is if its requested slot still exists, its room still
+    seats the course and its lecturer, cohort and room are free then. Otherwise, and for course slots
+    with no booking (new, moved, or failed before), the slot is placed as auto_schedule_courses
+    would; if that fails for a slot the change affects, one unaffected booking in the way may
+    be displaced to free the requested slot, as long as it can be re-placed itself.
+
+    Returns (bookings, failed_bookings, report).
+    """
+    started = time.perf_counter()
+    time_grid = time_grid or DEFAULT_TIME_GRID
+    if changes is None:
+        course_scope = room_scope = None
+    else:
+        changes = list(changes)
+        unknown = [kind for kind, _ in changes if kind not in COURSE_CHANGES + ROOM_CHANGES]
+        if unknown:
+            raise ValueError(f"Unknown change kind: {unknown[0]!r}")
+        course_scope = {key for kind, key in changes if kind in COURSE_CHANGES}
+        room_scope = {key for kind, key in changes if kind in ROOM_CHANGES}
+
+    engine = OccupancyBackend(courses, rooms, [], time_grid, cohorts=cohorts)
+    course_by_id = {course.course_id: course for course in courses}
+    room_by_id = {room.room_id: room for room in engine.rooms}
+    open_slots = {}  # (course_id, start, end) -> current TimeSlots without a booking yet
+    for course in courses:
+        for timeslot in course.time_slots:
+            open_slots.setdefault((course.course_id, timeslot.start, timeslot.end), []).append(timeslot)
+
+    def claim(booking):
+        requested = booking.requested or TimeSlot.from_minutes(booking.start, booking.end)
+        slots = open_slots.get((booking.course.course_id, requested.start, requested.end))
+        return slots.pop() if slots else None
+
+    # Unaffected bookings go back as they were, then affected ones where they still fit
+    unaffected, recheck = [], []
+    for b in bookings:
+        in_scope = course_scope is None or b.course.course_id in course_scope or b.room.room_id in room_scope
+        (recheck if in_scope else unaffected).append(b)
+    next_id = max((b.booking_id for b in bookings), default=0) + 1
+    kept = []
+    for b in unaffected:
+        course, room = course_by_id.get(b.course.course_id), room_by_id.get(b.room.room_id)
+        requested = claim(b) if course and room else None
+        if requested is not None:
+            kept.append(Booking(b.booking_id, room, course, b.start, b.end, requested))
+            engine.add(kept[-1])
+    fixed = set(kept)
+
+    removed = 0
+    dropped = []
+    for b in recheck:
+        course, room = course_by_id.get(b.course.course_id), room_by_id.get(b.room.room_id)
+        requested = claim(b) if course else None
+        if requested is None:
+            removed += 1  # slot (or course) is gone
+            continue
+        if (room and room.capacity >= course.num_students
+                and engine.can_place(course, b.start, b.end)
+                and engine.room_occupancy.is_free(room.room_id, b.start, b.end)):
+            engine.add(Booking(b.booking_id, room, course, b.start, b.end, requested))
+        else:
+            removed += 1
+            dropped.append((course, requested, True))
+
+    # Re-place the dropped slots, then everything else left open (new, or failed before). Only
+    # dropped slots and open slots of changed courses may displace an unaffected booking.
+    previous_failures = {}
+    if course_scope is not None:
+        for message in failed_bookings or ():
+            previous_failures.setdefault(failed_slot_key(message), []).append(message)
+    new_failed = []
+    queue = list(dropped)
+    for (course_id, _, _), slots in open_slots.items():
+        changed = course_scope is not None and course_id in course_scope
+        for timeslot in slots:
+            course = course_by_id[course_id]
+            same = None if changed else previous_failures.get(failed_slot_key(failed_slot_message(course, timeslot, "")))
+            if same:
+                new_failed.append(same.pop())
+            else:
+                queue.append((course, timeslot, changed))
+    queue.sort(key=lambda item: not item[2])
+    placed = displaced = 0
+    for course, timeslot, may_displace in queue:
+        booking, failure = place_course_slot(engine, course, timeslot, next_id, changes_logs)
+        if booking is None and may_displace:
+            victim = _displace(engine, course, timeslot, fixed)
+            if victim is not None:
+                logs = []
+                booking, _ = place_course_slot(engine, course, timeslot, next_id, logs)
+                rehomed, _ = place_course_slot(engine, victim.course, victim.requested, next_id + 1, logs)
+                if rehomed is None:
+                    # The displaced class would fail instead: put it back
+                    engine.remove(booking)
+                    engine.add(victim)
+                    booking = None
+                else:
+                    fixed.discard(victim)
+                    displaced += 1
+                    changes_logs.append(f"🔁 {victim.course.course_id}({victim.course.name}) displaced from {victim.day} {victim.start_time}-{victim.end_time} for {course.course_id}({course.name})")
+                    changes_logs.extend(logs)
+                    next_id += 1
+                    placed += 1
+        if booking is None:
+            new_failed.append(failure)
+        else:
+            next_id += 1
+            placed += 1
+
+    engine.bookings.sort(key=lambda b: b.booking_id)
+    report = {
+        "kept": len(engine.bookings) - placed,
+        "removed": removed,
+        "placed": placed,
+        "displaced": displaced,
+        "failed": len(new_failed),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    return engine.bookings, new_failed, report
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import uuid
+
+from django.core.cache import caches
+
+CACHE_ALIAS = "schedules"
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def inputs_digest(room_list, course_list, lecturer_names, time_grid, options):
+    """
+    sha256 of everything a run-algorithm result depends on: rooms, courses and their slots,
+    lecturer names (they appear in the response), the time grid and the solver options.
+    Lists are sorted so the digest doesn't depend on queryset order.
+    """
+    content = {
+        "rooms": sorted([r.room_id, r.name, r.capacity] for r in room_list),
+        "courses": sorted(
+            [str(c.course_id), c.name, c.level, c.num_students, c.lecturer_id, c.department,
+             [[ts.start, ts.end] for ts in c.time_slots]]
+            for c in course_list
+        ),
+        "lecturers": sorted(lecturer_names.items()),
+        "time_grid": [time_grid.days, time_grid.starts, time_grid.ends, time_grid.alternative_periods],
+        "options": sorted(options.items()),
+    }
+    encoded = json.dumps(content, separators=(",", ":"), default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _result_key(institution_id, digest):
+    return f"schedule-result:{institution_id}:{digest}"
+
+def _latest_key(institution_id):
+    return f"schedule-latest:{institution_id}"
+
+def _version_key(institution_id):
+    return f"schedule-version:{institution_id}"
+
+
+def get_result(institution_id, digest):
+    return get_cache().get(_result_key(institution_id, digest))
+
+def set_result(institution_id, digest, result):
+    """
+    Stores a result and remembers it as the institution's latest, so the next edit can drop it.
+    """
+    cache = get_cache()
+    cache.set(_result_key(institution_id, digest), result)
+    cache.set(_latest_key(institution_id), digest)
+
+
+def input_version(institution_id):
+    """
+    Token replaced on every edit of the institution's scheduling data (see invalidate). A random
+    token rather than a counter: after the entry is culled a counter would restart and match
+    versions already used for other inputs (e.g. snapshot pointers); a culled token is replaced
+    with a fresh one no older key can carry.
+    """
+    cache = get_cache()
+    version = cache.get(_version_key(institution_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(_version_key(institution_id), version, timeout=None):
+            version = cache.get(_version_key(institution_id), version)  # set by another process meanwhile
+    return version
+
+
+def invalidate(institution_id):
+    """
+    Called from the model signals: drops the institution's latest cached result and replaces its
+    input version. Entries for older inputs are unreachable once the data changes (the digest
+    differs) and age out through the cache's MAX_ENTRIES culling.
+
+    Edits that send no signals (QuerySet.update(), bulk_create, raw SQL) must call this
+    themselves, or runs keep reading the old snapshot for up to SCHEDULER_SNAPSHOT_MAX_AGE.
+    """
+    cache = get_cache()
+    digest = cache.get(_latest_key(institution_id))
+    if digest is not None:
+        cache.delete_many([_result_key(institution_id, digest), _latest_key(institution_id)])
+    cache.set(_version_key(institution_id), uuid.uuid4().hex, timeout=None)
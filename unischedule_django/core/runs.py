@@ -0,0 +1,322 @@
+import json
+import queue
+import threading
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Lecturer
+from .loader import load_institution, get_time_grid
+from .snapshot import load_input
+from .scheduler import auto_schedule_courses, SLOT_ORDERS, COHORTS, ROOM_ASSIGNMENTS, BACKENDS
+from .annealing import improve_schedule
+from .portfolio import portfolio_schedule
+from .exact import exact_schedule, search_size
+from .decompose import decomposed_schedule
+from .progress import not_done
+from .singleflight import SingleFlight
+from .stats import SchedulerStats
+from . import result_cache
+
+# Shared by the run-algorithm view and background scheduling jobs (core/jobs.py)
+
+MAX_IMPROVE_SECONDS = 30
+MAX_PORTFOLIO_RUNS = 64
+
+
+class InvalidRunInput(Exception):
+    """Bad run options or scheduling data; the message is shown to the user"""
+
+
+class NeedsBackgroundJob(Exception):
+    """The run is too large to answer within the request; it has to go through a job (core/jobs.py)"""
+
+
+def lecturer_names(inst):
+    return {l.id: l.name for l in Lecturer.objects.filter(institution=inst)}
+
+def serialize_bookings(bookings, inst, lecturer_lookup=None):
+    if lecturer_lookup is None:
+        lecturer_lookup = lecturer_names(inst)
+    return [
+        {
+            "course_id": b.course.course_id,
+            "course_name": b.course.name,
+            "lecturer": lecturer_lookup.get(b.course.lecturer_id, "Unknown"),
+            "room": b.room.name,
+            "room_id": b.room.room_id,
+            "day": b.day,
+            "start_time": b.start_time,
+            "end_time": b.end_time,
+            # The course's own slot; differs from day/start/end when the class was moved
+            "requested": {
+                "day": b.requested.day,
+                "start_time": b.requested.start_time,
+                "end_time": b.requested.end_time
+            } if b.requested else None
+        } for b in bookings
+    ]
+
+
+def parse_run_options(params):
+    """
+    Validated run options from query params (or a job's JSON body):
+    order=input|dsatur (course slot order; dsatur takes 2-3x as long, see auto_schedule_courses),
+    backend=python|numpy|intervals,
+    improve_seconds=<0-MAX_IMPROVE_SECONDS> (local-search time budget after the greedy pass),
+    runs=<0-MAX_PORTFOLIO_RUNS> (randomized greedy restarts in a process pool, best one kept),
+    solver=greedy|exact|parallel (exact: backtracking search for a timetable with every slot booked,
+    falling back to the greedy result when none is found within its limits; parallel: the greedy
+    pass split into independent parts solved in worker processes, see decompose.py),
+    cohorts=none|level|department (classes of the same level, or the same level and department,
+    never overlap; none by default),
+    room_assignment=greedy|matching (matching: rooms for the slots requested at the same time
+    are assigned together, see matching.py)
+    """
+    order = params.get("order", "input")
+    backend = params.get("backend", "python")
+    solver = params.get("solver", "greedy")
+    if order not in SLOT_ORDERS or backend not in BACKENDS or solver not in ("greedy", "exact", "parallel"):
+        raise InvalidRunInput("Unknown order, backend or solver.")
+    cohorts = params.get("cohorts", "none")
+    if cohorts != "none" and cohorts not in COHORTS:
+        raise InvalidRunInput("cohorts must be none, level or department.")
+    room_assignment = params.get("room_assignment", "greedy")
+    if room_assignment not in ROOM_ASSIGNMENTS:
+        raise InvalidRunInput("room_assignment must be greedy or matching.")
+    try:
+        improve_seconds = float(params.get("improve_seconds", 0))
+    except (TypeError, ValueError):
+        improve_seconds = -1
+    if not 0 <= improve_seconds <= MAX_IMPROVE_SECONDS:
+        raise InvalidRunInput(f"improve_seconds must be between 0 and {MAX_IMPROVE_SECONDS}.")
+    try:
+        runs = int(params.get("runs", 0))
+    except (TypeError, ValueError):
+        runs = -1
+    if not 0 <= runs <= MAX_PORTFOLIO_RUNS:
+        raise InvalidRunInput(f"runs must be between 0 and {MAX_PORTFOLIO_RUNS}.")
+    return {"order": order, "backend": backend, "solver": solver, "runs": runs, "improve_seconds": improve_seconds,
+            "cohorts": None if cohorts == "none" else cohorts, "room_assignment": room_assignment}
+
+
+def new_stats(params=None):
+    """
+    A SchedulerStats for a run when SCHEDULER_STATS is on or the request asks for it
+    (stats=1 / stats=true), else None: collection is off and costs nothing.
+    """
+    requested = params is not None and str(params.get("stats", "")).lower() in ("1", "true")
+    return SchedulerStats() if settings.SCHEDULER_STATS or requested else None
+
+
+def run_schedule(inst, options, progress=None, solver_progress=None, stats=None, max_exact_size=None):
+    """
+    Loads the institution's data, solves with the given parse_run_options() options and
+    returns (result, cached): the run-algorithm response body and whether it came from the
+    result cache.
+
+    Results are cached per institution under a hash of the inputs and options; edits to
+    rooms, courses, slots, lecturers or the time grid invalidate the cache (core/signals.py).
+    progress: optional callable, called with the name of each phase as it starts
+    ("loading", "solving", "improving", "serializing").
+    solver_progress: optional callable for the solver's and the improvement's progress events
+    (core/progress.py); the last one has done True. A cache hit sends a single done event with
+    the cached result's counts, after the same "solving" phase.
+    stats: optional SchedulerStats (see new_stats). Phases are timed and the search counters of
+    the solver's greedy passes collected; the stats are logged and added to the result as
+    "stats" (not cached: a cache hit reports {"cached": true} and the load time only).
+    max_exact_size: with solver=exact, raises NeedsBackgroundJob instead of solving when the
+    search (exact.search_size) is larger; cached results are still returned. None: no limit.
+    """
+    progress = progress or (lambda phase: None)
+    timer = stats.timer if stats is not None else (lambda phase: nullcontext())
+    progress("loading")
+    with timer("load"):
+        snapshot = None
+        try:
+            if settings.SCHEDULER_SNAPSHOT_DIR:
+                loaded, snapshot = load_input(inst)
+            else:
+                loaded = load_institution(inst)
+        except ValueError as e:
+            raise InvalidRunInput(f"Invalid time slot: {e}")
+        room_list, course_list, lecturer_lookup, time_grid = loaded
+
+        digest = result_cache.inputs_digest(room_list, course_list, lecturer_lookup, time_grid, options)
+        cached = result_cache.get_result(inst.id, digest)
+    if cached is not None:
+        progress("solving")
+        if solver_progress:
+            solver_progress(_cached_event(cached))
+        progress("serializing")
+        return _with_stats(cached, stats, inst, options, True), True
+
+    # absent from jobs queued before the options existed
+    cohorts, room_assignment = options.get("cohorts"), options.get("room_assignment", "greedy")
+    if (options["solver"] == "exact" and max_exact_size is not None
+            and search_size(course_list, room_list, time_grid) > max_exact_size):
+        raise NeedsBackgroundJob("This exact search is too large to run within the request.")
+
+    progress("solving")
+    order, backend = options["order"], options["backend"]
+    # Only the last pass of the run ends with a done event
+    solve_progress = not_done(solver_progress) if options["improve_seconds"] else solver_progress
+    logs = []
+    portfolio = exact = parallel = None
+    with timer("solve"):
+        if options["solver"] == "exact":
+            bookings, failed, exact = exact_schedule(course_list, room_list, logs, time_grid=time_grid,
+                                                     time_limit=settings.SCHEDULER_EXACT_TIME_LIMIT,
+                                                     backend=backend, order=order, cohorts=cohorts,
+                                                     room_assignment=room_assignment, progress=solve_progress,
+                                                     stats=stats)
+        elif options["solver"] == "parallel":
+            bookings, failed, parallel = decomposed_schedule(course_list, room_list, logs,
+                                                             parts=settings.SCHEDULER_PARALLEL_WORKERS,
+                                                             backend=backend, time_grid=time_grid, order=order,
+                                                             cohorts=cohorts, room_assignment=room_assignment,
+                                                             snapshot=snapshot, progress=solve_progress, stats=stats)
+        elif options["runs"]:
+            bookings, failed, portfolio = portfolio_schedule(course_list, room_list, logs, runs=options["runs"],
+                                                             workers=settings.SCHEDULER_PORTFOLIO_WORKERS,
+                                                             time_limit=settings.SCHEDULER_PORTFOLIO_TIME_LIMIT,
+                                                             backend=backend, time_grid=time_grid, order=order,
+                                                             snapshot=snapshot, cohorts=cohorts,
+                                                             room_assignment=room_assignment, progress=solve_progress,
+                                                             stats=stats)
+        else:
+            bookings, failed = auto_schedule_courses(course_list, room_list, logs, backend=backend,
+                                                     time_grid=time_grid, order=order, progress=solve_progress,
+                                                     stats=stats, cohorts=cohorts, room_assignment=room_assignment)
+    improvement = None
+    if options["improve_seconds"]:
+        progress("improving")
+        with timer("improve"):
+            bookings, failed, improvement = improve_schedule(course_list, room_list, bookings, failed, logs,
+                                                             time_budget=options["improve_seconds"], time_grid=time_grid,
+                                                             cohorts=cohorts, progress=solver_progress)
+
+    progress("serializing")
+    with timer("serialize"):
+        result = {
+            "bookings": serialize_bookings(bookings, inst, lecturer_lookup),
+            "failed_bookings": failed,
+            "logs": logs
+        }
+    if exact:
+        result["exact"] = exact
+    if portfolio:
+        result["portfolio"] = portfolio
+    if parallel:
+        result["parallel"] = parallel
+    if improvement:
+        result["improvement"] = improvement
+    result_cache.set_result(inst.id, digest, result)
+    return _with_stats(result, stats, inst, options, False), False
+
+
+def _cached_event(result):
+    """The done progress event for a cached result, from its serialized bookings"""
+    bookings, failed = result["bookings"], result["failed_bookings"]
+    return {
+        "processed": len(bookings) + len(failed),
+        "total": len(bookings) + len(failed),
+        "placed": len(bookings),
+        "fallbacks": sum(b["requested"] is not None and b["requested"] != {key: b[key] for key in b["requested"]}
+                         for b in bookings),
+        "failed": len(failed),
+        "bookings": [],
+        "done": True,
+    }
+
+
+def _with_stats(result, stats, inst, options, cached):
+    if stats is None:
+        return result
+    stats.log(counters=not cached, institution=inst.id, options=options, cached=cached, bookings=len(result["bookings"]),
+              failed=len(result["failed_bookings"]))
+    if cached:
+        return {**result, "stats": {"cached": True, **stats.as_dict(counters=False)}}
+    return {**result, "stats": stats.as_dict()}
+
+
+_runs_in_flight = SingleFlight()
+
+def run_schedule_coalesced(inst, options, stats=None, max_exact_size=None):
+    """
+    run_schedule, with concurrent calls for the same institution, input version and options
+    sharing one computation (e.g. several admins opening the schedule page at once).
+    Returns (result, cached, coalesced), coalesced being True for callers that waited on
+    another request's run. Per server process; later requests in other processes are
+    served by the result cache. Runs collecting stats only share with each other (and report
+    the leader's stats).
+    """
+    key = (inst.id, result_cache.input_version(inst.id), tuple(sorted(options.items())), stats is not None)
+    (result, cached), coalesced = _runs_in_flight.do(key, lambda: run_schedule(inst, options, stats=stats,
+                                                                              max_exact_size=max_exact_size))
+    return result, cached, coalesced
+
+
+def sse_event(name, data):
+    """One Server-Sent Events message"""
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class _StreamClosed(Exception):
+    pass
+
+
+def stream_schedule(inst, options, keepalive=15, stats=None):
+    """
+    run_schedule as a Server-Sent Events stream (a generator of message strings):
+    - "phase": {"phase": ...} as each phase starts
+    - "progress": solver progress (see core/progress.py), with the bookings placed since the
+      previous event serialized like the response's, in day and time order; the last one has
+      done True, on cache hits too
+    - "result": the run-algorithm response body, or "error": {"error": ...}, then the stream ends
+    The run happens in a worker thread; a comment line is sent every keepalive seconds
+    without events so proxies keep the connection open. Streamed runs are not coalesced,
+    each one needs its own progress. If the client goes away the run stops at its next
+    progress update.
+    """
+    events = queue.Queue()
+    closed = threading.Event()
+    lecturer_lookup = lecturer_names(inst)
+
+    def emit(name, data):
+        if closed.is_set():
+            raise _StreamClosed()
+        events.put(sse_event(name, data))
+
+    def solver_progress(event):
+        emit("progress", {**event, "bookings": serialize_bookings(event["bookings"], inst, lecturer_lookup)})
+
+    def work():
+        try:
+            result, cached = run_schedule(inst, options, lambda phase: emit("phase", {"phase": phase}),
+                                          solver_progress, stats)
+            events.put(sse_event("result", {**result, "cached": cached}))
+        except _StreamClosed:
+            pass
+        except InvalidRunInput as e:
+            events.put(sse_event("error", {"error": str(e)}))
+        except Exception as e:
+            events.put(sse_event("error", {"error": f"Scheduling error: {e}"}))
+        finally:
+            events.put(None)
+            connection.close()  # the worker thread's own DB connection
+
+    threading.Thread(target=work, name="schedule-stream", daemon=True).start()
+    try:
+        while True:
+            try:
+                message = events.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        closed.set()
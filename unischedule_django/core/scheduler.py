@@ -1,38 +1,73 @@
-from .algoclass import Room, Course, TimeSlot, Booking
+from collections import Counter
+
+from .algoclass import Room, RoomCatalogue, Course, TimeSlot, Booking, DEFAULT_TIME_GRID
+from .occupancy import Occupancy, IntervalOccupancy
+from .ordering import InputOrder, DSaturOrder
+from .progress import ProgressReporter
+from .matching import match_rooms
 
 def times_overlap(start1, end1, start2, end2):
     """
-    Given times in HH:MM format, returns True if [start1, end1) overlaps with [start2, end2).
+    Given times in minutes since Monday 00:00, returns True if [start1, end1) overlaps with [start2, end2).
     """
-    # Simplistic string comparison method if they're zero-padded HH:MM:
     return not (end1 <= start2 or start1 >= end2)
 
+# Student cohorts whose classes must not overlap, for auto_schedule_courses(cohorts=...):
+# name -> the course's cohort key
+COHORTS = {
+    "level": lambda course: course.level,                             # every course of a level
+    "department": lambda course: (course.department, course.level),  # a level within a department
+}
 
-def find_free_room(rooms, bookings, course, timeslot):
+def cohort_key_function(cohorts):
     """
-    Returns the first available room for the given course and timeslot.
-    If no room is found, it will return an alternative available time slot.
+    The course -> cohort key function for a COHORTS name, or None when cohorts is None (no constraint)
     """
-    
-    for room in rooms:
-        if room.capacity < course.num_students:
-            continue  # Skip rooms that are too small
+    if cohorts is None:
+        return None
+    if cohorts not in COHORTS:
+        raise ValueError(f"Unknown cohorts: {cohorts!r}")
+    return COHORTS[cohorts]
+
 
-        conflict_found = False
-        for b in bookings:
-            if b.room.room_id == room.room_id and b.day == timeslot.day:
-                if times_overlap(timeslot.start_time, timeslot.end_time, b.start_time, b.end_time):
-                    conflict_found = True
-                    break  # Stop checking if a conflict is found
+def find_free_room(rooms, bookings, course, timeslot, room_occupancy=None, stats=None):
+    """
+    Returns the smallest available room that can seat the course at the given timeslot,
+    so big halls stay free for big courses.
+    If no room is found, returns None and the reason.
+
+    rooms: a RoomCatalogue (a plain list is sorted into one on each call)
+    room_occupancy: Occupancy keyed by room_id for `bookings`. Built from the
+    bookings when not given, so pass it in from hot loops.
+    stats: optional SchedulerStats to count the call and the rooms examined
+    """
+    if not isinstance(rooms, RoomCatalogue):
+        rooms = RoomCatalogue(rooms)
+    if room_occupancy is None:
+        room_occupancy = Occupancy.from_bookings(bookings, key=lambda b: b.room.room_id)
 
-        if not conflict_found:
-            return room, None  # Found a suitable room
-        
-    if all(room.capacity < course.num_students for room in rooms):
-        return None, f"No room that can support the required capacity of {course.num_students}. Largest room available: {max(room.capacity for room in rooms)}"  # No room is available
+    room = _smallest_free_room(rooms, course, timeslot.start, timeslot.end, room_occupancy, stats)
+    if room:
+        return room, None  # Found a suitable room
+
+    if rooms.largest_capacity < course.num_students:
+        return None, f"No room that can support the required capacity of {course.num_students}. Largest room available: {rooms.largest_capacity}"  # No room is available
     return None, f"No room unavailable on {timeslot.day} at ({timeslot.start_time} - {timeslot.end_time})"
 
-def find_next_available_time_slot(course, rooms, bookings, original_timeslot):
+def _smallest_free_room(rooms, course, start, end, room_occupancy, stats=None):
+    """
+    find_free_room on minutes, without the failure reason (no TimeSlot needed)
+    """
+    if stats is not None:
+        stats.find_free_room_calls += 1
+    for room in rooms.fitting(course.num_students):
+        if stats is not None:
+            stats.rooms_examined += 1
+        if room_occupancy.is_free(room.room_id, start, end):
+            return room
+    return None
+
+def find_next_available_time_slot(course, rooms, bookings, original_timeslot, room_occupancy=None, lecturer_occupancy=None, time_grid=DEFAULT_TIME_GRID, stats=None, cohorts=None, cohort_occupancy=None, start_counts=None):
     """
     Finds the **best possible** alternative time slot for a course when its original time slot is full.
     Prioritizes:
@@ -42,143 +77,327 @@ def find_next_available_time_slot(course, rooms, bookings, original_timeslot):
     Ensures:
     - **Least number of conflicts**
     - **Lecturer is available**
+    - **The course's cohort is free** (with cohorts)
     - **A suitable room is available**
-    """
-
-    possible_times = ["08:00", "09:00", "10:00", "11:00", "12:00",
-                      "13:00", "14:00", "15:00", "16:00", "17:00"]
-    week_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
 
-    # Get the index of the current time and day
-    start_index = possible_times.index(original_timeslot.start_time)
-    current_day_index = week_days.index(original_timeslot.day)
+    Candidate slots come from time_grid's precomputed table (TimeGrid.candidates).
+    stats: optional SchedulerStats to count the search, its candidates and the rooms examined
+    cohorts: a COHORTS name; the course's cohort must have no class overlapping the slot
+    cohort_occupancy: Occupancy keyed by cohort for `bookings`, built from them when not given
+    start_counts: Counter of `bookings` by start minute (the conflict count of a candidate),
+    built from them when not given
+    """
+    if not isinstance(rooms, RoomCatalogue):
+        rooms = RoomCatalogue(rooms)
+    if room_occupancy is None:
+        room_occupancy = Occupancy.from_bookings(bookings, key=lambda b: b.room.room_id)
+    if lecturer_occupancy is None:
+        lecturer_occupancy = Occupancy.from_bookings(bookings, key=lambda b: b.course.lecturer_id)
+    cohort_key = cohort_key_function(cohorts)
+    if cohort_key is not None:
+        cohort = cohort_key(course)
+        if cohort_occupancy is None:
+            cohort_occupancy = Occupancy.from_bookings(bookings, key=lambda b: cohort_key(b.course))
+    if start_counts is None:
+        start_counts = Counter(b.start for b in bookings)
+    if stats is not None:
+        stats.next_slot_searches += 1
 
     # **Store potential slots with their conflict count**
-    best_slot = None
+    best_slot = None  # (start, end); the TimeSlot is only built for the winner
     best_room = None
     min_conflicts = float("inf")
 
-    # **Step 1: Check same day earlier slots**
-    for new_start_time in reversed(possible_times[:start_index]):
-        new_end_time = possible_times[possible_times.index(new_start_time) + 2] if possible_times.index(new_start_time) + 2 < len(possible_times) else "18:00"
-        new_timeslot = TimeSlot(original_timeslot.day, new_start_time, new_end_time)
+    for new_start, new_end in time_grid.candidates(original_timeslot.start, original_timeslot.end):
+        if stats is not None:
+            stats.candidates_evaluated += 1
+        # Check lecturer availability + find room
+        if not is_lecturer_available(course.lecturer_id, bookings, new_start, new_end, lecturer_occupancy):
+            continue
+        if cohort_key is not None and not cohort_occupancy.is_free(cohort, new_start, new_end):
+            continue
+        room = _smallest_free_room(rooms, course, new_start, new_end, room_occupancy, stats)
+        if not room:
+            continue
 
-        # Find room + check lecturer availability
-        room, reason = find_free_room(rooms, bookings, course, new_timeslot)
-        conflicts = sum(1 for b in bookings if b.day == original_timeslot.day and b.start_time == new_start_time)
+        conflicts = start_counts[new_start]
+        if conflicts < min_conflicts:  # Pick the slot with the fewest conflicts
+            min_conflicts = conflicts
+            best_slot = (new_start, new_end)
+            best_room = room
 
-        if room and is_lecturer_available(course.lecturer_id, bookings, original_timeslot.day, new_start_time, new_end_time):
-            if conflicts < min_conflicts:  # Pick the slot with the fewest conflicts
-                min_conflicts = conflicts
-                best_slot = new_timeslot
-                best_room = room
+    if best_slot is None:
+        return None, None
+    return best_room, TimeSlot.from_minutes(*best_slot)  # Returns the best available time slot
 
-    # **Step 2: Check same day later slots**
-    for new_start_time in possible_times[start_index + 1:]:
-        new_end_time = possible_times[possible_times.index(new_start_time) + 2] if possible_times.index(new_start_time) + 2 < len(possible_times) else "18:00"
-        new_timeslot = TimeSlot(original_timeslot.day, new_start_time, new_end_time)
+def is_lecturer_available(lecturer_id, bookings, start, end, lecturer_occupancy=None):
+    """
+    Checks if a lecturer is already assigned to another class at the same time.
+    Returns True if available, False if they are already teaching another course.
 
-        # Find room + check lecturer availability
-        room, reason = find_free_room(rooms, bookings, course, new_timeslot)
-        conflicts = sum(1 for b in bookings if b.day == original_timeslot.day and b.start_time == new_start_time)
+    start/end: minutes since Monday 00:00
+    lecturer_occupancy: Occupancy keyed by lecturer_id for `bookings`. Without it
+    the bookings are scanned as before.
+    """
+    if lecturer_occupancy is not None:
+        return lecturer_occupancy.is_free(lecturer_id, start, end)
 
-        if room and is_lecturer_available(course.lecturer_id, bookings, original_timeslot.day, new_start_time, new_end_time):
-            if conflicts < min_conflicts:
-                min_conflicts = conflicts
-                best_slot = new_timeslot
-                best_room = room
+    for booking in bookings:
+        if booking.course.lecturer_id == lecturer_id:
+            if times_overlap(booking.start, booking.end, start, end):
+                return False  # Conflict found
+    return True  # Lecturer is available
+
+class OccupancyBackend:
+    """
+    Default engine state for auto_schedule_courses: the bookings list plus bitmask
+    Occupancy indexes for rooms and lecturers (and cohorts), kept in step by add().
+    stats: optional SchedulerStats, counted by the room and alternative-slot searches
+    cohorts: optional COHORTS name; a cohort's classes then can't overlap
+    """
+
+    occupancy_class = Occupancy
+
+    def __init__(self, courses, rooms, bookings, time_grid=DEFAULT_TIME_GRID, stats=None, cohorts=None):
+        self.rooms = RoomCatalogue(rooms)  # capacity-sorted, for best-fit lookups
+        self.bookings = bookings
+        self.time_grid = time_grid
+        self.stats = stats
+        self.room_occupancy = self.occupancy_class()  # booked time per room_id
+        self.lecturer_occupancy = self.occupancy_class()  # booked time per lecturer_id
+        self.cohorts = cohorts
+        self.cohort_key = cohort_key_function(cohorts)
+        self.cohort_occupancy = self.occupancy_class()  # booked time per cohort
+        self.start_counts = Counter()  # bookings starting at each minute
+
+    def is_lecturer_available(self, course, timeslot):
+        return is_lecturer_available(course.lecturer_id, self.bookings, timeslot.start, timeslot.end, self.lecturer_occupancy)
 
-    # **Step 3: If no slots on the same day, check other days**
-    for new_day in week_days[current_day_index + 1:] + week_days[:current_day_index]:
-        for new_start_time in possible_times:
-            new_end_time = possible_times[possible_times.index(new_start_time) + 2] if possible_times.index(new_start_time) + 2 < len(possible_times) else "18:00"
-            new_timeslot = TimeSlot(new_day, new_start_time, new_end_time)
+    def is_cohort_available(self, course, timeslot):
+        return self.cohort_key is None or self.cohort_occupancy.is_free(self.cohort_key(course), timeslot.start, timeslot.end)
 
-            # Find room + check lecturer availability
-            room, reason = find_free_room(rooms, bookings, course, new_timeslot)
-            conflicts = sum(1 for b in bookings if b.day == new_day and b.start_time == new_start_time)
+    def find_free_room(self, course, timeslot):
+        return find_free_room(self.rooms, self.bookings, course, timeslot, self.room_occupancy, self.stats)
 
-            if room and is_lecturer_available(course.lecturer_id, bookings, new_day, new_start_time, new_end_time):
-                if conflicts < min_conflicts:
-                    min_conflicts = conflicts
-                    best_slot = new_timeslot
-                    best_room = room
+    def find_next_available_time_slot(self, course, timeslot):
+        return find_next_available_time_slot(course, self.rooms, self.bookings, timeslot, self.room_occupancy, self.lecturer_occupancy, self.time_grid, self.stats, self.cohorts, self.cohort_occupancy, self.start_counts)
 
-    return best_room, best_slot  # Returns the best available time slot
+    def add(self, booking):
+        self.bookings.append(booking)
+        self.start_counts[booking.start] += 1
+        self.occupy(booking)
 
-def is_lecturer_available(lecturer_id, bookings, day, start_time, end_time):
+    def remove(self, booking):
+        self.bookings.remove(booking)
+        self.start_counts[booking.start] -= 1
+        self.release(booking)
+
+    # Index-only helpers for callers that keep their own collection of bookings (e.g. local search)
+
+    def occupy(self, booking):
+        self.room_occupancy.add(booking.room.room_id, booking.start, booking.end)
+        self.lecturer_occupancy.add(booking.course.lecturer_id, booking.start, booking.end)
+        if self.cohort_key is not None:
+            self.cohort_occupancy.add(self.cohort_key(booking.course), booking.start, booking.end)
+
+    def release(self, booking):
+        self.room_occupancy.remove(booking.room.room_id, booking.start, booking.end)
+        self.lecturer_occupancy.remove(booking.course.lecturer_id, booking.start, booking.end)
+        if self.cohort_key is not None:
+            self.cohort_occupancy.remove(self.cohort_key(booking.course), booking.start, booking.end)
+
+    def can_place(self, course, start, end):
+        """
+        True if the course's lecturer (and cohort, with cohorts) is free for [start, end)
+        """
+        return (self.lecturer_occupancy.is_free(course.lecturer_id, start, end)
+                and (self.cohort_key is None or self.cohort_occupancy.is_free(self.cohort_key(course), start, end)))
+
+    def free_room(self, course, start, end):
+        """
+        Smallest free room that seats the course for [start, end), or None (no reason string)
+        """
+        for room in self.rooms.fitting(course.num_students):
+            if self.room_occupancy.is_free(room.room_id, start, end):
+                return room
+        return None
+
+    def free_rooms(self, num_students, start, end):
+        """
+        Every free room that seats num_students for [start, end), smallest first
+        """
+        return [room for room in self.rooms.fitting(num_students) if self.room_occupancy.is_free(room.room_id, start, end)]
+
+class IntervalBackend(OccupancyBackend):
     """
-    Checks if a lecturer is already assigned to another class at the same time.
-    Returns True if available, False if they are already teaching another course.
+    OccupancyBackend on sorted-interval indexes (IntervalOccupancy) instead of bitmasks: the
+    same results, with every conflict check O(log n) in the bookings of that room, lecturer
+    or cohort, for timetables where bitmasks spanning each day's minutes aren't a good fit.
     """
-    for booking in bookings:
-        if booking.course.lecturer_id == lecturer_id and booking.day == day:
-            if times_overlap(booking.start_time, booking.end_time, start_time, end_time):
-                return False  # Conflict found
-    return True  # Lecturer is available
 
-def auto_schedule_courses(courses, rooms, changes_logs):
-    bookings = []
-    failed_bookings = []  # Store failed scheduling attempts
-    booking_id_counter = 1
+    occupancy_class = IntervalOccupancy
 
-    for course in courses:
-        for timeslot in course.time_slots:
-            # ✅ Check if the lecturer is available
-            if not is_lecturer_available(course.lecturer_id, bookings, timeslot.day, timeslot.start_time, timeslot.end_time):
-                alt_room, alt_timeslot = find_next_available_time_slot(course, rooms, bookings, timeslot)
+BACKENDS = ("python", "numpy", "intervals")
+
+def get_backend(name):
+    """
+    Returns the engine state class behind auto_schedule_courses(backend=name):
+    - "python": bitmask indexes (default)
+    - "numpy": room/lecturer occupancy arrays, needs numpy installed
+    - "intervals": sorted-interval indexes
+    """
+    if name == "python":
+        return OccupancyBackend
+    if name == "intervals":
+        return IntervalBackend
+    if name == "numpy":
+        from .numpy_backend import NumpyBackend
+        return NumpyBackend
+    raise ValueError(f"Unknown scheduler backend: {name!r}")
+
+def failed_slot_message(course, timeslot, reason):
+    return f"❌ {course.name} on {timeslot.day} {timeslot.start_time}-{timeslot.end_time} failed due to {reason}"
+
+def failed_slot_key(message):
+    """
+    The course/slot part of a failed_slot_message, without the reason
+    """
+    return message.rpartition(" failed due to ")[0]
+
+def place_course_slot(engine, course, timeslot, booking_id, changes_logs):
+    """
+    One greedy step: books the course slot as requested, or at the next available
+    alternative when its lecturer, its cohort (with cohorts) or every fitting room is busy then.
+    Returns (booking, None), with the booking added to the engine, or (None, failure message).
+    """
+    # ✅ Check if the lecturer and the students are available
+    conflict = None
+    if not engine.is_lecturer_available(course, timeslot):
+        conflict = "Lecturer conflict"
+    elif not engine.is_cohort_available(course, timeslot):
+        conflict = "Cohort conflict"
+    if conflict:
+        alt_room, alt_timeslot = engine.find_next_available_time_slot(course, timeslot)
 
-                if alt_room and alt_timeslot:
-                    changes_logs.append(
-                            f"""⚠️ {course.name} ({course.course_id})\n
+        if alt_room and alt_timeslot:
+            changes_logs.append(
+                    f"""⚠️ {course.name} ({course.course_id})\n
                                ⏱ Originally Scheduled: {timeslot.day}, {timeslot.start_time}–{timeslot.end_time}\n
                                🔁 Rescheduled to: {alt_timeslot.day}, {alt_timeslot.start_time}–{alt_timeslot.end_time}\n
-                               📍 Reason: Lecturer conflict\n
+                               📍 Reason: {conflict}\n
                                """
-                            )
-                    new_booking = Booking(
-                        booking_id=booking_id_counter,
-                        room=alt_room,
-                        course=course,
-                        day=alt_timeslot.day,
-                        start_time=alt_timeslot.start_time,
-                        end_time=alt_timeslot.end_time
                     )
-                    bookings.append(new_booking)
-                    booking_id_counter += 1
-                else:
-                    failed_bookings.append(f"❌ {course.name} on {timeslot.day} {timeslot.start_time}-{timeslot.end_time} failed due to Lecturer conflict")
-                continue
+            new_booking = Booking(
+                booking_id=booking_id,
+                room=alt_room,
+                course=course,
+                start=alt_timeslot.start,
+                end=alt_timeslot.end,
+                requested=timeslot
+            )
+            engine.add(new_booking)
+            return new_booking, None
+        return None, failed_slot_message(course, timeslot, conflict)
+
+    # ✅ Find free room
+    free_room, reason = engine.find_free_room(course, timeslot)
+    if free_room:
+        new_booking = Booking(
+            booking_id=booking_id,
+            room=free_room,
+            course=course,
+            start=timeslot.start,
+            end=timeslot.end,
+            requested=timeslot
+        )
+        engine.add(new_booking)
+        return new_booking, None
+    else:
+        alt_room, alt_timeslot = engine.find_next_available_time_slot(course, timeslot)
+
+        if alt_room and alt_timeslot:
+            changes_logs.append(f"⚠️ {course.course_id}({course.name}) moved to {alt_timeslot.day} {alt_timeslot.start_time}-{alt_timeslot.end_time} due to {reason}")
+            new_booking = Booking(
+                booking_id=booking_id,
+                room=alt_room,
+                course=course,
+                start=alt_timeslot.start,
+                end=alt_timeslot.end,
+                requested=timeslot
+            )
+            engine.add(new_booking)
+            return new_booking, None
+        return None, failed_slot_message(course, timeslot, reason)
+
+ROOM_ASSIGNMENTS = ("greedy", "matching")
+
+SLOT_ORDERS = {
+    "input": InputOrder,    # course by course, as given
+    "dsatur": DSaturOrder,  # most constrained course slot first
+}
+
+def auto_schedule_courses(courses, rooms, changes_logs, backend="python", time_grid=None, order="input", seed=None,
+                          progress=None, stats=None, cohorts=None, room_assignment="greedy"):
+    """
+    time_grid: the institution's TimeGrid; alternatives are searched on the default
+    Monday-Friday 08:00-18:00 hourly grid when not given.
+    order: "input" or "dsatur", see SLOT_ORDERS. "dsatur" costs about 2-3x the time of "input" on
+    large institutions (2.2-3.0 s against 0.5-0.9 s at 5,000 slots): every booking re-ranks the
+    pending slots it overlaps (DSaturOrder.placed)
+    seed: randomizes the slot order (shuffled input / random DSatur tie-breaks), same seed same result
+    progress: optional callable receiving batched, rate-limited progress events (see ProgressReporter)
+    stats: optional SchedulerStats collecting search counters (core/stats.py)
+    cohorts: None (no student constraint), or a COHORTS name: classes of the same cohort are never
+    booked at overlapping times, checked against a per-cohort occupancy index like lecturers
+    room_assignment: "greedy" (each slot takes the smallest free room that seats it, in slot
+    order) or "matching": when the order reaches a requested time, the rooms for every slot
+    requested then are assigned at once (matching.match_rooms), the rest as with "greedy"
+    """
+    if room_assignment not in ROOM_ASSIGNMENTS:
+        raise ValueError(f"Unknown room assignment: {room_assignment!r}")
+    bookings = []
+    failed_bookings = []  # Store failed scheduling attempts
+    booking_id_counter = 1
+    engine = get_backend(backend)(courses, rooms, bookings, time_grid or DEFAULT_TIME_GRID, stats, cohorts)
+    slot_order = SLOT_ORDERS[order](courses, engine.rooms, seed, engine.cohort_key)
+    reporter = ProgressReporter(progress, sum(len(c.time_slots) for c in courses)) if progress else None
+
+    same_time = {}  # (start, end) -> course slots requested then, with "matching"
+    if room_assignment == "matching":
+        for course in courses:
+            for timeslot in course.time_slots:
+                same_time.setdefault((timeslot.start, timeslot.end), []).append((course, timeslot))
+    matched = set()  # ids of the TimeSlots booked by a matching
 
-            # ✅ Find free room
-            free_room, reason = find_free_room(rooms, bookings, course, timeslot)
-            if free_room:
-                new_booking = Booking(
-                    booking_id=booking_id_counter,
-                    room=free_room,
-                    course=course,
-                    day=timeslot.day,
-                    start_time=timeslot.start_time,
-                    end_time=timeslot.end_time
-                )
-                bookings.append(new_booking)
+    for course, timeslot in slot_order:
+        if id(timeslot) in matched:
+            continue
+        requests = same_time.pop((timeslot.start, timeslot.end), None)
+        if requests and len(requests) > 1:
+            for other_course, other_timeslot, room in match_rooms(engine, requests):
+                new_booking = Booking(booking_id=booking_id_counter, room=room, course=other_course,
+                                      start=other_timeslot.start, end=other_timeslot.end, requested=other_timeslot)
+                engine.add(new_booking)
+                matched.add(id(other_timeslot))
+                slot_order.placed(new_booking)
                 booking_id_counter += 1
-            else:
-                alt_room, alt_timeslot = find_next_available_time_slot(course, rooms, bookings, timeslot)
-
-                if alt_room and alt_timeslot:
-                    changes_logs.append(f"⚠️ {course.course_id}({course.name}) moved to {alt_timeslot.day} {alt_timeslot.start_time}-{alt_timeslot.end_time} due to {reason}")
-                    new_booking = Booking(
-                        booking_id=booking_id_counter,
-                        room=alt_room,
-                        course=course,
-                        day=alt_timeslot.day,
-                        start_time=alt_timeslot.start_time,
-                        end_time=alt_timeslot.end_time
-                    )
-                    bookings.append(new_booking)
-                    booking_id_counter += 1
-                else:
-                    failed_bookings.append(f"❌ {course.name} on {timeslot.day} {timeslot.start_time}-{timeslot.end_time} failed due to {reason}")
+                if reporter:
+                    reporter.booked(new_booking)
+            if id(timeslot) in matched:
+                continue
+
+        new_booking, failure = place_course_slot(engine, course, timeslot, booking_id_counter, changes_logs)
+        if new_booking:
+            slot_order.placed(new_booking)
+            booking_id_counter += 1
+            if reporter:
+                reporter.booked(new_booking)
+        else:
+            failed_bookings.append(failure)
+            if reporter:
+                reporter.failure()
+
+    if reporter:
+        reporter.flush()
 
     return bookings, failed_bookings
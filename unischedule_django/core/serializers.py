@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Lecturer, Room, Course, TimeSlot
+from .models import Lecturer, Room, Course, TimeSlot, TimeGrid, SchedulingJob
+from .algoclass import TimeGrid as AlgoTimeGrid
 
 class LecturerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,3 +23,25 @@ class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         exclude = ['institution']
+
+class TimeGridSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TimeGrid
+        exclude = ['institution']
+
+    def validate(self, attrs):
+        current = self.instance or TimeGrid()
+        values = {name: attrs.get(name, getattr(current, name)) for name in
+                  ("days", "period_minutes", "opening_time", "closing_time", "breaks", "alternative_periods")}
+        try:
+            grid = AlgoTimeGrid(**values)
+        except (ValueError, TypeError) as e:
+            raise serializers.ValidationError(f"Invalid time grid: {e}")
+        if not grid.starts:
+            raise serializers.ValidationError("Invalid time grid: no period fits between opening and closing time.")
+        return attrs
+
+class SchedulingJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SchedulingJob
+        exclude = ['institution', 'result']
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Lecturer, Room, Course, TimeSlot, TimeGrid
+from . import result_cache
+
+
+@receiver([post_save, post_delete], sender=Lecturer)
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=TimeSlot)
+@receiver([post_save, post_delete], sender=TimeGrid)
+def invalidate_schedule_cache(sender, instance, **kwargs):
+    # 🔄 Scheduling inputs changed: drop the institution's cached run-algorithm result.
+    # Bulk edits (QuerySet.update(), bulk_create, raw SQL) skip these signals and must call
+    # result_cache.invalidate(institution_id) themselves.
+    result_cache.invalidate(instance.institution_id)
@@ -0,0 +1,202 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .algoclass import Room, Course, TimeSlot, TimeGrid, SchedulingInput
+
+# Columnar snapshots of an institution's scheduling inputs (algoclass.SchedulingInput).
+#
+# Fixed little-endian layout:
+#   header    magic, format version, sha256 input digest, section sizes (HEADER)
+#   int32     rooms:     room_id, name*, capacity                                 (3 per room)
+#             courses:   course_id*, name*, level, num_students, lecturer_id, department*,
+#                        end of the course's slots in the slot columns            (7 per course)
+#             slots:     start, end (minutes since Monday 00:00)                  (2 per slot)
+#             lecturers: lecturer_id, name*                                       (2 per lecturer)
+#             strings:   offsets into the string bytes                            (strings + 1)
+#   bytes     utf-8 string table, then the time grid spec as JSON
+# (* = index into the string table, -1 for None)
+#
+# Files are named by institution and input digest, so a file never changes once written and
+# doubles as an on-disk cache of the inputs; read_snapshot() memory-maps it.
+# Reading and writing files needs no Django (process-pool workers, benchmarks); the
+# per-institution helpers at the bottom do.
+
+MAGIC = b"USNAP\0"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<6sH32s7I")
+
+
+def input_digest(loaded):
+    """sha256 (hex) of a SchedulingInput, the same hash the result cache uses, without options"""
+    from . import result_cache
+    return result_cache.inputs_digest(loaded.rooms, loaded.courses, loaded.lecturer_names, loaded.time_grid, {})
+
+
+def write_snapshot(path, loaded, digest=None):
+    """
+    Writes a SchedulingInput to path (atomically: a temporary file, then renamed).
+    Course ids are stored as strings, room and lecturer ids as ints.
+    """
+    digest = digest or input_digest(loaded)
+    strings = {}
+
+    def string(value):
+        if value is None:
+            return -1
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    ints = array("i")
+    for room in loaded.rooms:
+        ints.extend((room.room_id, string(room.name), room.capacity))
+    slots = array("i")
+    for course in loaded.courses:
+        for timeslot in course.time_slots:
+            slots.extend((timeslot.start, timeslot.end))
+        ints.extend((string(str(course.course_id)), string(course.name), course.level, course.num_students,
+                     course.lecturer_id, string(course.department), len(slots) // 2))
+    ints.extend(slots)
+    for lecturer_id, name in loaded.lecturer_names.items():
+        ints.extend((lecturer_id, string(name)))
+
+    encoded = [value.encode() for value in strings]
+    offsets = array("i", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    ints.extend(offsets)
+    if sys.byteorder != "little":
+        ints.byteswap()
+    grid = json.dumps(loaded.time_grid.spec).encode()
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, bytes.fromhex(digest), len(loaded.rooms), len(loaded.courses),
+                         len(slots) // 2, len(loaded.lecturer_names), len(strings), offsets[-1], len(grid))
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        f.write(ints.tobytes())
+        f.write(b"".join(encoded))
+        f.write(grid)
+    os.replace(temporary, path)
+    return digest
+
+
+def read_snapshot(path):
+    """
+    Memory-maps a snapshot and returns (SchedulingInput, digest).
+    Raises ValueError if the file isn't a snapshot of this format version.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+        if len(mm) < HEADER.size:
+            raise ValueError(f"Not a scheduling snapshot: {path}")
+        magic, version, digest, n_rooms, n_courses, n_slots, n_lecturers, n_strings, string_bytes, grid_bytes = \
+            HEADER.unpack_from(mm)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} scheduling snapshot: {path}")
+
+        n_ints = 3 * n_rooms + 7 * n_courses + 2 * n_slots + 2 * n_lecturers + n_strings + 1
+        strings_at = HEADER.size + 4 * n_ints
+        if sys.byteorder == "little":
+            ints = view[HEADER.size:strings_at].cast("i")
+        else:
+            ints = array("i", view[HEADER.size:strings_at].tobytes())
+            ints.byteswap()
+        with memoryview(ints) as ints:
+            offsets = ints[n_ints - n_strings - 1:].tolist()
+            blob = view[strings_at:strings_at + string_bytes].tobytes()
+            strings = [blob[offsets[i]:offsets[i + 1]].decode() for i in range(n_strings)]
+            grid = json.loads(view[strings_at + string_bytes:strings_at + string_bytes + grid_bytes].tobytes())
+
+            rooms = ints[:3 * n_rooms].tolist()
+            room_list = [Room(rooms[i], strings[rooms[i + 1]], rooms[i + 2]) for i in range(0, len(rooms), 3)]
+
+            at = 3 * n_rooms
+            courses = ints[at:at + 7 * n_courses].tolist()
+            at += 7 * n_courses
+            slots = ints[at:at + 2 * n_slots].tolist()
+            at += 2 * n_slots
+            lecturers = ints[at:at + 2 * n_lecturers].tolist()
+
+    course_list = []
+    first = 0
+    for i in range(0, len(courses), 7):
+        course_id, name, level, num_students, lecturer_id, department, last = courses[i:i + 7]
+        time_slots = [TimeSlot.from_minutes(slots[j], slots[j + 1]) for j in range(2 * first, 2 * last, 2)]
+        course_list.append(Course(strings[course_id], strings[name], level, num_students, time_slots, lecturer_id,
+                                  strings[department] if department >= 0 else None))
+        first = last
+    lecturer_names = {lecturers[i]: strings[lecturers[i + 1]] for i in range(0, len(lecturers), 2)}
+    return SchedulingInput(room_list, course_list, lecturer_names, TimeGrid(**grid)), digest.hex()
+
+
+# --- Per-institution snapshots in SCHEDULER_SNAPSHOT_DIR ---
+
+def snapshot_path(institution_id, digest):
+    from django.conf import settings
+    return os.path.join(settings.SCHEDULER_SNAPSHOT_DIR, f"{institution_id}-{digest}.snap")
+
+
+def _pointer_key(institution_id, version):
+    return f"schedule-snapshot:{institution_id}:{version}"
+
+
+def export_snapshot(inst, loaded=None, version=None):
+    """
+    Writes the institution's current inputs (loaded from the database unless given) to
+    SCHEDULER_SNAPSHOT_DIR, unless a snapshot with the same digest exists, and deletes its
+    older snapshots. Returns (path, loaded).
+    version: the input version read before `loaded` was loaded, if it is given
+    """
+    from django.conf import settings
+    from .loader import load_institution
+    from . import result_cache
+
+    if loaded is None or version is None:
+        version = result_cache.input_version(inst.id)  # read before loading: an edit meanwhile replaces it
+        loaded = load_institution(inst)
+    digest = input_digest(loaded)
+    path = snapshot_path(inst.id, digest)
+    if not os.path.exists(path):
+        os.makedirs(settings.SCHEDULER_SNAPSHOT_DIR, exist_ok=True)
+        write_snapshot(path, loaded, digest)
+        for old in glob.glob(snapshot_path(inst.id, "*")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass  # removed by another process
+    result_cache.get_cache().set(_pointer_key(inst.id, version), digest, timeout=settings.SCHEDULER_SNAPSHOT_MAX_AGE)
+    return path, loaded
+
+
+def load_input(inst):
+    """
+    The institution's SchedulingInput from its snapshot when one was written at the current
+    input version (every edit replaces the version, see core/signals.py) within the last
+    SCHEDULER_SNAPSHOT_MAX_AGE seconds, otherwise loaded from the database and exported. Returns (loaded, snapshot path), the path being None when the
+    snapshot couldn't be written. Raises ValueError on an invalid time slot, like load_institution.
+    """
+    from .loader import load_institution
+    from . import result_cache
+
+    version = result_cache.input_version(inst.id)
+    digest = result_cache.get_cache().get(_pointer_key(inst.id, version))
+    if digest is not None:
+        path = snapshot_path(inst.id, digest)
+        try:
+            loaded, _ = read_snapshot(path)
+            return loaded, path
+        except (OSError, ValueError):
+            pass  # deleted or unreadable: export again
+    loaded = load_institution(inst)
+    try:
+        path, _ = export_snapshot(inst, loaded, version)
+    except OSError:
+        path = None
+    return loaded, path
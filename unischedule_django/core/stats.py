@@ -0,0 +1,57 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerStats:
+    """
+    Counters and phase timers for one scheduling run. Scheduler functions take it as an
+    optional stats argument and skip all counting when it is None, so runs without one
+    pay nothing but an `is not None` check.
+
+    Counters (greedy passes):
+    - find_free_room_calls / rooms_examined: room lookups and the fitting rooms checked in them
+    - next_slot_searches / candidates_evaluated: alternative-slot searches and the candidate
+      slots they went through
+    """
+
+    COUNTERS = ("find_free_room_calls", "rooms_examined", "next_slot_searches", "candidates_evaluated")
+
+    def __init__(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.timings = {}  # phase -> seconds
+
+    @contextmanager
+    def timer(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0) + time.perf_counter() - started
+
+    def counters(self):
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+    def add(self, counters):
+        """Adds counters(), e.g. from a copy collected in a worker process"""
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self, counters=True):
+        """
+        counters=False leaves them out (e.g. for a cached result, where nothing was searched)
+        """
+        return {
+            **(self.counters() if counters else {}),
+            "timings": {phase: round(seconds, 4) for phase, seconds in self.timings.items()},
+        }
+
+    def log(self, counters=True, **context):
+        """
+        Logs the stats as one JSON object (plus the given context, e.g. institution and options)
+        """
+        logger.info("scheduling stats %s", json.dumps({**context, **self.as_dict(counters)}, default=str))
@@ -0,0 +1,78 @@
+import math
+import random
+
+from .algoclass import Room, Course, TimeSlot, WEEK_DAYS
+
+# Synthetic institutions for benchmarks (benchmarks/run_benchmarks.py) and load testing.
+# Everything is drawn from one random.Random(seed): same arguments, same institution.
+
+DEPARTMENTS = ["PHY", "CHM", "MTH", "BIO", "CSC", "ECO", "ACC", "LAW", "ENG", "MED", "AGR", "EDU"]
+ROOM_SIZES = [30, 50, 80, 120, 200, 300, 500, 800]
+DAYS = WEEK_DAYS[:5]
+FIRST_HOUR, LAST_HOUR = 8, 18  # the default Monday-Friday 08:00-18:00 grid
+DURATIONS = [(1, 0.3), (2, 0.5), (3, 0.2)]  # class length in hours, weight
+
+
+def _hour(h):
+    return f"{h:02d}:00"
+
+
+def _weighted(rnd, choices):
+    return rnd.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+def _room_size(num_students):
+    """Smallest standard room size that seats num_students"""
+    for size in ROOM_SIZES:
+        if size >= num_students:
+            return size
+    return ROOM_SIZES[-1]
+
+
+def generate_institution(slots=1000, rooms=None, lecturers=None, levels=4, tightness=0.7, seed=0):
+    """
+    Returns (courses, rooms) in algo format for a made-up university with about `slots` course
+    slots (weekly class meetings, 1-3 per course, 1-3 hours on the hour, 08:00-18:00 Mon-Fri).
+
+    - levels: 100, 200, ... levels; lower levels have fewer, bigger classes
+    - lecturers: defaults to one per ~6 weekly slots; teaching loads vary up to 4x
+    - tightness: requested room-hours / available room-hours. Sets the room count when rooms
+      isn't given (1.0: the rooms could only just hold every class if packed perfectly)
+    - room capacities follow the class sizes, so each size of class has rooms that fit it
+    """
+    rnd = random.Random(seed)
+    if lecturers is None:
+        lecturers = max(1, slots // 6)
+    lecturer_weights = [rnd.uniform(0.5, 2) for _ in range(lecturers)]
+    level_values = [100 * (i + 1) for i in range(levels)]
+    level_weights = [levels - i for i in range(levels)]  # more course sections at lower levels
+
+    courses = []
+    total_slots = 0
+    room_hours = 0
+    while total_slots < slots:
+        level = rnd.choices(level_values, weights=level_weights)[0]
+        department = rnd.choice(DEPARTMENTS)
+        # Median class size falls with the level: ~150 at 100 level, ~40 at 400
+        num_students = max(5, int(rnd.lognormvariate(math.log(150 / (level // 100) ** 0.95), 0.5)))
+        num_students = min(num_students, ROOM_SIZES[-1])
+        time_slots = []
+        for _ in range(min(rnd.choice([1, 2, 2, 3]), slots - total_slots)):
+            duration = _weighted(rnd, DURATIONS)
+            start = min(int(rnd.triangular(FIRST_HOUR, LAST_HOUR, 10)), LAST_HOUR - duration)
+            time_slots.append(TimeSlot(rnd.choice(DAYS), _hour(start), _hour(start + duration)))
+            room_hours += duration
+        total_slots += len(time_slots)
+        lecturer_id = rnd.choices(range(1, lecturers + 1), weights=lecturer_weights)[0]
+        course_id = f"{department} {level // 100}{len(courses) % 100:02d}-{len(courses)}"
+        courses.append(Course(course_id, f"{department} {level} course {len(courses)}", level,
+                              num_students, time_slots, lecturer_id, department))
+
+    if rooms is None:
+        hours_per_room = len(DAYS) * (LAST_HOUR - FIRST_HOUR)
+        rooms = max(1, math.ceil(room_hours / (tightness * hours_per_room)))
+    # Capacities sampled from the classes, so rooms come in proportion to the classes they fit
+    sizes = sorted(_room_size(rnd.choice(courses).num_students) for _ in range(rooms))
+    sizes[-1] = max(sizes[-1], _room_size(max(c.num_students for c in courses)))
+    room_list = [Room(i + 1, f"Room {i + 1}", size) for i, size in enumerate(rnd.sample(sizes, len(sizes)))]
+    return courses, room_list
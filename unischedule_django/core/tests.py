@@ -1,3 +1,683 @@
-from django.test import TestCase
+import importlib.util
+import json
+import multiprocessing
+import random
+import tempfile
+import threading
+import time
+from itertools import permutations
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from .algoclass import Room, Course, TimeSlot, Booking, BookingTable, TimeGrid as AlgoTimeGrid, MINUTES_PER_DAY, WEEK_DAYS
+from .matching import match_rooms
+from .models import (Institution, User, Lecturer, Room as RoomModel, Course as CourseModel, TimeSlot as TimeSlotModel, TimeGrid,
+                     SchedulingJob)
+from .occupancy import Occupancy, IntervalOccupancy
+from .ordering import DSaturOrder
+from .decompose import decomposed_schedule
+from .portfolio import portfolio_schedule
+from .repair import repair_schedule
+from . import result_cache, runs
+from .loader import load_institution
+from .snapshot import load_input, read_snapshot, write_snapshot
+from .singleflight import SingleFlight
+from .scheduler import OccupancyBackend, auto_schedule_courses, times_overlap, cohort_key_function
+from .synthetic import generate_institution
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Tests keep the schedule cache in memory and don't write snapshots
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "schedules": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-schedules"},
+}
+
+
+def summarize(bookings, failed, logs):
+    """Everything a scheduler run returns, in comparable form"""
+    return ([(b.booking_id, b.course.course_id, b.room.room_id, b.start, b.end, b.requested.start, b.requested.end)
+             for b in bookings], failed, logs)
+
+
+def describe_input(loaded):
+    """A SchedulingInput in comparable form"""
+    return ([(r.room_id, r.name, r.capacity) for r in loaded.rooms],
+            [(str(c.course_id), c.name, c.level, c.num_students, c.lecturer_id, c.department,
+              [(ts.start, ts.end) for ts in c.time_slots]) for c in loaded.courses],
+            loaded.lecturer_names, loaded.time_grid.spec)
+
+
+def clashes(bookings):
+    """Pairs of bookings sharing a room or a lecturer at overlapping times"""
+    found = []
+    for i, a in enumerate(bookings):
+        for b in bookings[i + 1:]:
+            if ((a.room.room_id == b.room.room_id or a.course.lecturer_id == b.course.lecturer_id)
+                    and times_overlap(a.start, a.end, b.start, b.end)):
+                found.append((a, b))
+    return found
+
+
+class OccupancyTests(SimpleTestCase):
+    def test_interval_occupancy_matches_bitmasks(self):
+        rnd = random.Random(1)
+        bitmasks, intervals = Occupancy(), IntervalOccupancy()
+        added = []
+        for _ in range(3000):
+            day = rnd.randrange(5) * MINUTES_PER_DAY
+            start = day + rnd.randrange(8 * 60, 17 * 60, 30)
+            span = (rnd.randrange(3), start, start + rnd.choice([30, 60, 120, 180]))
+            if added and rnd.random() < 0.3:
+                span = added.pop(rnd.randrange(len(added)))
+                bitmasks.remove(*span)
+                intervals.remove(*span)
+            elif rnd.random() < 0.5:
+                added.append(span)
+                bitmasks.add(*span)
+                intervals.add(*span)
+            self.assertEqual(intervals.is_free(*span), bitmasks.is_free(*span), span)
+
+
+class BookingTableTests(SimpleTestCase):
+    def test_yields_the_bookings_it_was_built_from(self):
+        courses, rooms = generate_institution(300, seed=1)
+        # more slots than a signed byte can index
+        courses.append(Course("MANY", "Many", 100, 10, [TimeSlot.from_minutes(m, m + 30) for m in range(0, 300 * 30, 30)], -1))
+        bookings, failed = auto_schedule_courses(courses, rooms, [])
+        table = BookingTable.from_bookings(bookings, courses, rooms)
+        self.assertEqual(summarize(table, failed, []), summarize(bookings, failed, []))
+        self.assertTrue(all(a.requested is b.requested for a, b in zip(table, bookings)))
+
+
+class BackendTests(SimpleTestCase):
+    OPTIONS = [
+        {},
+        {"order": "dsatur"},
+        {"cohorts": "level"},
+        {"cohorts": "department", "order": "dsatur"},
+        {"room_assignment": "matching"},
+        {"room_assignment": "matching", "order": "dsatur", "cohorts": "level"},
+    ]
+
+    def test_backends_give_the_same_bookings(self):
+        courses, rooms = generate_institution(400, tightness=0.9, seed=3)
+        backends = ["python", "intervals"] + (["numpy"] if HAS_NUMPY else [])
+        for options in self.OPTIONS:
+            results = {}
+            for backend in backends:
+                logs = []
+                bookings, failed = auto_schedule_courses(courses, rooms, logs, backend=backend, **options)
+                results[backend] = summarize(bookings, failed, logs)
+            for backend in backends[1:]:
+                self.assertEqual(results[backend], results["python"], (backend, options))
+
+
+class DSaturOrderTests(SimpleTestCase):
+    def test_booked_cohort_makes_the_slot_move(self):
+        rooms = [Room(r, f"R{r}", 100) for r in range(3)]
+        first = Course("A", "A", 100, 50, [TimeSlot("Monday", "08:00", "10:00")], lecturer_id=1)
+        same_level = Course("B", "B", 100, 50, [TimeSlot("Monday", "09:00", "11:00")], lecturer_id=2)
+        other_level = Course("C", "C", 200, 50, [TimeSlot("Monday", "09:00", "11:00")], lecturer_id=3)
+        order = DSaturOrder([first, same_level, other_level], rooms, cohort_key=cohort_key_function("level"))
+        slots = iter(order)
+        self.assertIs(next(slots)[0], first)
+        order.placed(Booking(1, rooms[0], first, first.time_slots[0].start, first.time_slots[0].end))
+        # B's cohort is busy at its requested time: it can't be booked as requested and goes last
+        self.assertEqual([course for course, _ in slots], [other_level, same_level])
+
+    def test_order_is_a_permutation_of_the_slots(self):
+        courses, rooms = generate_institution(300, seed=2)
+        bookings, failed = auto_schedule_courses(courses, rooms, [], order="dsatur", cohorts="level")
+        self.assertEqual(len(bookings) + len(failed), sum(len(course.time_slots) for course in courses))
+        self.assertEqual(len({id(b.requested) for b in bookings}), len(bookings))
+
+
+class PortfolioTests(SimpleTestCase):
+    def test_never_worse_than_the_baseline(self):
+        courses, rooms = generate_institution(200, seed=4)
+        baseline, baseline_failed = auto_schedule_courses(courses, rooms, [], order="dsatur")
+        bookings, failed, report = portfolio_schedule(courses, rooms, [], runs=4, workers=2)
+        self.assertEqual(report["runs_completed"], 4)
+        self.assertLessEqual(report["best_score"], report["baseline_score"])
+        self.assertEqual(report["baseline_score"], 10 * len(baseline_failed) + sum(b.moved for b in baseline))
+
+    def test_time_limit_stops_the_workers(self):
+        courses, rooms = generate_institution(1500, seed=4)
+        bookings, failed, report = portfolio_schedule(courses, rooms, [], runs=200, workers=2, time_limit=0.5)
+        self.assertLess(report["seconds"], 3)  # the limit, plus the baseline run and winner re-run at worst
+        self.assertLess(report["runs_completed"], 200)
+        deadline = time.perf_counter() + 5
+        while multiprocessing.active_children() and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(multiprocessing.active_children(), [])
+
+
+class DecomposedTests(SimpleTestCase):
+    def test_merged_timetable_is_valid(self):
+        courses, rooms = generate_institution(600, tightness=0.8, seed=1)
+        bookings, failed, report = decomposed_schedule(courses, rooms, [], parts=3, max_spill=1)
+        self.assertEqual(report["parts"], 3)
+        self.assertFalse(report["fallback"])
+        self.assertEqual(clashes(bookings), [])
+        for b in bookings:
+            self.assertGreaterEqual(b.room.capacity, b.course.num_students)
+        self.assertEqual(len({id(b.requested) for b in bookings}), len(bookings))
+        self.assertEqual(len(bookings) + len(failed), sum(len(course.time_slots) for course in courses))
+        self.assertEqual(sorted(b.booking_id for b in bookings), list(range(1, len(bookings) + 1)))
+
+    def test_falls_back_when_too_much_spills(self):
+        courses, rooms = generate_institution(300, tightness=0.9, seed=1)
+        bookings, failed, report = decomposed_schedule(courses, rooms, [], parts=3, max_spill=0)
+        self.assertGreater(report["spilled"], 0)
+        self.assertTrue(report["fallback"])
+        single = auto_schedule_courses(courses, rooms, [])
+        self.assertEqual(summarize(bookings, failed, []), summarize(*single, []))
+
+
+class MatchRoomsTests(SimpleTestCase):
+    @staticmethod
+    def best_assignment(courses, rooms):
+        """(courses seated, -wasted seats) of the best assignment, by trying them all"""
+        best = (0, 0)
+        for chosen in permutations(rooms + [None] * len(courses), len(courses)):
+            pairs = [(course, room) for course, room in zip(courses, chosen) if room is not None]
+            if all(room.capacity >= course.num_students for course, room in pairs):
+                best = max(best, (len(pairs), -sum(room.capacity - course.num_students for course, room in pairs)))
+        return best
+
+    def test_matches_brute_force(self):
+        rnd = random.Random(2)
+        timeslot = TimeSlot("Monday", "10:00", "12:00")
+        for case in range(150):
+            rooms = [Room(r, f"R{r}", rnd.choice([20, 30, 50, 80, 120])) for r in range(rnd.randint(1, 5))]
+            courses = [Course(f"C{i}", f"Course {i}", 100, rnd.randint(10, 130), [timeslot], lecturer_id=i)
+                       for i in range(rnd.randint(1, 4))]
+            engine = OccupancyBackend([], rooms, [])
+            for room in rooms:
+                if rnd.random() < 0.3:  # already booked then
+                    engine.add(Booking(None, room, Course("X", "X", 100, 1, [], -1), timeslot.start, timeslot.end))
+
+            matched = match_rooms(engine, [(course, timeslot) for course in courses])
+            used = [room.room_id for _, _, room in matched]
+            self.assertEqual(len(used), len(set(used)), case)
+            for course, _, room in matched:
+                self.assertGreaterEqual(room.capacity, course.num_students, case)
+                self.assertTrue(engine.room_occupancy.is_free(room.room_id, timeslot.start, timeslot.end), case)
+            got = (len(matched), -sum(room.capacity - course.num_students for course, _, room in matched))
+            free = engine.free_rooms(0, timeslot.start, timeslot.end)
+            self.assertEqual(got, self.best_assignment(courses, free), case)
+
+
+class RepairTests(SimpleTestCase):
+    def test_keeps_unaffected_bookings(self):
+        courses, rooms = generate_institution(300, tightness=0.8, seed=5)
+        bookings, failed = auto_schedule_courses(courses, rooms, [])
+
+        edited, rooms = generate_institution(300, tightness=0.8, seed=5)
+        changed = edited[7]
+        old = changed.time_slots[0]
+        changed.time_slots[0] = TimeSlot.from_minutes((old.start + MINUTES_PER_DAY) % (5 * MINUTES_PER_DAY),
+                                                      (old.end + MINUTES_PER_DAY) % (5 * MINUTES_PER_DAY))
+        repaired, repaired_failed, report = repair_schedule(edited, rooms, bookings, [], [("slot_moved", changed.course_id)],
+                                                            failed_bookings=failed)
+
+        self.assertEqual(clashes(repaired), [])
+        for b in repaired:
+            self.assertGreaterEqual(b.room.capacity, b.course.num_students)
+        self.assertEqual(len({id(b.requested) for b in repaired}), len(repaired))
+        self.assertEqual(len(repaired) + len(repaired_failed), sum(len(course.time_slots) for course in edited))
+
+        before = {(b.course.course_id, b.room.room_id, b.start, b.end) for b in bookings
+                  if b.course.course_id != changed.course_id}
+        after = {(b.course.course_id, b.room.room_id, b.start, b.end) for b in repaired}
+        self.assertLessEqual(len(before - after), report["displaced"])
+
+
+class ApiTestMixin:
+    """An institution with a few lecturers, rooms and courses, and a client logged in as its admin"""
+
+    HOURS = ["08:00", "09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00", "18:00"]
+
+    def setUp(self):
+        result_cache.get_cache().clear()  # institution ids are reused between tests
+        rnd = random.Random(1)
+        self.inst = Institution.objects.create(name="LCU", domain="lcu.ng")
+        self.user = User.objects.create_user(username="admin", email="admin@lcu.ng", password="x",
+                                             institution=self.inst, role="admin")
+        lecturers = [Lecturer.objects.create(institution=self.inst, name=f"Dr {i}", department=rnd.choice(["PHY", "CHM"]))
+                     for i in range(6)]
+        for i in range(4):
+            RoomModel.objects.create(institution=self.inst, name=f"R{i}", capacity=rnd.choice([30, 60, 120, 300]))
+        for c in range(20):
+            course = CourseModel.objects.create(institution=self.inst, id=f"C{c}", name=f"Course {c}",
+                                                level=rnd.choice([100, 200, 300]), num_students=rnd.choice([20, 50, 100]),
+                                                lecturer=rnd.choice(lecturers))
+            for _ in range(rnd.randint(1, 2)):
+                s = rnd.randint(0, 8)
+                TimeSlotModel.objects.create(institution=self.inst, course=course, day=rnd.choice(WEEK_DAYS[:5]),
+                                             start_time=self.HOURS[s], end_time=self.HOURS[s + 2])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+@override_settings(CACHES=TEST_CACHES, SCHEDULER_SNAPSHOT_DIR=None)
+class ApiTestCase(ApiTestMixin, TestCase):
+    pass
+
+
+@override_settings(CACHES=TEST_CACHES, SCHEDULER_SNAPSHOT_DIR=None)
+class ApiTransactionTestCase(ApiTestMixin, TransactionTestCase):
+    """For runs in worker threads (streams, jobs), which only see committed data"""
+
+    def wait_for(self, job_id, timeout=30):
+        """The job once it is no longer queued or running"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            job = self.client.get(f"/api/jobs/{job_id}").json()
+            if job["status"] not in SchedulingJob.ACTIVE_STATUSES:
+                return job
+            time.sleep(0.05)
+        self.fail(f"job {job_id} still {job['status']}")
+
+
+class TimetableTests(ApiTestCase):
+    def test_days_follow_the_grid_then_the_week(self):
+        TimeGrid.objects.create(institution=self.inst, days=["Monday", "Tuesday", "Wednesday"])
+        course = CourseModel.objects.get(id="C0")
+        for day in ("Sunday", "Thursday", "Saturday"):
+            TimeSlotModel.objects.create(institution=self.inst, course=course, day=day, start_time="08:00", end_time="10:00")
+
+        timetable = self.client.get("/api/timetable").json()
+        days = list(timetable)
+        self.assertEqual(days[:3], ["Monday", "Tuesday", "Wednesday"])
+        self.assertEqual([day for day in days if day in ("Thursday", "Saturday", "Sunday")], ["Thursday", "Saturday", "Sunday"])
+        self.assertEqual(days[3:], sorted(days[3:], key=WEEK_DAYS.index))
+
+
+class ExactRunTests(ApiTestCase):
+    def test_small_searches_run_within_the_request(self):
+        response = self.client.get("/api/run-algorithm", {"solver": "exact"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(response.json()["exact"]["status"], ("solved", "infeasible", "limit", "too_large"))
+
+    @override_settings(SCHEDULER_EXACT_SYNC_SIZE=0)
+    def test_large_searches_go_to_a_job(self):
+        # an active job makes start_job refuse, so no worker thread is started here
+        SchedulingJob.objects.create(institution=self.inst, created_by=self.user, options={})
+        response = self.client.get("/api/run-algorithm", {"solver": "exact"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get("/api/run-algorithm").status_code, 200)  # greedy isn't affected
+
+
+class SnapshotTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(SCHEDULER_SNAPSHOT_DIR=directory.name))
+        self.directory = directory.name
+
+    def test_round_trip(self):
+        loaded = load_institution(self.inst)
+        digest = write_snapshot(f"{self.directory}/test.snap", loaded)
+        read, read_digest = read_snapshot(f"{self.directory}/test.snap")
+        self.assertEqual(describe_input(read), describe_input(loaded))
+        self.assertEqual(read_digest, digest)
+
+    def test_edits_replace_the_snapshot(self):
+        loaded, path = load_input(self.inst)
+        self.assertIsNotNone(path)
+        self.assertEqual(load_input(self.inst)[1], path)  # unchanged: read from the snapshot
+
+        room = RoomModel.objects.filter(institution=self.inst).first()
+        room.capacity += 1
+        room.save()
+        loaded, path = load_input(self.inst)
+        self.assertEqual(describe_input(loaded), describe_input(load_institution(self.inst)))
+
+    def test_bulk_edits_need_an_invalidate(self):
+        load_input(self.inst)
+        RoomModel.objects.filter(institution=self.inst).update(capacity=999)  # no signals
+        self.assertNotEqual({r.capacity for r in load_input(self.inst)[0].rooms}, {999})
+        result_cache.invalidate(self.inst.id)
+        self.assertEqual({r.capacity for r in load_input(self.inst)[0].rooms}, {999})
+
+    @override_settings(SCHEDULER_SNAPSHOT_MAX_AGE=0)
+    def test_snapshots_expire(self):
+        load_input(self.inst)
+        RoomModel.objects.filter(institution=self.inst).update(capacity=999)
+        self.assertEqual({r.capacity for r in load_input(self.inst)[0].rooms}, {999})
+
+
+def sse_events(response):
+    """(event name, data) of each message in a Server-Sent Events response, keepalives skipped"""
+    events = []
+    for message in b"".join(response.streaming_content).decode().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in message.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class StreamTests(ApiTransactionTestCase):
+    def sequence(self, events):
+        """Event names with repeated progress events collapsed, and phase events by phase"""
+        names = []
+        for name, data in events:
+            name = data["phase"] if name == "phase" else name
+            if not names or name != names[-1]:
+                names.append(name)
+        return names
+
+    def test_event_sequence_is_the_same_on_cache_hits(self):
+        for params in ({}, {"solver": "exact"}, {"improve_seconds": "0.3"}):
+            first = sse_events(self.client.get("/api/run-algorithm/stream", params))
+            again = sse_events(self.client.get("/api/run-algorithm/stream", params))
+            self.assertFalse(first[-1][1]["cached"])
+            self.assertTrue(again[-1][1]["cached"])
+            for events in (first, again):
+                progress = [data for name, data in events if name == "progress"]
+                self.assertEqual([event["done"] for event in progress], [False] * (len(progress) - 1) + [True], params)
+                result = events[-1][1]
+                self.assertEqual(progress[-1]["placed"], len(result["bookings"]), params)
+                self.assertEqual(progress[-1]["failed"], len(result["failed_bookings"]), params)
+            self.assertEqual(self.sequence(again), self.sequence(first)[:2] + ["progress", "serializing", "result"])
+            self.assertEqual(self.sequence(first)[:3], ["loading", "solving", "progress"], params)
+            self.assertEqual(self.sequence(first)[-2:], ["serializing", "result"], params)
+
+
+class StatsTests(ApiTestCase):
+    def test_counters_come_from_every_solver(self):
+        with override_settings(SCHEDULER_PARALLEL_WORKERS=2, SCHEDULER_PORTFOLIO_WORKERS=1):
+            for params in ({}, {"solver": "parallel"}, {"runs": "2"}):
+                with self.assertLogs("core.stats"):
+                    stats = self.client.get("/api/run-algorithm", {**params, "stats": "1"}).json()["stats"]
+                self.assertNotIn("bookings_scanned", stats)
+                self.assertGreater(stats["find_free_room_calls"], 0, params)
+                self.assertIn("solve", stats["timings"])
+
+    def test_cache_hits_report_no_counters(self):
+        self.client.get("/api/run-algorithm")
+        with self.assertLogs("core.stats") as logs:
+            response = self.client.get("/api/run-algorithm", {"stats": "1"}).json()
+        self.assertNotIn("find_free_room_calls", logs.output[0])
+        self.assertTrue(response["cached"])
+        self.assertEqual(set(response["stats"]), {"cached", "timings"})
+        self.assertTrue(response["stats"]["cached"])
+        self.assertNotIn("stats", self.client.get("/api/run-algorithm").json())
+
+
+class ResultCacheTests(ApiTestCase):
+    def test_repeat_runs_are_served_from_the_cache(self):
+        first = self.client.get("/api/run-algorithm").json()
+        again = self.client.get("/api/run-algorithm").json()
+        self.assertFalse(first["cached"])
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["bookings"], first["bookings"])
+        self.assertFalse(self.client.get("/api/run-algorithm", {"order": "dsatur"}).json()["cached"])
+
+    def test_edits_invalidate_the_cache(self):
+        self.client.get("/api/run-algorithm")
+        room = RoomModel.objects.filter(institution=self.inst).first()
+        response = self.client.put(f"/api/rooms/{room.id}", {"name": "Main hall", "capacity": 500}, format="json")
+        self.assertEqual(response.status_code, 200)
+        result = self.client.get("/api/run-algorithm").json()
+        self.assertFalse(result["cached"])
+        self.assertIn("Main hall", {b["room"] for b in result["bookings"]})
+        self.assertTrue(self.client.get("/api/run-algorithm").json()["cached"])
+
+        TimeSlotModel.objects.filter(institution=self.inst).first().delete()
+        self.assertFalse(self.client.get("/api/run-algorithm").json()["cached"])
+
+
+class JobTests(ApiTestCase):
+    def test_refused_while_the_institution_has_an_active_job(self):
+        job = SchedulingJob.objects.create(institution=self.inst, created_by=self.user, options={})
+        response = self.client.post("/api/jobs", {}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/result").status_code, 409)
+
+        response = self.client.post(f"/api/jobs/{job.id}/cancel")
+        self.assertEqual(response.json()["status"], "cancelled")
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/result").json()["status"], "cancelled")
+
+    @override_settings(SCHEDULER_JOB_QUEUE_SIZE=0)
+    def test_refused_when_the_queue_is_full(self):
+        self.assertEqual(self.client.post("/api/jobs", {}, format="json").status_code, 429)
+        self.assertFalse(SchedulingJob.objects.exists())
+
+    def test_invalid_options_and_other_institutions_jobs(self):
+        self.assertEqual(self.client.post("/api/jobs", {"order": "nope"}, format="json").status_code, 400)
+        other = Institution.objects.create(name="Other", domain="other.ng")
+        job = SchedulingJob.objects.create(institution=other, options={})
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}").status_code, 404)
+        self.assertEqual(self.client.post(f"/api/jobs/{job.id}/cancel").status_code, 404)
+
+
+class JobLifecycleTests(ApiTransactionTestCase):
+    def test_runs_to_a_result(self):
+        response = self.client.post("/api/jobs", {"order": "dsatur"}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "queued")
+        job = self.wait_for(response.json()["id"])
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["progress"], 1)
+
+        result = self.client.get(f"/api/jobs/{job['id']}/result")
+        self.assertEqual(result.status_code, 200)
+        direct = self.client.get("/api/run-algorithm", {"order": "dsatur"}).json()
+        self.assertTrue(direct["cached"])  # the job's run filled the result cache
+        self.assertEqual(result.json()["bookings"], direct["bookings"])
+
+
+def in_threads(count, fn):
+    """Runs fn(i) in `count` threads started together, returns the results in order"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def target(i):
+        barrier.wait()
+        try:
+            results[i] = fn(i)
+        finally:
+            connection.close()  # each thread's own DB connection
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_run(self):
+        flight, calls = SingleFlight(), []
+
+        def slow():
+            calls.append(None)
+            time.sleep(0.3)
+            return object()
+
+        results = in_threads(5, lambda i: flight.do("key", slow))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(result) for result, _ in results}), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True, True])
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.3)
+            raise ValueError("boom")
+
+        def call(i):
+            with self.assertRaises(ValueError):
+                flight.do("key", failing)
+            return True
+
+        self.assertEqual(in_threads(3, call), [True] * 3)
+        self.assertEqual(flight.do("key", lambda: 1), (1, False))
+
+
+class CoalescedRunTests(ApiTransactionTestCase):
+    def test_identical_requests_share_one_run(self):
+        run_schedule = runs.run_schedule
+        calls = []
+
+        def slow_run(*args, **kwargs):
+            calls.append(None)
+            time.sleep(0.3)  # long enough for every request to arrive while it runs
+            return run_schedule(*args, **kwargs)
+
+        def request(i):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            return client.get("/api/run-algorithm").json()
+
+        with mock.patch.object(runs, "run_schedule", slow_run):
+            results = in_threads(4, request)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(result["coalesced"] for result in results), [False, True, True, True])
+        self.assertEqual(len({json.dumps(result["bookings"]) for result in results}), 1)
+
+
+class LoaderTests(ApiTestCase):
+    def test_five_queries_whatever_the_size(self):
+        with self.assertNumQueries(5):
+            loaded = load_institution(self.inst)
+        self.assertEqual(len(loaded.courses), 20)
+
+        lecturer = Lecturer.objects.filter(institution=self.inst).first()
+        for c in range(20, 60):
+            course = CourseModel.objects.create(institution=self.inst, id=f"C{c}", name=f"Course {c}", level=100,
+                                                num_students=30, lecturer=lecturer)
+            TimeSlotModel.objects.create(institution=self.inst, course=course, day="Monday", start_time="08:00", end_time="10:00")
+        with self.assertNumQueries(5):
+            self.assertEqual(len(load_institution(self.inst).courses), 60)
+
+    def test_matches_the_models(self):
+        loaded = load_institution(self.inst)
+        rooms = RoomModel.objects.filter(institution=self.inst)
+        self.assertEqual([(r.room_id, r.name, r.capacity) for r in loaded.rooms], [(r.id, r.name, r.capacity) for r in rooms])
+        for algo, course in zip(loaded.courses, CourseModel.objects.filter(institution=self.inst)):
+            self.assertEqual((algo.course_id, algo.name, algo.level, algo.num_students, algo.lecturer_id, algo.department),
+                             (course.id, course.name, course.level, course.num_students, course.lecturer_id,
+                              course.lecturer.department))
+            slots = course.time_slots.order_by("id")
+            self.assertEqual([(ts.day, ts.start_time, ts.end_time) for ts in algo.time_slots],
+                             [(ts.day, ts.start_time, ts.end_time) for ts in slots])
+        self.assertEqual(loaded.lecturer_names, dict(Lecturer.objects.filter(institution=self.inst).values_list("id", "name")))
+
+
+class AlternativeLengthTests(SimpleTestCase):
+    GRID = {"period_minutes": 30, "breaks": [("12:00", "13:00")]}
+
+    def test_candidates_keep_the_class_length(self):
+        grid = AlgoTimeGrid(alternative_periods=0, **self.GRID)
+        for length in (30, 90, 150):
+            start = 9 * 60
+            candidates = grid.candidates(start, start + length)
+            self.assertTrue(candidates)
+            for candidate_start, candidate_end in candidates:
+                self.assertEqual(candidate_end - candidate_start, length)
+                offset = candidate_start % MINUTES_PER_DAY
+                # never across the lunch break or past closing
+                self.assertFalse(offset < 13 * 60 and offset + length > 12 * 60)
+                self.assertLessEqual(offset + length, 18 * 60)
+
+    def test_moved_classes_keep_their_length(self):
+        courses, rooms = generate_institution(800, tightness=0.9, seed=6)
+        bookings, failed = auto_schedule_courses(courses, rooms, [], time_grid=AlgoTimeGrid(alternative_periods=0, **self.GRID))
+        moved = [b for b in bookings if b.moved]
+        self.assertTrue(moved)
+        for b in moved:
+            self.assertEqual(b.end - b.start, b.requested.end - b.requested.start)
+
+    def test_fixed_periods_when_set(self):
+        grid = AlgoTimeGrid(alternative_periods=2, **self.GRID)
+        for candidate_start, candidate_end in grid.candidates(9 * 60, 12 * 60):
+            self.assertLessEqual(candidate_end - candidate_start, 60)
+
+
+class TimeGridApiTests(ApiTestCase):
+    def test_defaults_until_saved(self):
+        grid = self.client.get("/api/time-grid").json()
+        self.assertEqual((grid["days"], grid["opening_time"], grid["closing_time"], grid["period_minutes"]),
+                         (list(WEEK_DAYS[:5]), "08:00", "18:00", 60))
+        self.assertFalse(TimeGrid.objects.exists())
+
+    def test_update_is_used_by_runs(self):
+        body = {"days": ["Monday", "Tuesday"], "period_minutes": 30, "opening_time": "09:00", "closing_time": "17:00",
+                "breaks": [["12:00", "13:00"]], "alternative_periods": 0}
+        self.assertEqual(self.client.put("/api/time-grid", body, format="json").status_code, 200)
+        self.assertEqual(self.client.get("/api/time-grid").json()["days"], ["Monday", "Tuesday"])
+
+        result = self.client.get("/api/run-algorithm").json()
+        self.assertFalse(result["cached"])
+        moved = [b for b in result["bookings"] if b["requested"] != {key: b[key] for key in b["requested"]}]
+        self.assertTrue(moved)
+        for b in moved:
+            # within their own day or to a grid day (TimeGrid.candidates), at a period start
+            self.assertIn(b["day"], ("Monday", "Tuesday", b["requested"]["day"]))
+            self.assertIn(b["start_time"][3:], ("00", "30"))
+
+    def test_invalid_grids_are_refused(self):
+        for body in ({"opening_time": "18:00", "closing_time": "08:00"}, {"days": ["Someday"]},
+                     {"period_minutes": 0}, {"breaks": [["08:00", "18:00"]]}):
+            self.assertEqual(self.client.put("/api/time-grid", body, format="json").status_code, 400, body)
+        self.assertFalse(TimeGrid.objects.exists())
+
+
+class RepairApiTests(ApiTestCase):
+    def test_repairs_after_a_moved_slot(self):
+        previous = self.client.get("/api/run-algorithm").json()
+        slot = TimeSlotModel.objects.filter(institution=self.inst, course_id="C3").first()
+        slot.day, slot.start_time, slot.end_time = "Friday", "16:00", "18:00"
+        slot.save()
+
+        response = self.client.post("/api/repair-schedule", {
+            "bookings": previous["bookings"], "failed_bookings": previous["failed_bookings"],
+            "changes": [{"type": "slot_moved", "course_id": "C3"}],
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        repaired = response.json()
+        self.assertIn("repair", repaired)
+
+        def key(b):
+            return b["course_id"], b["room_id"], b["day"], b["start_time"], b["end_time"]
+
+        kept = {key(b) for b in previous["bookings"] if b["course_id"] != "C3"}
+        self.assertLessEqual(len(kept - {key(b) for b in repaired["bookings"]}), repaired["repair"]["displaced"])
+        requested = {(b["requested"]["day"], b["requested"]["start_time"]) for b in repaired["bookings"] if b["course_id"] == "C3"}
+        self.assertTrue(("Friday", "16:00") in requested
+                        or any("Course 3 on Friday 16:00-18:00" in message for message in repaired["failed_bookings"]))
+        by_room = {}
+        for b in repaired["bookings"]:
+            by_room.setdefault((b["room_id"], b["day"]), []).append((b["start_time"], b["end_time"]))
+        for spans in by_room.values():
+            spans.sort()
+            self.assertTrue(all(end <= start for (_, end), (start, _) in zip(spans, spans[1:])), spans)
+        slots = TimeSlotModel.objects.filter(institution=self.inst).count()
+        self.assertEqual(len(repaired["bookings"]) + len(repaired["failed_bookings"]), slots)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post("/api/repair-schedule", {"bookings": [{"day": "Monday"}]},
+                                          format="json").status_code, 400)
+        self.assertEqual(self.client.post("/api/repair-schedule", {"bookings": [], "changes": [{"type": "renamed", "course_id": "C1"}]},
+                                          format="json").status_code, 400)
+
+
+class ExactJobTests(ApiTransactionTestCase):
+    @override_settings(SCHEDULER_EXACT_SYNC_SIZE=0)
+    def test_large_exact_searches_run_as_a_job(self):
+        response = self.client.get("/api/run-algorithm", {"solver": "exact"})
+        self.assertEqual(response.status_code, 202)
+        job = self.wait_for(response.json()["id"])
+        self.assertEqual(job["status"], "done")
+        self.assertIn("exact", self.client.get(f"/api/jobs/{job['id']}/result").json())
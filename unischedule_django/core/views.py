@@ -9,12 +9,20 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import permission_classes
 from django.contrib.auth import get_user_model
 from rest_framework import status
-from .models import Lecturer, Room, Course, TimeSlot, Institution
-from .serializers import LecturerSerializer, RoomSerializer, CourseSerializer, TimeSlotSerializer
-from .scheduler import auto_schedule_courses
-from .algoclass import Room as AlgoRoom, Course as AlgoCourse, TimeSlot as AlgoTimeSlot
+from .models import Lecturer, Room, Course, TimeSlot, TimeGrid, SchedulingJob, Institution
+from .serializers import LecturerSerializer, RoomSerializer, CourseSerializer, TimeSlotSerializer, TimeGridSerializer, SchedulingJobSerializer
+from .repair import repair_schedule, ROOM_CHANGES
+from .jobs import start_job, cancel_job, JobRejected
+from .loader import load_institution
+from .runs import (InvalidRunInput, NeedsBackgroundJob, get_time_grid, serialize_bookings,
+                   parse_run_options, new_stats, run_schedule_coalesced, stream_schedule, sse_event)
+from .algoclass import Room as AlgoRoom, Course as AlgoCourse, TimeSlot as AlgoTimeSlot, Booking as AlgoBooking, WEEK_DAYS
 from .export_utils import generate_pdf, generate_docx
+from django.conf import settings
 from django.db import IntegrityError
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import renderer_classes
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 
 
 User = get_user_model()
@@ -286,12 +294,29 @@ def timeslot_detail(request, pk):
         ts.delete()
         return Response({"message": "Time slot deleted successfully!"})
 
+# ----- TIME GRID -----
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated])
+def time_grid_view(request):
+    grid = TimeGrid.objects.filter(institution=request.user.institution).first()
+
+    if request.method == 'GET':
+        serializer = TimeGridSerializer(grid or TimeGrid())
+        return Response(serializer.data)
+
+    elif request.method == 'PUT':
+        serializer = TimeGridSerializer(grid, data=request.data)
+        if serializer.is_valid():
+            serializer.save(institution=request.user.institution)
+            return Response({"message": "Time grid updated successfully!"})
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated]) 
 def get_timetable(request):
     """Fetch all scheduled courses organized by days"""
-    week_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    timetable = {day: [] for day in week_days}
+    week_days = get_time_grid(request.user.institution).day_names
+    by_day = {day: [] for day in week_days}
 
     courses = Course.objects.prefetch_related('time_slots', 'lecturer')\
     .filter(institution=request.user.institution)
@@ -299,7 +324,7 @@ def get_timetable(request):
 
     for course in courses:
         for slot in course.time_slots.all():
-            timetable[slot.day].append({
+            by_day.setdefault(slot.day, []).append({
                 "course_code": course.id,
                 "course_name": course.name,
                 "lecturer": course.lecturer.name,
@@ -308,6 +333,10 @@ def get_timetable(request):
                 "room": "N/A",  # Placeholder
             })
 
+    # 📅 Grid days first, then any other day a slot is on, in week order
+    order = {day: i for i, day in enumerate(WEEK_DAYS)}
+    other_days = sorted((day for day in by_day if day not in week_days), key=lambda day: order.get(day, len(order)))
+    timetable = {day: by_day[day] for day in list(week_days) + other_days}
     return Response(timetable)
 
 @api_view(['GET'])
@@ -334,45 +363,157 @@ def get_recent_logs(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated]) 
 def run_algorithm(request):
+    """
+    Optional query params: order, backend, improve_seconds, runs, solver, cohorts, room_assignment
+    (see runs.parse_run_options),
+    stats=1 to add search counters and phase timings as "stats" (always on with SCHEDULER_STATS).
+    Results are cached ("cached": true in the response), see runs.run_schedule, and concurrent
+    identical runs share one computation ("coalesced": true), see runs.run_schedule_coalesced.
+    solver=exact searches larger than SCHEDULER_EXACT_SYNC_SIZE are started as a background job
+    instead: 202 with the job, as from POST /api/jobs.
+    """
     inst = request.user.institution
-    rooms = Room.objects.filter(institution=inst)
-    courses = Course.objects.prefetch_related('time_slots').filter(institution=inst)
-
-    # Convert to algo format
-    room_list = [AlgoRoom(r.id, r.name, r.capacity) for r in rooms]
-    course_list = [
-        AlgoCourse(
-            c.id,
-            c.name,
-            c.level,
-            c.num_students,
-            [AlgoTimeSlot(ts.day, ts.start_time, ts.end_time) for ts in c.time_slots.all()],
-            c.lecturer_id
-        ) for c in courses
-    ]
+    try:
+        options = parse_run_options(request.query_params)
+        result, cached, coalesced = run_schedule_coalesced(inst, options, new_stats(request.query_params),
+                                                           max_exact_size=settings.SCHEDULER_EXACT_SYNC_SIZE)
+    except InvalidRunInput as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except NeedsBackgroundJob:
+        try:
+            job = start_job(inst, request.user, options)
+        except JobRejected as e:
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        return Response(SchedulingJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-    logs = []
-    bookings, failed = auto_schedule_courses(course_list, room_list, logs)
-
-    lecturer_lookup = {l.id: l.name for l in Lecturer.objects.filter(institution=inst)}
-
-    result = {
-        "bookings": [
-            {
-                "course_id": b.course.course_id,
-                "course_name": b.course.name,
-                "lecturer": lecturer_lookup.get(b.course.lecturer_id, "Unknown"),
-                "room": b.room.name,
-                "day": b.day,
-                "start_time": b.start_time,
-                "end_time": b.end_time
-            } for b in bookings
-        ],
-        "failed_bookings": failed,
-        "logs": logs
-    }
+    return Response({**result, "cached": cached, "coalesced": coalesced})
+
+class EventStreamRenderer(BaseRenderer):
+    # Lets EventSource-style clients (Accept: text/event-stream) through content negotiation;
+    # error responses go out as a single "error" event
+    media_type = "text/event-stream"
+    format = "sse"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event("error", data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def run_algorithm_stream(request):
+    """
+    run-algorithm as a Server-Sent Events stream of phase and progress events (with the
+    bookings placed so far) ending in a "result" event, see runs.stream_schedule.
+    Same query params as run-algorithm.
+    """
+    try:
+        options = parse_run_options(request.query_params)
+    except InvalidRunInput as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(stream_schedule(request.user.institution, options,
+                                                     stats=new_stats(request.query_params)),
+                                     content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # no proxy buffering (nginx)
+    return response
+
+# ----- SCHEDULING JOBS -----
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def jobs_view(request):
+    """
+    Starts a background run-algorithm run. Body: the same options as run-algorithm's query params.
+    Poll GET /api/jobs/<id> for status and progress, then GET /api/jobs/<id>/result.
+    """
+    try:
+        options = parse_run_options(request.data)
+        job = start_job(request.user.institution, request.user, options)
+    except InvalidRunInput as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except JobRejected as e:
+        return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    return Response(SchedulingJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-    return Response(result)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_detail(request, pk):
+    try:
+        job = SchedulingJob.objects.get(pk=pk, institution=request.user.institution)
+    except SchedulingJob.DoesNotExist:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(SchedulingJobSerializer(job).data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_result(request, pk):
+    try:
+        job = SchedulingJob.objects.get(pk=pk, institution=request.user.institution)
+    except SchedulingJob.DoesNotExist:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    if job.status != 'done':
+        return Response({"error": f"Job is {job.status}", "status": job.status, "error_detail": job.error},
+                        status=status.HTTP_409_CONFLICT)
+    return Response(job.result)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def job_cancel(request, pk):
+    try:
+        job = SchedulingJob.objects.get(pk=pk, institution=request.user.institution)
+    except SchedulingJob.DoesNotExist:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(SchedulingJobSerializer(cancel_job(job)).data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def repair_schedule_view(request):
+    """
+    Incremental re-scheduling after an edit, instead of a new run-algorithm call. Body:
+    - bookings, failed_bookings: the previous run-algorithm result
+    - changes (optional): e.g. [{"type": "slot_moved", "course_id": "CSC101"},
+      {"type": "room_capacity_changed", "room_id": 3}], see repair.COURSE_CHANGES / ROOM_CHANGES;
+      without it every previous booking is re-checked
+    - cohorts (optional): the cohorts option the previous result was run with (level or department)
+    Responds like run-algorithm, with a "repair" report.
+    """
+    inst = request.user.institution
+    data = request.data
+    try:
+        room_list, course_list, lecturer_lookup, time_grid = load_institution(inst)
+    except ValueError as e:
+        return Response({"error": f"Invalid time slot: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        previous = []
+        for i, item in enumerate(data.get("bookings", []), start=1):
+            timeslot = AlgoTimeSlot(item["day"], item["start_time"], item["end_time"])
+            requested = item.get("requested")
+            previous.append(AlgoBooking(
+                booking_id=i,
+                room=AlgoRoom(item["room_id"], item.get("room", ""), 0),
+                course=AlgoCourse(item["course_id"], item.get("course_name", ""), None, 0, [], None),
+                start=timeslot.start,
+                end=timeslot.end,
+                requested=AlgoTimeSlot(requested["day"], requested["start_time"], requested["end_time"]) if requested else timeslot
+            ))
+        changes = None
+        if "changes" in data:
+            changes = [(c["type"], c["room_id"] if c["type"] in ROOM_CHANGES else c["course_id"]) for c in data["changes"]]
+        logs = []
+        bookings, failed, report = repair_schedule(course_list, room_list, previous, logs, changes=changes,
+                                                   time_grid=time_grid,
+                                                   failed_bookings=data.get("failed_bookings", []),
+                                                   cohorts=None if data.get("cohorts") in (None, "none") else data["cohorts"])
+    except (KeyError, TypeError, ValueError) as e:
+        return Response({"error": f"Invalid repair request: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "bookings": serialize_bookings(bookings, inst, lecturer_lookup),
+        "failed_bookings": failed,
+        "logs": logs,
+        "repair": report
+    })
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -388,8 +529,9 @@ def export_file(request):
     year = data.get("academic_year", "Year")
     dept = data.get("department", "Department")
     institution_name = request.user.institution.name
+    time_grid = get_time_grid(request.user.institution)
 
     if file_format == "pdf":
-        return generate_pdf(schedule, failed, semester, faculty, session, institution_name)
+        return generate_pdf(schedule, failed, semester, faculty, session, institution_name, time_grid)
     else:
-        return generate_docx(schedule, failed, semester, year, dept, faculty, session)
\ No newline at end of file
+        return generate_docx(schedule, failed, semester, year, dept, faculty, session, time_grid)
\ No newline at end of file
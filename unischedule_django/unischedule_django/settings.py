@@ -92,6 +92,71 @@ ADMIN_SITE_HEADER = "UniScheduL administration"
 ADMIN_SITE_TITLE = "UniScheduL Admin"
 ADMIN_INDEX_TITLE = "Welcome to UniScheduL Admin Panel"
 
+# Scheduler portfolio mode (run-algorithm?runs=N): worker processes (None = one per CPU but the
+# one running the baseline) and wall-clock cap in seconds (baseline run included)
+SCHEDULER_PORTFOLIO_WORKERS = None
+SCHEDULER_PORTFOLIO_TIME_LIMIT = 10
+
+# Parallel solver (run-algorithm?solver=parallel, core/decompose.py): parts solved at once in
+# worker processes (None = one per CPU)
+SCHEDULER_PARALLEL_WORKERS = None
+
+# Exact solver (run-algorithm?solver=exact, core/exact.py): time limit in seconds before falling
+# back to the greedy result, and the largest search (slots x grid periods x rooms, exact.search_size)
+# run-algorithm solves within the request; larger ones are started as a background job instead
+SCHEDULER_EXACT_TIME_LIMIT = 5
+SCHEDULER_EXACT_SYNC_SIZE = 10000
+
+# Background scheduling jobs (core/jobs.py): pool threads per server process, jobs waiting or
+# running per process, active jobs per institution, and age (seconds) after which an unfinished
+# job is considered lost
+SCHEDULER_JOB_WORKERS = 2
+SCHEDULER_JOB_QUEUE_SIZE = 16
+SCHEDULER_JOBS_PER_INSTITUTION = 1
+SCHEDULER_JOB_TIMEOUT = 3600
+
+# Scheduler search counters and phase timings (core/stats.py) on every run, logged and returned
+# as "stats". Off: only runs asking for them (run-algorithm?stats=1) collect them.
+SCHEDULER_STATS = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.stats': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Snapshots of each institution's scheduling inputs (core/snapshot.py): runs read them instead of
+# querying the database while the inputs are unchanged, and portfolio workers memory-map them.
+# None turns them off.
+SCHEDULER_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+# Seconds a snapshot is used for before the inputs are read from the database again. Edits through
+# the models replace it at once (core/signals.py); this bounds how long edits that skip the signals
+# (QuerySet.update(), bulk_create, raw SQL) can go unseen. Code making such edits should call
+# core.result_cache.invalidate(institution_id) itself. None: only edits through the models.
+SCHEDULER_SNAPSHOT_MAX_AGE = 300
+
+# run-algorithm results, keyed by a hash of the institution's scheduling inputs (core/result_cache.py).
+# File-based so every gunicorn worker shares it; MAX_ENTRIES bounds its size.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'schedules': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'schedule_cache',
+        'TIMEOUT': 7 * 24 * 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+            'CULL_FREQUENCY': 4,  # drop a quarter of the entries when full
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
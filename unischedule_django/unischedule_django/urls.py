@@ -32,8 +32,19 @@ urlpatterns = [
     path('api/timeslots', views.timeslots_view),
     path('api/timeslots/<int:pk>', views.timeslot_detail),
 
+    # Time grid API
+    path('api/time-grid', views.time_grid_view),
+
     path('api/timetable', views.get_timetable),
     path('api/run-algorithm', views.run_algorithm),
+    path('api/run-algorithm/stream', views.run_algorithm_stream),
+    path('api/repair-schedule', views.repair_schedule_view),
+
+    # Background scheduling jobs
+    path('api/jobs', views.jobs_view),
+    path('api/jobs/<int:pk>', views.job_detail),
+    path('api/jobs/<int:pk>/result', views.job_result),
+    path('api/jobs/<int:pk>/cancel', views.job_cancel),
     path('api/dashboard-stats', views.get_dashboard_stats),
     path('api/recent-logs', views.get_recent_logs),
     path('api/export-file', views.export_file),